@@ -21,6 +21,7 @@ setup(
         "PyTurboJPEG",
         "python-uinput",
         "psycopg",
+        "psycopg_pool",
         "PyWinCtl",
     ],
     package_data={"aci": ["**/*.yaml", "**/*.sh"]},
@@ -0,0 +1,109 @@
+import asyncio
+import inspect
+from typing import AsyncIterator, Dict
+
+from aci.game_capture.notifier import CaptureNotifier
+from aci.interface import AssettoCorsaInterface
+from aci.utils.profiler import Sampling_Profiler
+from aci.utils.tracer import Pipeline_Tracer
+import numpy as np
+
+
+class AsyncAssettoCorsaInterface(AssettoCorsaInterface):
+    """
+    Abstract base class for agents that run on an asyncio event loop. behaviour
+        can be a coroutine, so an agent can await inference servers or several
+        models at once without threads of its own, and observations can be
+        consumed as an async iterator. Waiting for a capture never blocks the
+        event loop, the capture process signals an eventfd, or a pipe where
+        eventfd is unavailable, that is watched by the loop
+    """
+
+    def _initialise_capture(self):
+        super()._initialise_capture()
+        self._capture_notifier = CaptureNotifier()
+        self._game_capture.capture_notifier = self._capture_notifier
+        self._capture_event = None
+
+    def _setup_pipelining(self):
+        if self._config.get("pipelined", False):
+            message = "pipelined is not supported by AsyncAssettoCorsaInterface, "
+            message += "overlap work in behaviour with coroutines instead"
+            raise ValueError(message)
+        super()._setup_pipelining()
+
+    def run(self):
+        self._start()
+        Sampling_Profiler.start("agent")
+        try:
+            asyncio.run(self._run_agent())
+        except KeyboardInterrupt:
+            self.is_running = False
+        Sampling_Profiler.stop()
+        self.teardown()
+        self._shutdown()
+        self._capture_notifier.close()
+
+    async def _run_agent(self):
+        try:
+            async for observation in self.observations():
+                try:
+                    if self._is_termination_condition_met(observation):
+                        self.is_running = False
+                    with Pipeline_Tracer.span("behaviour"):
+                        action = await self._get_action(observation)
+                    self.act(action)
+                except Exception as e:
+                    self._log_exception(e)
+                    self.is_running = False
+        finally:
+            self._stop_watching_captures()
+
+    async def _get_action(self, observation: Dict) -> np.array:
+        action = self.behaviour(observation)
+        if inspect.isawaitable(action):
+            action = await action
+        return action
+
+    async def observations(self) -> AsyncIterator[Dict]:
+        """
+        Yields each new observation until the interface stops running, see
+            get_observation for its contents
+        """
+        while self.is_running:
+            yield await self.get_observation_async()
+
+    async def get_observation_async(self) -> Dict:
+        """
+        Awaits the next capture without blocking the event loop, then gets it as
+            get_observation would
+
+        :return: {Dictionary image: BGR image as np.array, state: Dict{str: float}}
+        :rtype: Dict[str: np.array, Dict]
+        """
+        self._watch_captures()
+        while self._game_capture.is_stale:
+            self._capture_event.clear()
+            # A capture published since the last check has already been signalled
+            if not self._game_capture.is_stale:
+                break
+            await self._capture_event.wait()
+        return self.get_observation()
+
+    def _watch_captures(self):
+        if self._capture_event is not None:
+            return
+        self._capture_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self._capture_notifier.fileno, self._on_capture_published)
+
+    def _stop_watching_captures(self):
+        if self._capture_event is None:
+            return
+        loop = asyncio.get_running_loop()
+        loop.remove_reader(self._capture_notifier.fileno)
+        self._capture_event = None
+
+    def _on_capture_published(self):
+        self._capture_notifier.drain()
+        self._capture_event.set()
@@ -0,0 +1,267 @@
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+from pathlib import Path
+import tempfile
+import time
+from typing import Dict, List
+
+from aci.interface import AssettoCorsaInterface
+from aci.utils.system_monitor import NS_PER_MS, System_Monitor
+from loguru import logger
+import numpy as np
+
+DEFAULT_DURATION = 30.0
+STATE_MODES = {
+    "bytes": {"use_dicts": False, "simulate_ins": False},
+    "dicts": {"use_dicts": True, "simulate_ins": False},
+    "ins": {"use_dicts": True, "simulate_ins": True},
+}
+PROCESS_ROLES = ["Agent", "GameCapture", "DatabaseStateLogger"]
+# Extra time allowed for a configuration to start and shut down
+RUN_TIMEOUT_MARGIN = 60.0
+
+
+class BenchmarkAgent(AssettoCorsaInterface):
+    """
+    Agent that spends a fixed time in behaviour and returns a neutral action,
+        measuring how fast the interface delivers observations for duration
+        seconds
+    """
+
+    def __init__(self, config: Dict, duration: float, behaviour_cost: float):
+        self._duration = duration
+        self._behaviour_cost = behaviour_cost
+        self._start_time = time.perf_counter()
+        self._start_counters = {}
+        self._is_started = False
+        self._n_observations = 0
+        self._n_new_images = 0
+        self.results = {}
+        super().__init__(config)
+
+    def behaviour(self, observation: Dict) -> np.array:
+        self._n_observations += 1
+        if not observation["is_image_stale"]:
+            self._n_new_images += 1
+        spin(self._behaviour_cost)
+        return np.zeros(3)
+
+    def termination_condition(self, observation: Dict) -> bool:
+        if not self._is_started:
+            # Counters start at the first observation, excluding start up
+            self._start_counters = System_Monitor.snapshot()["counters"]
+            self._start_time = time.perf_counter()
+            self._is_started = True
+        return time.perf_counter() - self._start_time >= self._duration
+
+    def teardown(self):
+        """
+        Summarises the run before the capture and logging processes are stopped
+        """
+        elapsed_time = time.perf_counter() - self._start_time
+        snapshot = System_Monitor.snapshot()
+        counters, histograms = snapshot["counters"], snapshot["histograms"]
+        for name, value in self._start_counters.items():
+            counters[name] -= value
+        self.results = {
+            "observations_per_second": self._n_observations / elapsed_time,
+            "new_images_per_second": self._n_new_images / elapsed_time,
+            "decoded_frames": counters.get("capture_frames", 0.0),
+            "dropped_frames": counters.get("dropped_frames", 0.0),
+            "stale_frames_per_action": counters.get("stale_frames", 0.0)
+            / max(self._n_observations, 1),
+        }
+        for name in ["frame_age", "capture_to_action"]:
+            summary = histograms.get(name, {"count": 0})
+            for percentile in ["p50", "p99"]:
+                value = summary.get(percentile, np.nan) / NS_PER_MS
+                self.results[f"{name}_{percentile}_ms"] = value
+        for role in PROCESS_ROLES:
+            cpu_seconds = counters.get(f"resources.{role}.cpu_seconds", np.nan)
+            self.results[f"{role}_cpu_percent"] = 100.0 * cpu_seconds / elapsed_time
+
+
+def spin(duration: float):
+    """
+    Busy waits so the agent uses the CPU as inference would
+    """
+    if duration <= 0.0:
+        return
+    end_time = time.perf_counter() + duration
+    while time.perf_counter() < end_time:
+        pass
+
+
+def get_interface_config(settings: Dict, output_path: Path) -> Dict:
+    """
+    Configures the interface to run with stand-in frame, state and AC sources
+
+    :settings: One configuration of the sweep
+    :type settings: Dict
+    :output_path: Folder to write the logging database to
+    :type output_path: Path
+    :return: Interface configuration
+    :rtype: Dict
+    """
+    images_config = {
+        "resolution": settings["resolution"],
+        "image_format": settings["image_format"],
+        "source": {"type": "synthetic", "framerate": settings["framerate"]},
+    }
+    state_config = dict(STATE_MODES[settings["state_mode"]])
+    state_config["stand_in"] = {"source": "synthetic", "rate": settings["state_rate"]}
+    config = {
+        "capture": {
+            "is_stand_in": True,
+            "images": images_config,
+            "state": state_config,
+        },
+        "input_interface": "null",
+        "pipelined": settings["is_pipelined"],
+        "termination": {"check_every_n": 0, "max_consecutive_failures": 1},
+        "resource_sampler": {"rate": 2.0},
+    }
+    if settings["is_logging"]:
+        config["sqlite"] = {"path": output_path.joinpath("benchmark.db")}
+    return config
+
+
+def run_benchmark(settings: Dict, result_queue: mp.Queue):
+    # Spawned interpreters inherit the spawn start method, while the interface
+    # relies on forking to share its metrics and buffers with its processes
+    mp.set_start_method("fork", force=True)
+    with tempfile.TemporaryDirectory() as output_path:
+        config = get_interface_config(settings, Path(output_path))
+        agent = BenchmarkAgent(config, settings["duration"], settings["behaviour_cost"])
+        agent.run()
+    result_queue.put(agent.results)
+
+
+def run_sweep(arguments: argparse.Namespace) -> List[Dict]:
+    """
+    Runs each combination of settings in a fresh interpreter, so the metrics of
+        one configuration are not mixed with those of another
+    """
+    context = mp.get_context("spawn")
+    sweep = itertools.product(
+        arguments.resolutions,
+        arguments.image_formats,
+        arguments.state_modes,
+        arguments.logging,
+        arguments.pipelined,
+    )
+    results = []
+    for resolution, image_format, state_mode, is_logging, is_pipelined in sweep:
+        settings = {
+            "resolution": resolution,
+            "image_format": image_format,
+            "state_mode": state_mode,
+            "is_logging": is_logging,
+            "is_pipelined": is_pipelined,
+            "framerate": arguments.framerate,
+            "state_rate": arguments.state_rate,
+            "duration": arguments.duration,
+            "behaviour_cost": arguments.behaviour_cost,
+        }
+        result_queue = context.Queue()
+        process = context.Process(target=run_benchmark, args=(settings, result_queue))
+        process.start()
+        result = result_queue.get(timeout=arguments.duration + RUN_TIMEOUT_MARGIN)
+        process.join()
+        settings.update(result)
+        logger.info(format_result(settings))
+        results.append(settings)
+    return results
+
+
+def format_result(result: Dict) -> str:
+    width, height = result["resolution"]
+    logging = "on" if result["is_logging"] else "off"
+    pipelined = "on" if result["is_pipelined"] else "off"
+    message = f"{width}x{height} {result['image_format']} state "
+    message += f"{result['state_mode']} logging {logging} pipelined {pipelined}: "
+    message += f"{result['observations_per_second']:.1f} obs/s, "
+    message += f"{result['new_images_per_second']:.1f} new images/s, "
+    message += f"age p50 {result['frame_age_p50_ms']:.2f} ms "
+    message += f"p99 {result['frame_age_p99_ms']:.2f} ms, "
+    message += f"capture to action p50 {result['capture_to_action_p50_ms']:.2f} ms "
+    message += f"p99 {result['capture_to_action_p99_ms']:.2f} ms, "
+    message += f"{result['dropped_frames']:.0f} of {result['decoded_frames']:.0f} "
+    message += "frames dropped, "
+    message += f"{result['stale_frames_per_action']:.2f} newer frames per action, CPU "
+    message += ", ".join(
+        f"{role} {result[f'{role}_cpu_percent']:.0f}%" for role in PROCESS_ROLES
+    )
+    return message
+
+
+def parse_resolution(resolution: str) -> List[int]:
+    width, height = resolution.split("x")
+    return [int(width), int(height)]
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure the throughput and latency of the interface without AC"
+    )
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION)
+    parser.add_argument(
+        "--behaviour-cost",
+        type=float,
+        default=0.0,
+        help="Seconds the agent spends in behaviour each step",
+    )
+    parser.add_argument(
+        "--resolutions",
+        type=parse_resolution,
+        nargs="+",
+        default=[[640, 480], [1920, 1080]],
+        help="Resolutions as WIDTHxHEIGHT",
+    )
+    parser.add_argument("--image-formats", nargs="+", default=["BGR0", "BGR", "RGB"])
+    parser.add_argument(
+        "--state-modes", nargs="+", choices=list(STATE_MODES), default=["bytes"]
+    )
+    parser.add_argument(
+        "--logging",
+        type=lambda value: value == "on",
+        nargs="+",
+        default=[False, True],
+        help="Run with the database logger on, off or both",
+    )
+    parser.add_argument(
+        "--pipelined",
+        type=lambda value: value == "on",
+        nargs="+",
+        default=[False],
+        help="Run with the pipelined agent loop on, off or both",
+    )
+    parser.add_argument(
+        "--framerate",
+        type=float,
+        default=60.0,
+        help="Frames per second of the synthetic frame source, 0 for unlimited",
+    )
+    parser.add_argument(
+        "--state-rate",
+        type=float,
+        default=333.0,
+        help="Packets per second of the stand-in state server",
+    )
+    parser.add_argument("--output", type=Path, help="Saves the results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    arguments = parse_arguments()
+    results = run_sweep(arguments)
+    if arguments.output is not None:
+        with open(arguments.output, "w") as file:
+            json.dump(results, file, indent=2)
+        logger.info(f"Saved results to {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+from aci.benchmarks.utils import RESOLUTIONS, make_bgr0_image, make_state_bytes
+from aci.game_capture.inference import GameCapture
+import pytest
+
+
+@pytest.fixture
+def game_capture(request):
+    width, height = request.param
+    config = {
+        "video.ini": {"VIDEO": {"WIDTH": str(width), "HEIGHT": str(height)}},
+        "capture": {"images": {"image_format": "BGR0"}},
+    }
+    game_capture = GameCapture(config)
+    yield game_capture
+    game_capture.stop()
+
+
+@pytest.mark.benchmark(group="game_capture")
+@pytest.mark.parametrize("game_capture", RESOLUTIONS, indirect=True)
+def test_publish_and_consume_capture(benchmark, game_capture):
+    """
+    Round trip of a new image and state through shared memory, as written by the
+        capture process and read by the agent
+    """
+    image = make_bgr0_image(game_capture._image_stream_config["resolution"])
+    state = {"state": make_state_bytes()}
+
+    def publish_and_consume():
+        game_capture.capture = {"state": state, "image": image, "frame": 0}
+        return game_capture.capture
+
+    benchmark(publish_and_consume)
+
+
+@pytest.mark.benchmark(group="game_capture")
+@pytest.mark.parametrize("game_capture", RESOLUTIONS[:1], indirect=True)
+def test_state_bytes_read_by_logger(benchmark, game_capture):
+    benchmark(lambda: game_capture.state_bytes)
@@ -0,0 +1,22 @@
+from aci.benchmarks.utils import RESOLUTIONS, make_bgr0_image
+from aci.game_capture.video.pyav_capture import IMAGE_FORMAT_CONVERSION
+from aci.utils.save import save_bgr0_as_jpeg
+import numpy as np
+import pytest
+
+
+@pytest.mark.benchmark(group="images")
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+@pytest.mark.parametrize("image_format", list(IMAGE_FORMAT_CONVERSION))
+def test_image_format_conversion(benchmark, resolution, image_format):
+    image = make_bgr0_image(resolution)
+    conversion = IMAGE_FORMAT_CONVERSION[image_format]
+    # Conversions return views, the copy is what consumers of the image pay for
+    benchmark(lambda: np.ascontiguousarray(conversion(image)))
+
+
+@pytest.mark.benchmark(group="images")
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+def test_save_bgr0_as_jpeg(benchmark, tmp_path, resolution):
+    image = make_bgr0_image(resolution)
+    benchmark(save_bgr0_as_jpeg, str(tmp_path.joinpath("image")), image)
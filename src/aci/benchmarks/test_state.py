@@ -0,0 +1,49 @@
+from aci.benchmarks.utils import make_state_bytes
+from aci.metrics.database.sql import get_insert_row_sql
+from aci.metrics.database.state_logger import (
+    DatabaseStateInterface,
+    convert_numpy_types,
+)
+from aci.utils.ins import SimulatedINS
+from aci.utils.load import state_bytes_to_dict
+import pytest
+
+
+@pytest.mark.benchmark(group="state")
+def test_state_bytes_to_dict(benchmark):
+    state_bytes = make_state_bytes()
+    benchmark(state_bytes_to_dict, state_bytes)
+
+
+@pytest.mark.benchmark(group="state")
+def test_convert_numpy_types(benchmark):
+    state = state_bytes_to_dict(make_state_bytes())
+    benchmark(convert_numpy_types, state)
+
+
+@pytest.mark.benchmark(group="state")
+def test_simulated_ins(benchmark):
+    state = state_bytes_to_dict(make_state_bytes())
+    benchmark(SimulatedINS(), state)
+
+
+@pytest.mark.benchmark(group="database")
+@pytest.mark.parametrize("dialect", ["postgres", "sqlite"])
+def test_insert_sql_generation(benchmark, dialect):
+    benchmark(get_insert_row_sql, "benchmark", dialect)
+
+
+@pytest.mark.benchmark(group="database")
+@pytest.mark.parametrize("schema", ["full", "narrow"])
+def test_sqlite_state_logging(benchmark, tmp_path, schema):
+    database_config = {
+        "backend": "sqlite",
+        "path": tmp_path.joinpath("benchmark.db"),
+        "table_name": "benchmark",
+        "schema": schema,
+        "columns": ["completed_laps", "speed_kmh", "normalised_car_position"],
+        "notify_on": [],
+    }
+    state_logger = DatabaseStateInterface(database_config)
+    benchmark(state_logger.log_state, make_state_bytes())
+    state_logger.close()
@@ -0,0 +1,27 @@
+from acs.shared_memory.ac.combined import COMBINED_DATA_TYPES
+import numpy as np
+
+RESOLUTIONS = [(640, 480), (1920, 1080)]
+
+
+def make_state_bytes(seed: int = 0) -> bytes:
+    """
+    Game state with random numeric values in place of a recording from AC
+
+    :seed: Seed of the random values
+    :type seed: int
+    :return: Game state bytes as sent by the state server
+    :rtype: bytes
+    """
+    state = np.zeros(1, dtype=COMBINED_DATA_TYPES)
+    random_generator = np.random.default_rng(seed)
+    for name in state.dtype.names:
+        if state.dtype[name].kind in "if":
+            state[name] = random_generator.uniform(0, 100)
+    return state.tobytes()
+
+
+def make_bgr0_image(resolution: tuple, seed: int = 0) -> np.array:
+    width, height = resolution
+    random_generator = np.random.default_rng(seed)
+    return random_generator.integers(0, 256, (height, width, 4), dtype=np.uint8)
@@ -1,17 +1,29 @@
 import ctypes
 import multiprocessing as mp
 from multiprocessing.shared_memory import SharedMemory
+import os
 import signal
 import time
-from typing import Dict, Union
+from typing import Dict, Tuple, Union
 
 from aci.config.constants import CAPTURE_CONFIG_FILE
+from aci.game_capture.notifier import CaptureNotifier
+from aci.game_capture.state.stand_in import get_state_client
 from aci.game_capture.video.pyav_capture import ImageStream
 from aci.utils.ins import SimulatedINS
 from aci.utils.load import load_yaml
-from aci.utils.state import identity, process_state, simulate_ins_readings
+from aci.utils.profiler import Sampling_Profiler
+from aci.utils.state import (
+    StateRecord,
+    identity,
+    process_state,
+    process_state_record,
+    record_bytes,
+    simulate_ins_readings,
+    simulate_ins_record_readings,
+)
 from aci.utils.system_monitor import System_Monitor, track_runtime
-from acs.client import StateClient
+from aci.utils.tracer import NO_FRAME, Pipeline_Tracer
 from acs.shared_memory.ac.combined import COMBINED_DATA_TYPES
 import numpy as np
 
@@ -32,58 +44,131 @@ class GameCapture(mp.Process):
     def capture(self) -> Dict:
         """
         Blocking access that waits until a new image from the game is received before
-            returning a capture dictionary
+            returning a capture dictionary. With preallocated set in the config the
+            dictionary, image and state are reused by every capture, so are only
+            valid until the next capture
 
         :return: {Dictionary image: BGR image as np.array, state: bytes}
         :rtype: Dict[str : np.array, Union[bytes, Dict]]
         """
-        self._wait_for_fresh_capture()
+        return self.capture_into(None)
 
-        image, state = self._get_capture()
+    def capture_into(
+        self, image: Union[np.array, None], poll_interval: float = 0.0
+    ) -> Dict:
+        """
+        Blocking access as capture, copying the image into image rather than a
+            newly allocated array. The image of a capture is only valid until the
+            next capture into the same array
+
+        :image: Array of image_shape to copy the image into, None to allocate one
+        :type image: Union[np.array, None]
+        :poll_interval: Seconds to sleep between checks for a new capture, 0 to
+            busy wait. Sleeping lets other threads of the agent hold the GIL
+        :type poll_interval: float
+        :return: {Dictionary image: BGR image as np.array, state: bytes}
+        :rtype: Dict[str : np.array, Union[bytes, Dict]]
+        """
+        with Pipeline_Tracer.span("capture_wait") as span:
+            self._wait_for_fresh_capture(poll_interval)
+            span.frame = self.frame_sequence
+
+        with Pipeline_Tracer.span("capture_copy"):
+            image, state = self._get_capture(image)
         self.is_stale = True
         is_image_stale = self._is_cached_image_stale
-        state = self._state_transform(state, self._simulated_INS)
+        with Pipeline_Tracer.span("state_transform"):
+            state = self._state_transform(state, self._simulated_INS)
         self._is_cached_image_stale = True
-        return {"state": state, "image": image, "is_image_stale": is_image_stale}
-
-    def _get_capture(self):
+        return self._get_observation(state, image, is_image_stale)
+
+    def _get_observation(
+        self, state: Union[bytes, Dict], image: np.array, is_image_stale: bool
+    ) -> Dict:
+        if not self._is_preallocated:
+            return {"state": state, "image": image, "is_image_stale": is_image_stale}
+        self._observation["state"] = state
+        self._observation["image"] = image
+        self._observation["is_image_stale"] = is_image_stale
+        return self._observation
+
+    def _get_capture(self, image: Union[np.array, None]):
         image_mp_array, _ = self._shared_image_buffer
         mp_buffer = self._shared_state_buffer
         with image_mp_array.get_lock():
-            self._maybe_update_image()
+            is_new_image = self._maybe_update_image(image)
             state = self._copy_state(mp_buffer)
+            frame = self._frame_sequence.value
+            frame_time_ns = self._frame_time_ns.value
+        Pipeline_Tracer.current_frame = frame
+        if is_new_image and frame != NO_FRAME:
+            self._record_frame_delivery(frame, frame_time_ns)
         return self._image, state
 
-    def _maybe_update_image(self):
+    def _maybe_update_image(self, image: Union[np.array, None]) -> bool:
         _, image_np_array = self._shared_image_buffer
-        if not self.is_image_stale:
-            self._copy_image(image_np_array)
-            self.is_image_stale = True
-            self._is_cached_image_stale = False
-
-    def _copy_image(self, image: np.array):
-        self._image = image.copy()
+        if self.is_image_stale:
+            if image is not None and image is not self._image:
+                self._copy_image(self._image, image)
+            return False
+        self._copy_image(image_np_array, image)
+        self.is_image_stale = True
+        self._is_cached_image_stale = False
+        return True
+
+    def _record_frame_delivery(self, frame: int, frame_time_ns: int):
+        """
+        Records the age of a newly received frame and counts the frames decoded
+            since the previous one was received, which the agent never saw
+        """
+        System_Monitor.record("frame_age", time.perf_counter_ns() - frame_time_ns)
+        n_dropped = frame - self._received_frame - 1
+        if self._received_frame != NO_FRAME and n_dropped > 0:
+            System_Monitor.increment("dropped_frames", n_dropped)
+        self._received_frame = frame
+        self._received_frame_time_ns = frame_time_ns
+
+    def _copy_image(self, image: np.array, destination: Union[np.array, None]):
+        if destination is None and self._image_buffer is None:
+            self._image = image.copy()
+        elif destination is None:
+            np.copyto(self._image_buffer, image)
+            self._image = self._image_buffer
+        else:
+            np.copyto(destination, image)
+            self._image = destination
 
-    def _copy_state(self, mp_buffer):
-        return mp_buffer.buf[:].tobytes()
+    def _copy_state(self, mp_buffer) -> Union[bytes, StateRecord]:
+        if self._state_record is None:
+            return mp_buffer.buf[:].tobytes()
+        self._state_record.update(mp_buffer.buf)
+        return self._state_record
 
-    def _wait_for_fresh_capture(self):
+    def _wait_for_fresh_capture(self, poll_interval: float = 0.0):
         while self.is_stale:
-            continue
+            if poll_interval > 0.0:
+                time.sleep(poll_interval)
 
     @capture.setter
     def capture(self, capture: Dict):
         """
         Accepts a capture dictionary and copies them to the shared memory buffer
 
-        :capture: A Dictionary containing {"image": image, "state": state}
-        :type capture: Dict[str : np.array, bytes]
+        :capture: A Dictionary containing {"image": image, "state": state} and
+            optionally the image's sequence number as "frame" and the time it was
+            decoded from time.perf_counter_ns as "frame_time"
+        :type capture: Dict[str : np.array, bytes, int]
         """
         image_mp_array, _ = self._shared_image_buffer
         with image_mp_array.get_lock():
+            if self._is_new_frame(capture["image"]):
+                self._frame_sequence.value = capture.get("frame", NO_FRAME)
+                self._frame_time_ns.value = capture.get("frame_time", 0)
             self._maybe_update_frame(capture["image"])
             self._update_state(capture["state"])
         self.is_stale = False
+        if self._capture_notifier is not None:
+            self._capture_notifier.notify()
 
     def _maybe_update_frame(self, image: Union[np.array, None]):
         _, image_np_array = self._shared_image_buffer
@@ -112,6 +197,65 @@ class GameCapture(mp.Process):
             state = mp_buffer.buf[:].tobytes()
         return state
 
+    @property
+    def frame_sequence(self) -> int:
+        """
+        Sequence number assigned by the image stream to the latest image
+
+        :return: Sequence number of the latest image
+        :rtype: int
+        """
+        return self._frame_sequence.value
+
+    @property
+    def received_frame(self) -> int:
+        """
+        Sequence number of the image last returned by capture, NO_FRAME until an
+            image with a sequence number has been received
+
+        :return: Sequence number of the received image
+        :rtype: int
+        """
+        return self._received_frame
+
+    @property
+    def image_shape(self) -> tuple:
+        """
+        :return: Shape of captured images as (height, width, channels)
+        :rtype: tuple
+        """
+        return self._image_shape
+
+    @property
+    def received_frame_time_ns(self) -> int:
+        """
+        Time the image last returned by capture was decoded, from the consumer's
+            side, 0 until an image with a decode time has been received
+
+        :return: Decode time in nanoseconds from time.perf_counter_ns
+        :rtype: int
+        """
+        return self._received_frame_time_ns
+
+    @property
+    def capture_notifier(self) -> Union[CaptureNotifier, None]:
+        """
+        :return: Notifier signalled each time a capture is published, if any
+        :rtype: Union[CaptureNotifier, None]
+        """
+        return self._capture_notifier
+
+    @capture_notifier.setter
+    def capture_notifier(self, capture_notifier: CaptureNotifier):
+        """
+        Signals capture_notifier each time a capture is published, must be set
+            before the capture process is started
+
+        :capture_notifier: Notifier to signal
+        :type capture_notifier: CaptureNotifier
+        """
+        self._capture_notifier = capture_notifier
+
     @property
     def is_stale(self) -> bool:
         """
@@ -186,31 +330,47 @@ class GameCapture(mp.Process):
         Called on GameCapture.start()
         """
         self.__setup_capture_process()
+        Sampling_Profiler.start("capture")
         while self.is_running:
             self._observation_capture_work()
-            # self._log_processing_speed()
+            self._log_processing_speed()
             time.sleep(1e-3)
+        Sampling_Profiler.stop()
+        Pipeline_Tracer.flush()
 
     def _log_processing_speed(self):
         System_Monitor.maybe_log_function_itterations_per_second()
 
     @track_runtime(System_Monitor)
     def _observation_capture_work(self):
-        image = self._maybe_get_updated_frame()
+        image, frame, frame_time = self._maybe_get_updated_frame()
         state = self.state_capture.latest_state
-        self.capture = {"state": state, "image": image}
-
-    def _maybe_get_updated_frame(self) -> Union[np.array, None]:
+        with Pipeline_Tracer.span("publish", frame):
+            self.capture = {
+                "state": state,
+                "image": image,
+                "frame": frame,
+                "frame_time": frame_time,
+            }
+
+    def _maybe_get_updated_frame(self) -> Tuple[Union[np.array, None], int, int]:
+        """
+        :return: The latest image with its sequence number and decode time, or
+            None if it has already been published, as sequence numbers and
+            times are only published with an image
+        :rtype: Tuple[Union[np.array, None], int, int]
+        """
         if not self.image_stream.is_stale:
-            image = self.image_stream.image
-        else:
-            image = None
-        return image
+            return self.image_stream.frame
+        return None, self.image_stream.frame_sequence, 0
 
     def __setup_capture_process(self):
         signal.signal(signal.SIGINT, signal.SIG_IGN)
+        if "display" in self._image_stream_config:
+            # Only affects this process, so instances can capture separate displays
+            os.environ["DISPLAY"] = self._image_stream_config["display"]
         self.image_stream = ImageStream(self._capture_config)
-        self.state_capture = StateClient()
+        self.state_capture = get_state_client(self._state_config)
 
     def stop(self):
         """
@@ -232,16 +392,38 @@ class GameCapture(mp.Process):
         n_channels = 4 if self._image_stream_config["image_format"] == "BGR0" else 3
         self._image_shape = (height, width, n_channels)
         self._is_cached_image_stale = True
+        self._received_frame = NO_FRAME
+        self._received_frame_time_ns = 0
+        self._is_preallocated = config.get("preallocated", False)
 
     def __setup_state_postprocessing(self):
-        self._simulated_INS = SimulatedINS()
-        if self._simulate_ins:
+        self._simulated_INS = SimulatedINS(
+            self._is_preallocated, self._state_config.get("ins_seed")
+        )
+        if self._is_preallocated:
+            self.__setup_preallocated_buffers()
+        else:
+            self._image_buffer = None
+            self._state_record = None
+        if self._is_preallocated and self._simulate_ins:
+            self._state_transform = simulate_ins_record_readings
+        elif self._is_preallocated and self._use_state_dicts:
+            self._state_transform = process_state_record
+        elif self._is_preallocated:
+            self._state_transform = record_bytes
+        elif self._simulate_ins:
             self._state_transform = simulate_ins_readings
         elif self._use_state_dicts:
             self._state_transform = process_state
         else:
             self._state_transform = identity
 
+    def __setup_preallocated_buffers(self):
+        # Reused by every capture so steady state steps allocate nothing
+        self._image_buffer = np.zeros(self._image_shape, dtype=np.uint8)
+        self._state_record = StateRecord()
+        self._observation = {"state": None, "image": None, "is_image_stale": True}
+
     def _load_configuration(self, config: Dict):
         self._capture_config = load_yaml(CAPTURE_CONFIG_FILE)
         if self._is_dynamic_config(config):
@@ -296,3 +478,7 @@ class GameCapture(mp.Process):
         self._is_stale = mp.Value("i", True)
         self._is_image_stale = mp.Value("i", False)
         self._is_running = mp.Value("i", True)
+        # Written while holding the image buffer's lock
+        self._frame_sequence = mp.Value("l", NO_FRAME, lock=False)
+        self._frame_time_ns = mp.Value("q", 0, lock=False)
+        self._capture_notifier = None
@@ -0,0 +1,65 @@
+import os
+
+# Bytes drained from the notification pipe per read
+PIPE_READ_SIZE = 4096
+
+
+class CaptureNotifier:
+    """
+    Wakes a process waiting for captures without it busy waiting. GameCapture
+        signals the notifier each time it publishes a capture and the waiting
+        process watches fileno, for example with an event loop's add_reader,
+        then drains it. Uses an eventfd where available and a pipe otherwise.
+        Must be created before the capture process is started so the file
+        descriptors are inherited
+    """
+
+    def __init__(self, use_eventfd: bool = True):
+        self._is_eventfd = use_eventfd and hasattr(os, "eventfd")
+        if self._is_eventfd:
+            self._read_fd = os.eventfd(0, os.EFD_NONBLOCK)
+            self._write_fd = self._read_fd
+        else:
+            self._read_fd, self._write_fd = os.pipe()
+            os.set_blocking(self._read_fd, False)
+            os.set_blocking(self._write_fd, False)
+
+    @property
+    def fileno(self) -> int:
+        """
+        :return: File descriptor that becomes readable once a capture is published
+        :rtype: int
+        """
+        return self._read_fd
+
+    @property
+    def is_eventfd(self) -> bool:
+        return self._is_eventfd
+
+    def notify(self):
+        try:
+            if self._is_eventfd:
+                os.eventfd_write(self._write_fd, 1)
+            else:
+                os.write(self._write_fd, b"\0")
+        except BlockingIOError:
+            # Already readable with notifications pending
+            pass
+
+    def drain(self):
+        """
+        Consumes pending notifications so fileno is no longer readable
+        """
+        try:
+            if self._is_eventfd:
+                os.eventfd_read(self._read_fd)
+            else:
+                while os.read(self._read_fd, PIPE_READ_SIZE):
+                    pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self._read_fd)
+        if self._write_fd != self._read_fd:
+            os.close(self._write_fd)
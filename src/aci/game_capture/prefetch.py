@@ -0,0 +1,89 @@
+import queue
+import threading
+from typing import Dict, Tuple
+
+from aci.game_capture.inference import GameCapture
+from aci.utils.tracer import Pipeline_Tracer
+import numpy as np
+
+N_IMAGE_BUFFERS = 2
+# Placed in the free buffer queue to stop the prefetch thread
+STOP_PREFETCHING = None
+PREFETCH_JOIN_TIMEOUT = 1.0
+# Sleeping between checks for a capture leaves the GIL to the agent's inference
+POLL_INTERVAL = 0.0002
+# Interval to check for stop while waiting for the agent to take an observation
+HAND_OVER_TIMEOUT = 0.01
+
+
+class ObservationPrefetcher:
+    """
+    Captures the next observation on a background thread while the agent acts on
+        the current one. Images are double buffered, the next capture is copied
+        into the buffer the agent is not using and handed over without a copy.
+        A buffer is only reused once the agent has taken the observation after
+        the one it holds
+    """
+
+    def __init__(self, game_capture: GameCapture):
+        self._game_capture = game_capture
+        self.__setup_buffers()
+        self.__start_prefetch_thread()
+
+    def __setup_buffers(self):
+        shape = self._game_capture.image_shape
+        self._buffers = [
+            np.zeros(shape, dtype=np.uint8) for _ in range(N_IMAGE_BUFFERS)
+        ]
+        self._free_buffers = queue.Queue()
+        for i in range(N_IMAGE_BUFFERS):
+            self._free_buffers.put(i)
+        self._observations = queue.Queue(maxsize=1)
+        self._held_buffer = None
+
+    def __start_prefetch_thread(self):
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="ObservationPrefetcher")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def get(self) -> Tuple[Dict, int, int]:
+        """
+        Blocks until the next observation has been captured, releasing the buffer
+            of the previous observation to be captured into
+
+        :return: Observation as returned by GameCapture.capture, the sequence
+            number of its image and the time its image was decoded
+        :rtype: Tuple[Dict, int, int]
+        """
+        buffer, observation, frame, frame_time_ns = self._observations.get()
+        if self._held_buffer is not None:
+            self._free_buffers.put(self._held_buffer)
+        self._held_buffer = buffer
+        return observation, frame, frame_time_ns
+
+    def stop(self):
+        self._is_running = False
+        self._free_buffers.put(STOP_PREFETCHING)
+        self._thread.join(timeout=PREFETCH_JOIN_TIMEOUT)
+
+    def _run(self):
+        while self._is_running:
+            buffer = self._free_buffers.get()
+            if buffer is STOP_PREFETCHING:
+                return
+            with Pipeline_Tracer.span("prefetch"):
+                observation = self._game_capture.capture_into(
+                    self._buffers[buffer], POLL_INTERVAL
+                )
+            frame = self._game_capture.received_frame
+            frame_time_ns = self._game_capture.received_frame_time_ns
+            self._hand_over((buffer, observation, frame, frame_time_ns))
+
+    def _hand_over(self, prefetched: tuple):
+        while self._is_running:
+            try:
+                self._observations.put(prefetched, timeout=HAND_OVER_TIMEOUT)
+                return
+            except queue.Full:
+                continue
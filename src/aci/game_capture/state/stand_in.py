@@ -0,0 +1,246 @@
+import abc
+import math
+from pathlib import Path
+import threading
+import time
+from typing import Dict, List, Union
+
+from acs.client import StateClient
+from acs.shared_memory.ac.combined import COMBINED_DATA_TYPES
+from loguru import logger
+import numpy as np
+
+DEFAULT_RATE = 333.0
+DEFAULT_TRACK_LENGTH = 4000.0
+DEFAULT_SPEED_KMH = 150.0
+KMH_TO_MS = 1.0 / 3.6
+MS_PER_S = 1000
+
+
+class StateSource(abc.ABC):
+    """
+    Produces the game states sent by a stand-in state server, one per packet
+    """
+
+    def __init__(self, source_config: Dict):
+        self._config = source_config
+        self._dtype = np.dtype(COMBINED_DATA_TYPES)
+        self._setup()
+
+    def _setup(self):
+        """
+        Optionally implement source specific setup here
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_state(self, packet_id: int) -> bytes:
+        """
+        Implement logic to produce the game state of a packet
+
+        :packet_id: Number of packets produced before this one, including drops
+        :type packet_id: int
+        :return: Game state laid out as COMBINED_DATA_TYPES
+        :rtype: bytes
+        """
+        pass
+
+
+class SyntheticStateSource(StateSource):
+    """
+    Drives a car around a circular track at a constant speed. Lap count, lap times
+        and normalised position advance consistently with the packet rate, so the
+        states can be logged and evaluated as if recorded from AC
+    """
+
+    def _setup(self):
+        self._rate = self._config.get("rate", DEFAULT_RATE)
+        self._track_length = self._config.get("track_length", DEFAULT_TRACK_LENGTH)
+        speed_kmh = self._config.get("speed_kmh", DEFAULT_SPEED_KMH)
+        self._speed = speed_kmh * KMH_TO_MS
+        self._radius = self._track_length / (2 * math.pi)
+        self._lap_time = self._track_length / self._speed
+        self._state = np.zeros(1, dtype=self._dtype)
+        self._set("speed_kmh", speed_kmh)
+        self._set("throttle", 0.5)
+        self._set("gear", 4)
+        self._set("acceleration_g_X", self._speed**2 / self._radius / 9.81)
+        self._set("steering_angle", math.atan(1.0 / self._radius))
+
+    def _set(self, name: str, value: float):
+        if name in self._dtype.names:
+            self._state[name] = value
+
+    def get_state(self, packet_id: int) -> bytes:
+        elapsed_time = packet_id / self._rate
+        completed_laps, lap_time = divmod(elapsed_time, self._lap_time)
+        position = lap_time / self._lap_time
+        angle = 2 * math.pi * position
+        self._set("packet_id", packet_id)
+        self._set("completed_laps", completed_laps)
+        self._set("normalised_car_position", position)
+        self._set("i_current_time", lap_time * MS_PER_S)
+        if completed_laps > 0:
+            self._set("i_last_time", self._lap_time * MS_PER_S)
+            self._set("i_best_time", self._lap_time * MS_PER_S)
+        self._set("ego_location_x", self._radius * math.cos(angle))
+        self._set("ego_location_z", self._radius * math.sin(angle))
+        self._set("heading", angle + math.pi / 2)
+        self._set("velocity_x", -self._speed * math.sin(angle))
+        self._set("velocity_z", self._speed * math.cos(angle))
+        return self._state.tobytes()
+
+
+class ReplayStateSource(StateSource):
+    """
+    Replays the game states of a recorded session, the .bin files in the folder
+        at path, in the order they were recorded. Loops back to the start of the
+        recording unless loop is False, after which the last state is repeated
+    """
+
+    def _setup(self):
+        self._states = load_recorded_states(self._config["path"])
+        self._is_looping = self._config.get("loop", True)
+        if len(self._states[0]) != self._dtype.itemsize:
+            message = f"Recorded states are {len(self._states[0])} bytes, "
+            message += f"expected {self._dtype.itemsize} bytes"
+            raise ValueError(message)
+
+    def get_state(self, packet_id: int) -> bytes:
+        n_states = len(self._states)
+        if self._is_looping:
+            return self._states[packet_id % n_states]
+        return self._states[min(packet_id, n_states - 1)]
+
+
+def load_recorded_states(path: Union[Path, str]) -> List[bytes]:
+    """
+    Loads the game states of a recorded session, ordered by their file names'
+        index, such as those saved by the recorder
+
+    :path: Folder of .bin game state files
+    :type path: Union[Path, str]
+    :return: Game states in recorded order
+    :rtype: List[bytes]
+    """
+    filepaths = sorted(Path(path).glob("*.bin"), key=lambda path: int(path.stem))
+    if len(filepaths) == 0:
+        raise FileNotFoundError(f"No recorded game states in {path}")
+    return [filepath.read_bytes() for filepath in filepaths]
+
+
+STATE_SOURCES = {
+    "synthetic": SyntheticStateSource,
+    "replay": ReplayStateSource,
+}
+
+
+class StandInStateClient:
+    """
+    Stand-in for acs.client.StateClient that needs no running game. A background
+        thread acts as the state server, producing a state at rate packets per
+        second from a synthetic or replayed source. The time between packets
+        varies by up to jitter seconds and packets are dropped, in bursts of
+        drop_burst, with probability drop_probability
+    """
+
+    def __init__(self, stand_in_config: Dict):
+        self._source = STATE_SOURCES[stand_in_config.get("source", "synthetic")](
+            stand_in_config
+        )
+        self.__setup_configuration(stand_in_config)
+        self._latest_state = None
+        self._n_packets = 0
+        self._is_state_ready = threading.Event()
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="StandInStateServer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __setup_configuration(self, stand_in_config: Dict):
+        self._period = 1.0 / stand_in_config.get("rate", DEFAULT_RATE)
+        self._jitter = stand_in_config.get("jitter", 0.0)
+        self._drop_probability = stand_in_config.get("drop_probability", 0.0)
+        self._drop_burst = stand_in_config.get("drop_burst", 1)
+        self._random_generator = np.random.default_rng(stand_in_config.get("seed"))
+
+    @property
+    def latest_state(self) -> Dict:
+        """
+        :return: Most recent game state received as {"state": bytes}
+        :rtype: Dict
+        """
+        return self._latest_state
+
+    @property
+    def n_packets(self) -> int:
+        """
+        :return: Number of packets produced, including those dropped
+        :rtype: int
+        """
+        return self._n_packets
+
+    def wait_until_AC_is_ready(self, timeout: float = None) -> bool:
+        """
+        Blocks until the first state has been received
+
+        :timeout: Seconds to wait, None to wait indefinitely
+        :type timeout: float
+        :return: True once a state has been received, False on timeout
+        :rtype: bool
+        """
+        return self._is_state_ready.wait(timeout)
+
+    def stop(self):
+        self._is_running = False
+        self._thread.join()
+
+    def _run(self):
+        next_packet_time = time.perf_counter()
+        n_drops_remaining = 0
+        while self._is_running:
+            if n_drops_remaining == 0 and self._is_packet_dropped():
+                n_drops_remaining = self._drop_burst
+            if n_drops_remaining > 0:
+                n_drops_remaining -= 1
+            else:
+                self._send_state()
+            self._n_packets += 1
+            # Falls behind rather than sending a burst of packets to catch up
+            next_packet_time = max(next_packet_time + self._period, time.perf_counter())
+            self._sleep_until(next_packet_time + self._get_jitter())
+
+    def _is_packet_dropped(self) -> bool:
+        if self._drop_probability <= 0.0:
+            return False
+        return self._random_generator.random() < self._drop_probability
+
+    def _send_state(self):
+        self._latest_state = {"state": self._source.get_state(self._n_packets)}
+        self._is_state_ready.set()
+
+    def _get_jitter(self) -> float:
+        if self._jitter <= 0.0:
+            return 0.0
+        return self._random_generator.uniform(-self._jitter, self._jitter)
+
+    def _sleep_until(self, wake_time: float):
+        delay = wake_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def get_state_client(state_config: Dict) -> Union[StateClient, StandInStateClient]:
+    """
+    Connects to the state server, or starts a stand-in if state_config has a
+        "stand_in" configuration
+
+    :state_config: Capture configuration of the game state
+    :type state_config: Dict
+    :return: Client that receives game states
+    :rtype: Union[StateClient, StandInStateClient]
+    """
+    if "stand_in" in state_config:
+        logger.info("Using a stand-in state server")
+        return StandInStateClient(state_config["stand_in"])
+    return StateClient()
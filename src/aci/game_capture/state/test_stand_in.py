@@ -0,0 +1,52 @@
+import time
+
+from aci.game_capture.state.stand_in import StandInStateClient
+from aci.utils.load import state_bytes_to_dict
+import pytest
+
+
+def collect_states(state_client: StandInStateClient, duration: float) -> list:
+    states = []
+    end_time = time.perf_counter() + duration
+    while time.perf_counter() < end_time:
+        state = state_bytes_to_dict(state_client.latest_state["state"])
+        if len(states) == 0 or state["packet_id"] != states[-1]["packet_id"]:
+            states.append(state)
+        time.sleep(1e-4)
+    state_client.stop()
+    return states
+
+
+@pytest.mark.fast
+def test_synthetic_states_follow_a_lap():
+    config = {"source": "synthetic", "rate": 200.0, "speed_kmh": 3600.0}
+    state_client = StandInStateClient(config)
+    assert state_client.wait_until_AC_is_ready(timeout=1.0)
+    states = collect_states(state_client, 0.3)
+    assert len(states) > 20
+    positions = [state["normalised_car_position"] for state in states]
+    assert all(0.0 <= position < 1.0 for position in positions)
+    assert states[-1]["i_current_time"] != states[0]["i_current_time"]
+
+
+@pytest.mark.fast
+def test_dropped_packets_leave_gaps_in_packet_ids():
+    config = {"rate": 500.0, "drop_probability": 0.2, "drop_burst": 3, "seed": 0}
+    state_client = StandInStateClient(config)
+    state_client.wait_until_AC_is_ready(timeout=1.0)
+    states = collect_states(state_client, 0.3)
+    packet_ids = [state["packet_id"] for state in states]
+    gaps = [b - a for a, b in zip(packet_ids, packet_ids[1:])]
+    assert max(gaps) > 3
+
+
+@pytest.mark.fast
+def test_recorded_states_are_replayed_in_order(tmp_path):
+    source = StandInStateClient({"rate": 1000.0})
+    source.wait_until_AC_is_ready(timeout=1.0)
+    for i in range(5):
+        tmp_path.joinpath(f"{i}.bin").write_bytes(source._source.get_state(i))
+    source.stop()
+    config = {"source": "replay", "path": tmp_path, "rate": 200.0, "loop": False}
+    states = collect_states(StandInStateClient(config), 0.1)
+    assert [state["packet_id"] for state in states] == list(range(5))
@@ -0,0 +1,79 @@
+import tracemalloc
+
+from aci.game_capture.inference import GameCapture
+from aci.game_capture.state.stand_in import SyntheticStateSource
+from aci.input.controller import NullGamepad
+import numpy as np
+import pytest
+
+N_WARM_UP_STEPS = 50
+N_STEPS = 1000
+WIDTH, HEIGHT = 64, 48
+FILTERS = [tracemalloc.Filter(True, "*/aci/*")]
+STATE_MODES = {
+    "bytes": {"use_dicts": False, "simulate_ins": False},
+    "dicts": {"use_dicts": True, "simulate_ins": False},
+    "ins": {"use_dicts": True, "simulate_ins": True},
+}
+
+
+def get_config(state_mode: str) -> dict:
+    return {
+        "capture": {
+            "images": {"image_format": "BGR"},
+            "state": STATE_MODES[state_mode],
+        },
+        "video.ini": {"VIDEO": {"WIDTH": WIDTH, "HEIGHT": HEIGHT}},
+        "preallocated": True,
+    }
+
+
+def run_steps(
+    game_capture: GameCapture, gamepad: NullGamepad, captures: list, n_steps: int
+):
+    for i in range(n_steps):
+        # Published in this process in place of the capture process
+        game_capture.capture = captures[i % len(captures)]
+        observation = game_capture.capture
+        gamepad.submit_action(observation["image"][0, 0] / 255.0)
+
+
+@pytest.mark.fast
+@pytest.mark.parametrize("state_mode", list(STATE_MODES))
+def test_steady_state_steps_do_not_allocate(state_mode):
+    game_capture = GameCapture(get_config(state_mode))
+    gamepad = NullGamepad()
+    source = SyntheticStateSource({})
+    captures = [
+        {
+            "image": np.full((HEIGHT, WIDTH, 3), i, dtype=np.uint8),
+            "state": {"state": source.get_state(i)},
+        }
+        for i in range(2)
+    ]
+    # Values held across steps are replaced while tracing during the warm up
+    tracemalloc.start()
+    run_steps(game_capture, gamepad, captures, N_WARM_UP_STEPS)
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    run_steps(game_capture, gamepad, captures, N_STEPS)
+    current, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    game_capture.stop()
+    differences = after.filter_traces(FILTERS).compare_to(
+        before.filter_traces(FILTERS), "lineno"
+    )
+    n_net_allocations = sum(difference.count_diff for difference in differences)
+    # Interpreter caches can keep a few blocks, but no step may keep any
+    assert n_net_allocations < N_STEPS / 10
+    # No image sized buffer is allocated during a step, even temporarily
+    assert peak - current < WIDTH * HEIGHT * 3
+
+
+@pytest.mark.fast
+def test_submitting_an_action_leaves_it_unchanged():
+    gamepad = NullGamepad()
+    action = np.array([0.5, 0.0, 1.0])
+    gamepad.submit_action(action)
+    assert np.array_equal(action, [0.5, 0.0, 1.0])
@@ -0,0 +1,30 @@
+from aci.game_capture.inference import GameCapture
+from aci.game_capture.state.stand_in import SyntheticStateSource
+from aci.utils.system_monitor import System_Monitor
+import numpy as np
+import pytest
+
+WIDTH, HEIGHT = 8, 6
+
+
+def get_dropped_frames() -> float:
+    return System_Monitor.snapshot()["counters"].get("dropped_frames", 0.0)
+
+
+@pytest.mark.fast
+def test_skipped_frames_are_counted_as_dropped():
+    config = {
+        "capture": {"images": {"image_format": "BGR"}},
+        "video.ini": {"VIDEO": {"WIDTH": WIDTH, "HEIGHT": HEIGHT}},
+    }
+    game_capture = GameCapture(config)
+    state = {"state": SyntheticStateSource({}).get_state(0)}
+    image = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    n_dropped = get_dropped_frames()
+    for frame in [1, 2, 4]:
+        # Published in this process in place of the capture process
+        game_capture.capture = {"image": image, "state": state, "frame": frame}
+        game_capture.capture
+    game_capture.stop()
+    assert game_capture.received_frame == 4
+    assert get_dropped_frames() - n_dropped == 1
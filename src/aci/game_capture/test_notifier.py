@@ -0,0 +1,23 @@
+import select
+
+from aci.game_capture.notifier import CaptureNotifier
+import pytest
+
+
+def is_readable(notifier: CaptureNotifier) -> bool:
+    readable, _, _ = select.select([notifier.fileno], [], [], 0.0)
+    return len(readable) > 0
+
+
+@pytest.mark.fast
+@pytest.mark.parametrize("use_eventfd", [True, False])
+def test_notifications_are_readable_until_drained(use_eventfd):
+    notifier = CaptureNotifier(use_eventfd)
+    assert not is_readable(notifier)
+    for _ in range(3):
+        notifier.notify()
+    assert is_readable(notifier)
+    notifier.drain()
+    assert not is_readable(notifier)
+    notifier.drain()
+    notifier.close()
@@ -0,0 +1,45 @@
+import threading
+
+from aci.game_capture.prefetch import ObservationPrefetcher
+import numpy as np
+import pytest
+
+IMAGE_SHAPE = (4, 6, 3)
+
+
+class CountingCapture:
+    """
+    Stands in for GameCapture, each capture's image is filled with its number
+    """
+
+    def __init__(self):
+        self.image_shape = IMAGE_SHAPE
+        self.received_frame = 0
+        self.received_frame_time_ns = 0
+        self.buffers_written = []
+        self._lock = threading.Lock()
+
+    def capture_into(self, image: np.array, poll_interval: float) -> dict:
+        with self._lock:
+            self.received_frame += 1
+            self.received_frame_time_ns = self.received_frame * 1000
+            image[:] = self.received_frame
+            self.buffers_written.append(id(image))
+        return {"state": b"", "image": image, "is_image_stale": False}
+
+
+@pytest.mark.fast
+def test_prefetched_images_are_not_overwritten_while_held():
+    game_capture = CountingCapture()
+    prefetcher = ObservationPrefetcher(game_capture)
+    buffer_ids = set()
+    for i in range(1, 20):
+        observation, frame, frame_time_ns = prefetcher.get()
+        assert frame == i
+        assert frame_time_ns == i * 1000
+        # Lets the prefetch thread run while the observation is held
+        threading.Event().wait(0.001)
+        assert np.all(observation["image"] == i)
+        buffer_ids.add(id(observation["image"]))
+    prefetcher.stop()
+    assert len(buffer_ids) == 2
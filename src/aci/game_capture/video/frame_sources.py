@@ -0,0 +1,241 @@
+import abc
+from pathlib import Path
+import time
+from typing import Dict, Iterator, List, Union
+
+import av
+import cv2
+import numpy as np
+
+# Recordings are played at the rate they were recorded or as fast as possible
+REALTIME, MAXIMUM = "realtime", "maximum"
+JPEG_SUFFIXES = [".jpeg", ".jpg"]
+DEFAULT_SYNTHETIC_FRAMERATE = 60.0
+# Distinct synthetic frames generated up front and then cycled through
+N_SYNTHETIC_FRAMES = 64
+
+
+class FrameSource(abc.ABC):
+    """
+    Produces the images an ImageStream converts for its consumers. Every source
+        produces BGR0 images, 8-bit BGR padded to 4 channels, at the configured
+        capture resolution
+    """
+
+    def __init__(self, capture_config: Dict, ffmpeg_config: Dict):
+        self._capture_config = capture_config
+        self._source_config = capture_config.get("source", {})
+        self._ffmpeg_config = ffmpeg_config
+        width, height = capture_config["resolution"]
+        self._resolution = (width, height)
+        self._setup()
+
+    def _setup(self):
+        """
+        Optionally implement source specific setup here
+        """
+        pass
+
+    @abc.abstractmethod
+    def read(self) -> Union[np.array, None]:
+        """
+        Implement logic to block until the next frame is available and return it
+
+        :return: BGR0 image in [h x w x 4], None if the frame repeats the last one
+            or the source has ended
+        :rtype: Union[np.array, None]
+        """
+        pass
+
+
+class X11GrabFrameSource(FrameSource):
+    """
+    Captures AC's window with FFmpeg's screen grabber
+    """
+
+    def _setup(self):
+        # Imported here so other sources work on machines without a display
+        from aci.utils.os import (
+            get_display_input,
+            get_file_format,
+            get_sanitised_os_name,
+        )
+
+        os_name = get_sanitised_os_name()
+        file_input, video_size = get_display_input(
+            os_name,
+            game_name=self._capture_config.get("window_name"),
+            game_resolution=self._capture_config.get("resolution"),
+        )
+        self._ffmpeg_config["video_size"] = video_size
+        capture_stream = av.open(
+            file=file_input,
+            format=get_file_format(os_name),
+            options=self._ffmpeg_config,
+        )
+        self._frame_generator = capture_stream.decode()
+        self._latest_dts = -1
+
+    def read(self) -> Union[np.array, None]:
+        frame = next(self._frame_generator)
+        if frame.dts == self._latest_dts:
+            return None
+        self._latest_dts = frame.dts
+        return get_BGR0_image_from_frame(frame)
+
+
+class RecordingFrameSource(FrameSource):
+    """
+    Plays a recorded session, a folder of JPEGs such as those saved by the
+        recorder or a video file, at the rate it was recorded or as fast as
+        frames can be decoded. JPEGs are played at the FFmpeg framerate
+    """
+
+    def _setup(self):
+        self._path = Path(self._source_config["path"])
+        self._speed = self._source_config.get("speed", REALTIME)
+        self._is_looping = self._source_config.get("loop", True)
+        self._framerate = float(self._ffmpeg_config["framerate"])
+        if not self._has_frames():
+            raise ValueError(f"No frames found in recording {self._path}")
+        self._start_playback()
+
+    def _has_frames(self) -> bool:
+        if self._path.is_dir():
+            return len(self._get_jpeg_filepaths()) > 0
+        frames = self._read_video()
+        try:
+            return next(frames, None) is not None
+        finally:
+            frames.close()
+
+    def _start_playback(self):
+        if self._path.is_dir():
+            self._frames = self._read_jpegs()
+        else:
+            self._frames = self._read_video()
+        self._start_time = time.perf_counter()
+
+    def _get_jpeg_filepaths(self) -> List[Path]:
+        filepaths = [
+            filepath
+            for filepath in self._path.iterdir()
+            if filepath.suffix in JPEG_SUFFIXES
+        ]
+        filepaths.sort(key=lambda filepath: int(filepath.stem))
+        return filepaths
+
+    def _read_jpegs(self) -> Iterator:
+        for i, filepath in enumerate(self._get_jpeg_filepaths()):
+            image = cv2.imread(str(filepath))
+            yield i / self._framerate, cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+
+    def _read_video(self) -> Iterator:
+        with av.open(str(self._path)) as container:
+            for i, frame in enumerate(container.decode(video=0)):
+                # Frames without a presentation timestamp have no time
+                frame_time = i / self._framerate if frame.time is None else frame.time
+                yield frame_time, frame.to_ndarray(format="bgra")
+
+    def read(self) -> Union[np.array, None]:
+        try:
+            frame_time, image = next(self._frames)
+        except StopIteration:
+            if not self._is_looping:
+                time.sleep(1.0 / self._framerate)
+                return None
+            self._start_playback()
+            frame_time, image = next(self._frames)
+        if self._speed == REALTIME:
+            self._wait_until(frame_time)
+        return resize_image(image, self._resolution)
+
+    def _wait_until(self, frame_time: float):
+        delay = self._start_time + frame_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class SyntheticFrameSource(FrameSource):
+    """
+    Generates bars that scroll across the image at a fixed framerate, or as fast
+        as frames are read if the framerate is 0. Frames are generated up front
+        so reading them costs no more than copying an image
+    """
+
+    def _setup(self):
+        framerate = self._source_config.get("framerate", DEFAULT_SYNTHETIC_FRAMERATE)
+        self._period = 0.0 if framerate <= 0 else 1.0 / framerate
+        self._frames = generate_scrolling_bars(self._resolution, N_SYNTHETIC_FRAMES)
+        self._n_frames = 0
+        self._start_time = time.perf_counter()
+
+    def read(self) -> np.array:
+        delay = self._start_time + self._n_frames * self._period - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        image = self._frames[self._n_frames % N_SYNTHETIC_FRAMES]
+        self._n_frames += 1
+        return image
+
+
+def generate_scrolling_bars(resolution: tuple, n_frames: int) -> np.array:
+    """
+    :return: Frames of colour bars that scroll one image width over n_frames
+    :rtype: np.array
+    """
+    width, height = resolution
+    columns = np.arange(width)
+    frames = np.zeros((n_frames, height, width, 4), dtype=np.uint8)
+    for i in range(n_frames):
+        offset = (columns + i * width // n_frames) % width
+        bars = (offset * 8 // width).astype(np.uint8)
+        frames[i, :, :, 0] = (bars & 1) * 255
+        frames[i, :, :, 1] = ((bars >> 1) & 1) * 255
+        frames[i, :, :, 2] = ((bars >> 2) & 1) * 255
+    return frames
+
+
+def resize_image(image: np.array, resolution: tuple) -> np.array:
+    if (image.shape[1], image.shape[0]) == resolution:
+        return image
+    return cv2.resize(image, resolution, interpolation=cv2.INTER_AREA)
+
+
+def get_BGR0_image_from_frame(frame: av.video.frame.VideoFrame) -> np.array:
+    """
+    Extract a BGR0 image from a stream frame as a numpy array
+        Packet is a 24-bit 3 component BGR post-padded to 32-bits
+
+    :frame: Stream frame to interpret.
+    :type frame: av.video.frame.VideoFrame
+    :return: Image as np.array in [h x w x c] in BGR channel order.
+    :rtype: np.array
+    """
+    plane = frame.planes[0]
+    from_buffer = np.frombuffer(plane, dtype=np.uint8)
+    # Reshape to height x width  x 4
+    return from_buffer.reshape(plane.height, plane.width, 4)
+
+
+FRAME_SOURCES = {
+    "x11grab": X11GrabFrameSource,
+    "recording": RecordingFrameSource,
+    "synthetic": SyntheticFrameSource,
+}
+
+
+def get_frame_source(capture_config: Dict, ffmpeg_config: Dict) -> FrameSource:
+    """
+    Creates the frame source selected by capture.images.source.type, by default
+        the window of AC is captured with x11grab
+
+    :capture_config: Image capture configuration
+    :type capture_config: Dict
+    :ffmpeg_config: Options passed to FFmpeg
+    :type ffmpeg_config: Dict
+    :return: Source of the images to stream
+    :rtype: FrameSource
+    """
+    source_type = capture_config.get("source", {}).get("type", "x11grab")
+    return FRAME_SOURCES[source_type](capture_config, ffmpeg_config)
@@ -1,10 +1,14 @@
+import argparse
 from threading import Thread
 import time
-from typing import Dict
+from typing import Dict, Tuple
 
+from aci.config.constants import CAPTURE_CONFIG_FILE
+from aci.game_capture.video.frame_sources import get_frame_source
 from aci.utils import display
-from aci.utils.os import get_display_input, get_file_format, get_sanitised_os_name
+from aci.utils.load import load_yaml
 from aci.utils.system_monitor import System_Monitor, track_runtime
+from aci.utils.tracer import Pipeline_Tracer
 import av
 from loguru import logger
 import numpy as np
@@ -32,29 +36,66 @@ IMAGE_FORMAT_CONVERSION = {
 class ImageStream:
     """
     Captures and converts video from an application to an stream.
-        Consumes frames from PyAV and converts them for use in inference
-        or data recording. It continually refreshes the current image
-        which can be access via the `latest_image` property
+        Consumes frames from a frame source, by default AC's window captured
+        by PyAV, and converts them for use in inference or data recording.
+        It continually refreshes the current image which can be accessed via
+        the `image` property, or with its sequence number and decode time via
+        the `frame` property
     """
 
     def __init__(self, config: Dict):
-        self._latest_dts = -1
+        # (image, sequence number, decode time) replaced as one by the decoder
+        self._latest_frame = (None, 0, 0)
         self._is_new_frame = False
         self.__setup_configuration(config)
-        self.__setup_frame_generator()
+        self.__setup_frame_source()
         self.__start_update_thread()
 
     @property
     def image(self) -> np.array:
+        return self.frame[0]
+
+    @property
+    def frame(self) -> Tuple[np.array, int, int]:
+        """
+        Latest image with the sequence number and decode time it was published
+            with, read together so they always describe the same frame
+
+        :return: Converted image, sequence number and decode time in nanoseconds
+            from time.perf_counter_ns
+        :rtype: Tuple[np.array, int, int]
+        """
         if self._wait_for_new_frames:
             self._wait_for_new_frame()
         self._is_new_frame = False
-        return IMAGE_FORMAT_CONVERSION[self._image_format](self._latest_image)
+        image, frame_sequence, frame_time_ns = self._latest_frame
+        image = IMAGE_FORMAT_CONVERSION[self._image_format](image)
+        return image, frame_sequence, frame_time_ns
 
     @property
     def is_stale(self) -> bool:
         return not self._is_new_frame
 
+    @property
+    def frame_sequence(self) -> int:
+        """
+        Number of unique frames decoded, identifies the latest image
+
+        :return: Sequence number of the latest image
+        :rtype: int
+        """
+        return self._latest_frame[1]
+
+    @property
+    def frame_time_ns(self) -> int:
+        """
+        Time the latest image was decoded, from time.perf_counter_ns
+
+        :return: Decode time of the latest image in nanoseconds
+        :rtype: int
+        """
+        return self._latest_frame[2]
+
     def _wait_for_new_frame(self):
         """
         Blocking call that waits until a new image from the game is received
@@ -67,29 +108,13 @@ class ImageStream:
         self._image_format = self._capture_config["image_format"]
         self._wait_for_new_frames = self._capture_config["wait_for_new_frames"]
         self._ffmpeg_config = config["ffmpeg"]
-        self.__add_dynamic_configuration_options()
-
-    def __add_dynamic_configuration_options(self):
-        os_name = get_sanitised_os_name()
-        self._file_format = get_file_format(os_name)
-        self._file_input, video_size = get_display_input(
-            os_name,
-            game_name=self._capture_config.get("window_name"),
-            game_resolution=self._capture_config.get("resolution"),
-        )
-        self._ffmpeg_config["video_size"] = video_size
-
-    def __setup_frame_generator(self):
-        capture_stream = av.open(
-            file=self._file_input,
-            format=self._file_format,
-            options=self._ffmpeg_config,
-        )
-        self._frame_generator = capture_stream.decode()
+
+    def __setup_frame_source(self):
+        self._frame_source = get_frame_source(self._capture_config, self._ffmpeg_config)
 
     def __start_update_thread(self):
         """
-        Starts a thread that consumes frames from by PyAV
+        Starts a thread that consumes frames from the frame source
         """
         self._is_running = True
         self.update_thread = Thread(target=self._run, daemon=True)
@@ -101,39 +126,24 @@ class ImageStream:
 
     @track_runtime(System_Monitor)
     def _frame_capture_work(self):
-        frame = self._get_next_frame()
-        if not self._is_duplicate_frame(frame):
-            bgr0_image = self._get_BGR0_image_from_frame(frame)
-            self._latest_image = bgr0_image
-            self._latest_dts = frame.dts
-            self._is_new_frame = True
-
-    def _get_next_frame(self):
-        return next(self._frame_generator)
-
-    def _is_duplicate_frame(self, frame) -> bool:
-        return frame.dts == self._latest_dts
-
-    def _get_BGR0_image_from_frame(self, frame: av.video.frame.VideoFrame) -> np.array:
-        """
-        Extract a BGR0 image from a stream frame as a numpy array
-            Packet is a 24-bit 3 component BGR post-padded to 32-bits
-
-        :frame: Stream frame to interpret.
-        :type frame: av.video.frame.VideoFrame
-        :return: Image as np.array in [h x w x c] in BGR channel order.
-        :rtype: np.array
-        """
-        plane = frame.planes[0]
-        from_buffer = np.frombuffer(plane, dtype=np.uint8)
-        # Reshape to height x width  x 4
-        return from_buffer.reshape(plane.height, plane.width, 4)
+        with Pipeline_Tracer.span("decode") as span:
+            bgr0_image = self._frame_source.read()
+            frame_sequence = self._latest_frame[1]
+            if bgr0_image is not None:
+                frame_sequence += 1
+                frame_time_ns = time.perf_counter_ns()
+                self._latest_frame = (bgr0_image, frame_sequence, frame_time_ns)
+                self._is_new_frame = True
+                System_Monitor.increment("capture_frames")
+            span.frame = frame_sequence
 
     def __repr__(self) -> str:
         resolution = self._capture_config["resolution"]
         framerate = self._ffmpeg_config["framerate"]
         encoder = self._ffmpeg_config["c:v"]
+        source_type = self._capture_config.get("source", {}).get("type", "x11grab")
         to_print = "ImageStream\n"
+        to_print += f"Source: {source_type}\n"
         to_print += f"Target Window: {self._capture_config['window_name']}\n"
         to_print += f"Resolution: {resolution[0]}x{resolution[1]}\n"
         to_print += f"Framerate: {framerate}fps \n"
@@ -143,16 +153,31 @@ class ImageStream:
 
 # Small test loop to evaluate capture performance
 def main():
-    image_stream = ImageStream()
+    arguments = parse_arguments()
+    config = load_yaml(CAPTURE_CONFIG_FILE)
+    config["images"]["resolution"] = arguments.resolution
+    image_stream = ImageStream(config)
     display_sample_images(image_stream)
     bench_fps(image_stream)
     System_Monitor.log_function_runtimes_times()
 
 
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark capturing AC's window")
+    parser.add_argument(
+        "--resolution",
+        type=int,
+        nargs=2,
+        default=[1920, 1080],
+        help="Width and height of AC's window",
+    )
+    return parser.parse_args()
+
+
 def display_sample_images(image_stream):
     logger.info("Displaying sample images received")
     for _ in range(300):
-        image = image_stream.latest_image
+        image = image_stream.image
         display.image(image)
 
 
@@ -161,7 +186,7 @@ def bench_fps(image_stream):
     start_time = time.time()
     n_frames = 900
     for _ in range(n_frames):
-        _ = image_stream.latest_image
+        _ = image_stream.image
     elapsed_time = time.time() - start_time
     logger.info(
         f"Received {n_frames} frames in {elapsed_time}s {n_frames/elapsed_time}fps"
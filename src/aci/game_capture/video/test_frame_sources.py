@@ -0,0 +1,78 @@
+from aci.game_capture.video import frame_sources
+from aci.game_capture.video.frame_sources import get_frame_source
+import cv2
+import numpy as np
+import pytest
+
+RESOLUTION = [64, 48]
+FFMPEG_CONFIG = {"framerate": "60"}
+
+
+@pytest.mark.fast
+def test_synthetic_frames_change_each_read():
+    capture_config = {
+        "resolution": RESOLUTION,
+        "source": {"type": "synthetic", "framerate": 0},
+    }
+    frame_source = get_frame_source(capture_config, FFMPEG_CONFIG)
+    first_image, second_image = frame_source.read(), frame_source.read()
+    assert first_image.shape == (48, 64, 4)
+    assert not np.array_equal(first_image, second_image)
+
+
+@pytest.mark.fast
+def test_recorded_jpegs_are_played_in_order_and_resized(tmp_path):
+    for i in range(3):
+        image = np.full((96, 128, 3), i * 100, dtype=np.uint8)
+        cv2.imwrite(str(tmp_path.joinpath(f"{i}.jpeg")), image)
+    source_config = {
+        "type": "recording",
+        "path": tmp_path,
+        "speed": "maximum",
+        "loop": False,
+    }
+    capture_config = {"resolution": RESOLUTION, "source": source_config}
+    frame_source = get_frame_source(capture_config, FFMPEG_CONFIG)
+    images = [frame_source.read() for _ in range(4)]
+    assert images[0].shape == (48, 64, 4)
+    assert [int(image[0, 0, 0]) for image in images[:3]] == pytest.approx(
+        [0, 100, 200], abs=2
+    )
+    assert images[3] is None
+
+
+@pytest.mark.fast
+def test_recordings_without_frames_are_rejected(tmp_path):
+    source_config = {"type": "recording", "path": tmp_path}
+    capture_config = {"resolution": RESOLUTION, "source": source_config}
+    with pytest.raises(ValueError):
+        get_frame_source(capture_config, FFMPEG_CONFIG)
+
+
+class UntimedFrame:
+    time = None
+
+    def to_ndarray(self, format: str) -> np.array:
+        return np.zeros((96, 128, 4), dtype=np.uint8)
+
+
+class UntimedVideo:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def decode(self, video: int):
+        return iter([UntimedFrame() for _ in range(3)])
+
+
+@pytest.mark.fast
+def test_video_frames_without_timestamps_play_at_the_framerate(tmp_path, monkeypatch):
+    monkeypatch.setattr(frame_sources.av, "open", lambda path: UntimedVideo())
+    source_config = {"type": "recording", "path": tmp_path / "session.mp4"}
+    capture_config = {"resolution": RESOLUTION, "source": source_config}
+    frame_source = get_frame_source(capture_config, FFMPEG_CONFIG)
+    frame_times = [frame_time for frame_time, _ in frame_source._read_video()]
+    assert frame_times == pytest.approx([0.0, 1 / 60, 2 / 60])
+    assert frame_source.read().shape == (48, 64, 4)
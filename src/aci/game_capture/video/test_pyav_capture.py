@@ -0,0 +1,33 @@
+from aci.game_capture.video.pyav_capture import ImageStream
+import cv2
+import numpy as np
+import pytest
+
+N_IMAGES = 10
+N_READS = 200
+
+
+@pytest.mark.fast
+def test_frames_carry_the_sequence_number_of_their_image(tmp_path):
+    for i in range(N_IMAGES):
+        image = np.full((48, 64, 3), i * 20, dtype=np.uint8)
+        cv2.imwrite(str(tmp_path.joinpath(f"{i}.jpeg")), image)
+    config = {
+        "images": {
+            "resolution": [64, 48],
+            "image_format": "BGR",
+            "wait_for_new_frames": True,
+            "source": {"type": "recording", "path": tmp_path, "speed": "maximum"},
+        },
+        "ffmpeg": {"framerate": "60"},
+    }
+    image_stream = ImageStream(config)
+    try:
+        for _ in range(N_READS):
+            image, frame_sequence, frame_time_ns = image_stream.frame
+            # Recordings loop, the first image has sequence number 1
+            expected_value = (frame_sequence - 1) % N_IMAGES * 20
+            assert int(image[0, 0, 0]) == pytest.approx(expected_value, abs=2)
+            assert frame_time_ns > 0
+    finally:
+        image_stream._is_running = False
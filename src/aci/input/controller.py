@@ -1,4 +1,5 @@
 import time
+from typing import Dict, List
 
 from aci.input.constants import (
     ABS_MAX,
@@ -8,9 +9,43 @@ from aci.input.constants import (
     VERSION_CODE,
     VIRTUAL_BUTTONS,
 )
+from aci.utils.system_monitor import System_Monitor
+from aci.utils.tracer import Pipeline_Tracer
 import numpy as np
 import uinput
 
+ACTION_EVENTS = {
+    "steering": uinput.ABS_X,
+    "brake": uinput.ABS_Z,
+    "throttle": uinput.ABS_RZ,
+}
+# Maps [steering, brake, throttle] to the analog range as action * scale + offset
+ACTION_SCALE = np.array([ABS_MAX, 2 * ABS_MAX, 2 * ABS_MAX], dtype=np.float64)
+ACTION_OFFSET = np.array([0.0, -ABS_MAX, -ABS_MAX], dtype=np.float64)
+BUTTON_EVENTS = {
+    "shift_up": uinput.BTN_A,
+    "a": uinput.BTN_A,
+    "b": uinput.BTN_B,
+    "x": uinput.BTN_X,
+    "y": uinput.BTN_Y,
+    "left_bumper": uinput.BTN_TL,
+    "right_bumper": uinput.BTN_TR,
+    "left_thumb": uinput.BTN_THUMBL,
+    "right_thumb": uinput.BTN_THUMBR,
+}
+
+
+class NullDevice:
+    """
+    Discards the events emitted to it in place of a uinput device
+    """
+
+    def emit(self, event: tuple, value: int, syn: bool = True):
+        pass
+
+    def syn(self):
+        pass
+
 
 class VirtualGamepad:
     """
@@ -18,15 +53,20 @@ class VirtualGamepad:
         for control algorithms with the simulator. Translates the agent
         action space from {0., 1.} for throttle and brake and {-1., 1.}
         for steering angle to the controller analog range of {ABS_MIN, ABS_MAX}.
+        Each submit is a single report, the changed axes or buttons followed by
+        one SYN, so the game never sees part of an action applied
     """
 
     def __init__(self):
         self.___setup_virtual_controller()
-        self._action_events = {
-            "steering": uinput.ABS_X,
-            "brake": uinput.ABS_Z,
-            "throttle": uinput.ABS_RZ,
-        }
+        self._setup_event_state()
+
+    def _setup_event_state(self):
+        self._action_events = list(ACTION_EVENTS.values())
+        self._device_action = np.zeros(len(ACTION_EVENTS))
+        # Last value emitted for each axis and button event, None until emitted
+        self._axis_values = [None] * len(ACTION_EVENTS)
+        self._button_values = {}
 
     def submit_action(self, action: np.array):
         """
@@ -36,18 +76,86 @@ class VirtualGamepad:
         :action: An action as a np.array of [steering, brake, throttle]
         :type action: np.array
         """
-        action = self._un_normalise_action(action)
-        for event, action in zip(self._action_events.values(), action):
-            self._device.emit(event, int(action))
+        start_time = time.perf_counter_ns()
+        with Pipeline_Tracer.span("submit_action"):
+            device_action = self._un_normalise_action(action)
+            n_events = 0
+            for i, event in enumerate(self._action_events):
+                value = int(device_action[i])
+                if value != self._axis_values[i]:
+                    self._device.emit(event, value, syn=False)
+                    self._axis_values[i] = value
+                    n_events += 1
+            self._end_report(n_events, start_time)
+
+    def submit_buttons(self, buttons: Dict[str, bool]):
+        """
+        Presses or releases several buttons in a single report, buttons already
+            in the requested state are skipped
+
+        :buttons: Whether each button is pressed, keyed by its name in BUTTON_EVENTS
+        :type buttons: Dict[str, bool]
+        """
+        start_time = time.perf_counter_ns()
+        with Pipeline_Tracer.span("submit_buttons"):
+            event_values = self._get_button_event_values(buttons)
+            n_events = 0
+            for event, value in event_values.items():
+                if value != self._button_values.get(event):
+                    self._device.emit(event, value, syn=False)
+                    self._button_values[event] = value
+                    n_events += 1
+            self._end_report(n_events, start_time)
+
+    def _get_button_event_values(self, buttons: Dict[str, bool]) -> Dict:
+        """
+        Checks every button before any is emitted so an invalid request never
+            leaves part of a report emitted
+
+        :return: Value of each button event, names aliasing one event combined
+        :rtype: Dict[tuple, int]
+        """
+        event_values = {}
+        for name, is_pressed in buttons.items():
+            if name not in BUTTON_EVENTS:
+                raise ValueError(f"Unknown gamepad button {name}")
+            event = BUTTON_EVENTS[name]
+            value = int(is_pressed)
+            if event_values.get(event, value) != value:
+                message = f"{name} aliases a button that is both pressed and released"
+                raise ValueError(message)
+            event_values[event] = value
+        return event_values
+
+    def press_buttons(self, names: List[str]):
+        """
+        Presses then releases several buttons, for example ["shift_up"] to change
+            up a gear, as one report pressing them all and one releasing them.
+            Games that poll the gamepad can miss a press released this quickly,
+            hold buttons across steps with submit_buttons instead
+
+        :names: Names of the buttons in BUTTON_EVENTS
+        :type names: List[str]
+        """
+        self.submit_buttons({name: True for name in names})
+        self.submit_buttons({name: False for name in names})
+
+    def _end_report(self, n_events: int, start_time: int):
+        if n_events > 0:
+            self._device.syn()
+            System_Monitor.increment("gamepad_events", n_events)
+        System_Monitor.record("gamepad_submit", time.perf_counter_ns() - start_time)
 
     def _un_normalise_action(self, action: np.array) -> np.array:
         """
         Maps throttle and brake from {0.0, 1.0} to {ABS_MIN, ABS_MAX}
-            and steering angle from {-1.0, 1.0} to {ABS_MIN, ABS_MAX}
+            and steering angle from {-1.0, 1.0} to {ABS_MIN, ABS_MAX}. The
+            action is left unchanged, the result is written to an array reused
+            by every call
         """
-        action[1:] = (action[1:] - 0.5) * 2 * ABS_MAX
-        action[0] = (action[0]) * ABS_MAX
-        return action
+        np.multiply(action, ACTION_SCALE, out=self._device_action)
+        self._device_action += ACTION_OFFSET
+        return self._device_action
 
     def ___setup_virtual_controller(self):
         # Virtual device details
@@ -62,6 +170,23 @@ class VirtualGamepad:
         time.sleep(2)
 
 
+class NullGamepad(VirtualGamepad):
+    """
+    Gamepad that translates actions but discards them rather than emitting them,
+        for running without AC or a uinput device
+    """
+
+    def __init__(self):
+        self._device = NullDevice()
+        self._setup_event_state()
+
+
+INPUT_INTERFACES = {
+    "gamepad": VirtualGamepad,
+    "null": NullGamepad,
+}
+
+
 def main():
     vgamepad = VirtualGamepad()
     actions = [
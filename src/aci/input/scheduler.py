@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import Callable, Dict
+
+from aci.input.controller import VirtualGamepad
+from aci.utils.system_monitor import System_Monitor
+import numpy as np
+
+DEFAULT_RATE = 200.0
+DEFAULT_MODE = "hold"
+# Furthest to extrapolate past the latest decision, in decision intervals
+DEFAULT_MAX_EXTRAPOLATION = 1.0
+# Bounds of [steering, brake, throttle]
+ACTION_LOWER_BOUNDS = np.array([-1.0, 0.0, 0.0])
+ACTION_UPPER_BOUNDS = np.array([1.0, 1.0, 1.0])
+SCHEDULER_JOIN_TIMEOUT = 1.0
+NS_PER_S = 1e9
+
+
+def hold_fraction(elapsed: float, interval: float, max_extrapolation: float) -> float:
+    return 1.0
+
+
+def interpolate_fraction(
+    elapsed: float, interval: float, max_extrapolation: float
+) -> float:
+    return min(elapsed / interval, 1.0)
+
+
+def extrapolate_fraction(
+    elapsed: float, interval: float, max_extrapolation: float
+) -> float:
+    return 1.0 + min(elapsed / interval, max_extrapolation)
+
+
+# Where between the previous and latest decisions each mode applies, 0 for the
+# previous and 1 for the latest, beyond 1 extrapolates
+CONTROL_MODES = {
+    "hold": hold_fraction,
+    "interpolate": interpolate_fraction,
+    "extrapolate": extrapolate_fraction,
+}
+
+
+class ControlScheduler:
+    """
+    Applies the agent's latest decision to an input interface at a fixed rate,
+        independent of the rate the agent decides at. Between decisions the
+        latest action is held, interpolated from the previous decision over
+        the time between decisions, which smooths actions at the cost of a
+        decision interval of lag, or extrapolated from the last two decisions.
+        Ticks that start a period or more late are counted as deadline misses
+        and skipped rather than submitted in a burst. Decisions and ticks are
+        timed with clock, which must count seconds like time.perf_counter
+    """
+
+    def __init__(
+        self,
+        input_interface: VirtualGamepad,
+        scheduler_config: Dict,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self._input_interface = input_interface
+        self._clock = clock
+        self.__setup_configuration(scheduler_config)
+        self._previous_action = None
+        self._previous_time = 0.0
+        self._latest_action = None
+        self._latest_time = 0.0
+        self._lock = threading.Lock()
+        self._is_running = threading.Event()
+
+    def __setup_configuration(self, scheduler_config: Dict):
+        self._period = 1.0 / scheduler_config.get("rate", DEFAULT_RATE)
+        mode = scheduler_config.get("mode", DEFAULT_MODE)
+        self._get_fraction = CONTROL_MODES[mode]
+        self._max_extrapolation = scheduler_config.get(
+            "max_extrapolation", DEFAULT_MAX_EXTRAPOLATION
+        )
+
+    def submit_action(self, action: np.array):
+        """
+        Records a decision of the agent to be applied from the next tick
+
+        :action: An action as a np.array of [steering, brake, throttle]
+        :type action: np.array
+        """
+        action = np.array(action, dtype=np.float64)
+        decision_time = self._clock()
+        with self._lock:
+            if self._latest_action is None:
+                self._previous_action, self._previous_time = action, decision_time
+            else:
+                self._previous_action = self._latest_action
+                self._previous_time = self._latest_time
+            self._latest_action, self._latest_time = action, decision_time
+
+    def get_action(self, tick_time: float) -> np.array:
+        """
+        :tick_time: Time of the tick from the scheduler's clock
+        :type tick_time: float
+        :return: Action to apply at tick_time, None before the first decision
+        :rtype: np.array
+        """
+        with self._lock:
+            if self._latest_action is None:
+                return None
+            previous, latest = self._previous_action, self._latest_action
+            interval = self._latest_time - self._previous_time
+            # A decision submitted after tick_time was read is applied as new
+            elapsed = max(tick_time - self._latest_time, 0.0)
+        if interval <= 0.0:
+            action = latest
+        else:
+            fraction = self._get_fraction(elapsed, interval, self._max_extrapolation)
+            action = previous + fraction * (latest - previous)
+        return np.clip(action, ACTION_LOWER_BOUNDS, ACTION_UPPER_BOUNDS)
+
+    def start(self):
+        self._is_running.set()
+        self._thread = threading.Thread(target=self._run, name="ControlScheduler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._is_running.clear()
+        self._thread.join(timeout=SCHEDULER_JOIN_TIMEOUT)
+
+    def _run(self):
+        next_tick_time = self._clock()
+        while self._is_running.is_set():
+            self._sleep_until(next_tick_time)
+            tick_time = self._clock()
+            next_tick_time = self._record_lateness(next_tick_time, tick_time)
+            action = self.get_action(tick_time)
+            if action is not None:
+                self._input_interface.submit_action(action)
+            System_Monitor.increment("control_ticks")
+
+    def _record_lateness(self, scheduled_time: float, tick_time: float) -> float:
+        """
+        :return: Time of the next tick, after any ticks that were missed
+        :rtype: float
+        """
+        lateness = tick_time - scheduled_time
+        System_Monitor.record("control_tick_lateness", int(lateness * NS_PER_S))
+        n_missed = int(lateness // self._period)
+        if n_missed > 0:
+            System_Monitor.increment("control_deadline_misses", n_missed)
+        return scheduled_time + (n_missed + 1) * self._period
+
+    def _sleep_until(self, wake_time: float):
+        delay = wake_time - self._clock()
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,55 @@
+import threading
+
+from aci.input.controller import VirtualGamepad
+from aci.utils.system_monitor import System_Monitor
+import numpy as np
+
+SUBMITTER_JOIN_TIMEOUT = 1.0
+
+
+class ActionSubmitter:
+    """
+    Submits actions to an input interface from a background thread, so emitting
+        device events never delays the agent. Only the latest action is kept,
+        one that arrives before the previous was submitted replaces it
+    """
+
+    def __init__(self, input_interface: VirtualGamepad):
+        self._input_interface = input_interface
+        self._action = None
+        self._condition = threading.Condition()
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="ActionSubmitter")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit_action(self, action: np.array):
+        """
+        Queues an action to be submitted, the submitter takes ownership of it
+
+        :action: An action as a np.array of [steering, brake, throttle]
+        :type action: np.array
+        """
+        with self._condition:
+            if self._action is not None:
+                System_Monitor.increment("replaced_actions")
+            self._action = action
+            self._condition.notify()
+
+    def stop(self):
+        with self._condition:
+            self._is_running = False
+            self._condition.notify()
+        self._thread.join(timeout=SUBMITTER_JOIN_TIMEOUT)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(self._is_action_pending)
+                if self._action is None:
+                    return
+                action, self._action = self._action, None
+            self._input_interface.submit_action(action)
+
+    def _is_action_pending(self) -> bool:
+        return self._action is not None or not self._is_running
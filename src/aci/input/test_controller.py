@@ -0,0 +1,77 @@
+from aci.input.constants import ABS_MAX
+from aci.input.controller import NullGamepad
+import numpy as np
+import pytest
+import uinput
+
+
+class RecordingDevice:
+    """
+    Records the events of each report, a report ends at a SYN
+    """
+
+    def __init__(self):
+        self.reports = []
+        self._events = []
+
+    def emit(self, event: tuple, value: int, syn: bool = True):
+        self._events.append((event, value))
+        if syn:
+            self.syn()
+
+    def syn(self):
+        self.reports.append(self._events)
+        self._events = []
+
+
+def get_gamepad() -> NullGamepad:
+    gamepad = NullGamepad()
+    gamepad._device = RecordingDevice()
+    return gamepad
+
+
+@pytest.mark.fast
+def test_actions_are_single_reports_of_changed_axes():
+    gamepad = get_gamepad()
+    gamepad.submit_action(np.array([0.0, 0.0, 1.0]))
+    gamepad.submit_action(np.array([0.0, 0.0, 0.5]))
+    gamepad.submit_action(np.array([0.0, 0.0, 0.5]))
+    assert gamepad._device.reports == [
+        [(uinput.ABS_X, 0), (uinput.ABS_Z, -ABS_MAX), (uinput.ABS_RZ, ABS_MAX)],
+        [(uinput.ABS_RZ, 0)],
+    ]
+
+
+@pytest.mark.fast
+def test_buttons_are_pressed_and_released_together():
+    gamepad = get_gamepad()
+    gamepad.press_buttons(["shift_up", "y"])
+    gamepad.submit_buttons({"y": False})
+    assert gamepad._device.reports == [
+        [(uinput.BTN_A, 1), (uinput.BTN_Y, 1)],
+        [(uinput.BTN_A, 0), (uinput.BTN_Y, 0)],
+    ]
+
+
+@pytest.mark.fast
+def test_button_aliases_share_their_state():
+    gamepad = get_gamepad()
+    gamepad.submit_buttons({"shift_up": True})
+    gamepad.submit_buttons({"a": False})
+    gamepad.submit_buttons({"shift_up": True, "a": True})
+    assert gamepad._device.reports == [
+        [(uinput.BTN_A, 1)],
+        [(uinput.BTN_A, 0)],
+        [(uinput.BTN_A, 1)],
+    ]
+    with pytest.raises(ValueError):
+        gamepad.submit_buttons({"shift_up": False, "a": True})
+
+
+@pytest.mark.fast
+def test_unknown_buttons_emit_nothing():
+    gamepad = get_gamepad()
+    with pytest.raises(ValueError):
+        gamepad.submit_buttons({"y": True, "shift_down": True})
+    gamepad.submit_buttons({"y": True})
+    assert gamepad._device.reports == [[(uinput.BTN_Y, 1)]]
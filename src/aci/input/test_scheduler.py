@@ -0,0 +1,103 @@
+from aci.input.scheduler import ControlScheduler
+from aci.utils.system_monitor import System_Monitor
+import numpy as np
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self) -> float:
+        return self.time
+
+
+def submit_decisions(control_scheduler: ControlScheduler, clock: FakeClock):
+    clock.time = 1.0
+    control_scheduler.submit_action(np.array([0.0, 0.0, 0.2]))
+    clock.time = 1.1
+    control_scheduler.submit_action(np.array([0.5, 0.0, 0.6]))
+
+
+@pytest.mark.fast
+@pytest.mark.parametrize(
+    "mode, expected_action",
+    [
+        ("hold", [0.5, 0.0, 0.6]),
+        ("interpolate", [0.25, 0.0, 0.4]),
+        ("extrapolate", [0.75, 0.0, 0.8]),
+    ],
+)
+def test_actions_between_decisions(mode, expected_action):
+    clock = FakeClock()
+    control_scheduler = ControlScheduler(None, {"mode": mode}, clock)
+    assert control_scheduler.get_action(0.0) is None
+    submit_decisions(control_scheduler, clock)
+    # Half a decision interval after the latest decision
+    action = control_scheduler.get_action(1.15)
+    assert action == pytest.approx(np.array(expected_action))
+
+
+@pytest.mark.fast
+def test_extrapolation_is_limited_and_bounded():
+    clock = FakeClock()
+    config = {"mode": "extrapolate", "max_extrapolation": 1.0}
+    control_scheduler = ControlScheduler(None, config, clock)
+    submit_decisions(control_scheduler, clock)
+    action = control_scheduler.get_action(2.0)
+    assert action == pytest.approx(np.array([1.0, 0.0, 1.0]))
+
+
+@pytest.mark.fast
+@pytest.mark.parametrize(
+    "mode, expected_action",
+    [
+        ("hold", [0.5, 0.0, 0.6]),
+        ("interpolate", [0.0, 0.0, 0.2]),
+        ("extrapolate", [0.5, 0.0, 0.6]),
+    ],
+)
+def test_ticks_before_the_latest_decision(mode, expected_action):
+    clock = FakeClock()
+    control_scheduler = ControlScheduler(None, {"mode": mode}, clock)
+    submit_decisions(control_scheduler, clock)
+    # Read just before the latest decision was submitted
+    action = control_scheduler.get_action(1.09)
+    assert action == pytest.approx(np.array(expected_action))
+
+
+@pytest.mark.fast
+def test_first_decision_is_bounded():
+    control_scheduler = ControlScheduler(None, {"mode": "interpolate"}, FakeClock())
+    control_scheduler.submit_action(np.array([1.5, -0.5, 0.6]))
+    action = control_scheduler.get_action(0.0)
+    assert action == pytest.approx(np.array([1.0, 0.0, 0.6]))
+
+
+def get_deadline_misses() -> float:
+    return System_Monitor.snapshot()["counters"].get("control_deadline_misses", 0)
+
+
+def get_n_lateness_readings() -> int:
+    histograms = System_Monitor.snapshot()["histograms"]
+    return histograms.get("control_tick_lateness", {"count": 0})["count"]
+
+
+@pytest.mark.fast
+@pytest.mark.parametrize(
+    "tick_time, expected_next_tick_time, expected_misses",
+    [
+        (1.002, 1.01, 0),
+        (1.015, 1.02, 1),
+        (1.034, 1.04, 3),
+    ],
+)
+def test_late_ticks_are_recorded_and_skipped(
+    tick_time, expected_next_tick_time, expected_misses
+):
+    control_scheduler = ControlScheduler(None, {"rate": 100.0}, FakeClock())
+    n_misses, n_readings = get_deadline_misses(), get_n_lateness_readings()
+    next_tick_time = control_scheduler._record_lateness(1.0, tick_time)
+    assert next_tick_time == pytest.approx(expected_next_tick_time)
+    assert get_deadline_misses() - n_misses == expected_misses
+    assert get_n_lateness_readings() - n_readings == 1
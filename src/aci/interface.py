@@ -1,18 +1,31 @@
 import abc
 import copy
+import os
 import subprocess
 import tempfile
 import time
 from typing import Dict
 
 from aci.game_capture.inference import GameCapture
-from aci.input.controller import VirtualGamepad
+from aci.game_capture.prefetch import ObservationPrefetcher
+from aci.input.controller import INPUT_INTERFACES
+from aci.input.scheduler import ControlScheduler
+from aci.input.submitter import ActionSubmitter
 from aci.launchers import get_ac_launcher
 from aci.metrics.database.monitor import Evaluator
 from aci.metrics.database.state_logger import DatabaseStateLogger
+from aci.metrics.database.utils import get_database_config
+from aci.utils.metrics_exporter import MetricsExporter
+from aci.utils.profiler import Sampling_Profiler
+from aci.utils.resources import ResourceSampler
+from aci.utils.system_monitor import System_Monitor
+from aci.utils.tracer import NO_FRAME, Pipeline_Tracer
 from loguru import logger
 import numpy as np
 
+# Time to wait for the capture process to write its trace before merging traces
+TRACE_FLUSH_TIMEOUT = 5.0
+
 
 class AssettoCorsaInterface(abc.ABC):
     """
@@ -83,10 +96,17 @@ class AssettoCorsaInterface(abc.ABC):
 
     def _setup(self, config: Dict):
         self._config = copy.deepcopy(config)
+        self._initialise_tracing()
+        self._initialise_profiling()
+        self._initialise_system_monitor()
+        self._initialise_metrics_exporter()
+        self._initialise_resource_sampler()
         self._initialise_AC()
         self._initialise_capture()
         self._initialise_evaluation()
         self._setup_termination_check()
+        self._setup_pipelining()
+        self._setup_control_scheduler()
 
     def _setup_termination_check(self):
         self._n_steps_since_last_check = 0
@@ -96,6 +116,50 @@ class AssettoCorsaInterface(abc.ABC):
         max_consecutive_failures = termination_config.get("max_consecutive_failures", 0)
         self._n_max_consecutive_failures = max_consecutive_failures
 
+    def _setup_pipelining(self):
+        self._is_pipelined = self._config.get("pipelined", False)
+        if self._is_pipelined and self._config.get("preallocated", False):
+            message = "pipelined holds two observations at once, "
+            message += "which preallocated reuses for every capture"
+            raise ValueError(message)
+        self._observation_prefetcher = None
+        self._action_submitter = None
+        self._observation_frame = NO_FRAME
+        self._observation_frame_time_ns = 0
+
+    def _setup_control_scheduler(self):
+        if "control_scheduler" in self._config:
+            self._control_scheduler = ControlScheduler(
+                self._input_interface, self._config["control_scheduler"]
+            )
+        else:
+            self._control_scheduler = None
+
+    def _initialise_tracing(self):
+        if "tracing" in self._config:
+            Pipeline_Tracer.enable(self._config["tracing"])
+
+    def _initialise_profiling(self):
+        if "profiling" in self._config:
+            Sampling_Profiler.enable(self._config["profiling"])
+
+    def _initialise_system_monitor(self):
+        monitor_config = self._config.get("system_monitor", {})
+        if "windows" in monitor_config:
+            System_Monitor.set_windows(monitor_config["windows"])
+
+    def _initialise_metrics_exporter(self):
+        if "metrics_exporter" in self._config:
+            self._metrics_exporter = MetricsExporter(self._config["metrics_exporter"])
+        else:
+            self._metrics_exporter = None
+
+    def _initialise_resource_sampler(self):
+        if "resource_sampler" in self._config:
+            self._resource_sampler = ResourceSampler(self._config["resource_sampler"])
+        else:
+            self._resource_sampler = None
+
     def _initialise_AC(self):
         self._ac_launcher = get_ac_launcher(self._config)
         self._config.update(self._ac_launcher.config)
@@ -103,24 +167,26 @@ class AssettoCorsaInterface(abc.ABC):
     def _initialise_capture(self):
         self._ac_launcher.launch_sate_server()
         self._game_capture = GameCapture(self._config)
-        self._input_interface = VirtualGamepad()
+        input_interface = self._config.get("input_interface", "gamepad")
+        self._input_interface = INPUT_INTERFACES[input_interface]()
 
     def _initialise_evaluation(self):
+        self._database_config = get_database_config(self._config)
         self._setup_database_logger()
         self._setup_evaluator()
 
     def _setup_database_logger(self):
-        if "postgres" in self._config:
-            config = self._config["postgres"]
-            self._database_logger = DatabaseStateLogger(self._game_capture, config)
+        if self._database_config is not None:
+            self._database_logger = DatabaseStateLogger(
+                self._game_capture, self._database_config
+            )
         else:
             self._database_logger = None
 
     def _setup_evaluator(self):
         if "evaluation" in self._config:
             evaluation_config = self._config["evaluation"]
-            postgres_config = self._config["postgres"]
-            self._evaluator = Evaluator(evaluation_config, postgres_config)
+            self._evaluator = Evaluator(evaluation_config, self._database_config)
         else:
             self._evaluator = None
 
@@ -136,11 +202,74 @@ class AssettoCorsaInterface(abc.ABC):
         if self._evaluator is not None:
             self._evaluator.start()
 
+    def _start_metrics_exporter(self):
+        if self._metrics_exporter is not None:
+            self._metrics_exporter.start()
+
+    def _start_pipelining(self):
+        if not self._is_pipelined:
+            return
+        self._observation_prefetcher = ObservationPrefetcher(self._game_capture)
+        # The control scheduler already submits actions from its own thread
+        if self._control_scheduler is None:
+            self._action_submitter = ActionSubmitter(self._input_interface)
+
+    def _start_resource_sampler(self):
+        if self._resource_sampler is None:
+            return
+        self._resource_sampler.add_process("Agent", os.getpid())
+        self._resource_sampler.add_process("GameCapture", self._game_capture.pid)
+        if self._database_logger is not None:
+            self._resource_sampler.add_process(
+                "DatabaseStateLogger", self._database_logger.pid
+            )
+        if self._evaluator is not None:
+            self._resource_sampler.add_process("Evaluator", self._evaluator.pid)
+        if len(self._ac_launcher.process_names) > 0:
+            self._resource_sampler.add_process_names(
+                "AssettoCorsa", self._ac_launcher.process_names
+            )
+        self._resource_sampler.start()
+
     def _shutdown(self):
+        self._stop_control_scheduler()
+        self._stop_pipelining()
         self._game_capture.stop()
         self._stop_evaluator()
         self._stop_database_logger()
         self._shutdown_AC()
+        self._stop_resource_sampler()
+        self._stop_metrics_exporter()
+        self._save_trace()
+
+    def _start_control_scheduler(self):
+        if self._control_scheduler is not None:
+            self._control_scheduler.start()
+
+    def _stop_control_scheduler(self):
+        if self._control_scheduler is not None:
+            self._control_scheduler.stop()
+
+    def _stop_pipelining(self):
+        if self._observation_prefetcher is not None:
+            self._observation_prefetcher.stop()
+        if self._action_submitter is not None:
+            self._action_submitter.stop()
+
+    def _stop_resource_sampler(self):
+        if self._resource_sampler is not None:
+            self._resource_sampler.stop()
+
+    def _stop_metrics_exporter(self):
+        if self._metrics_exporter is not None:
+            self._metrics_exporter.stop()
+
+    def _save_trace(self):
+        if not Pipeline_Tracer.is_enabled:
+            return
+        Pipeline_Tracer.flush()
+        self._game_capture.join(timeout=TRACE_FLUSH_TIMEOUT)
+        Pipeline_Tracer.merge()
 
     def _stop_database_logger(self):
         if self._database_logger is not None:
@@ -155,26 +284,42 @@ class AssettoCorsaInterface(abc.ABC):
         self._ac_launcher.shutdown_state_server()
 
     def run(self):
-        self._launch_AC()
-        self._start_capture()
-        self._start_evaluation()
-        self._ac_launcher.start_session()
-        time.sleep(2)
+        self._start()
+        Sampling_Profiler.start("agent")
         while self.is_running:
             try:
                 observation = self.get_observation()
                 if self._is_termination_condition_met(observation):
                     self.is_running = False
-                action = self.behaviour(observation)
+                with Pipeline_Tracer.span("behaviour"):
+                    action = self.behaviour(observation)
                 self.act(action)
             except KeyboardInterrupt:
                 self.is_running = False
             except Exception as e:
                 self._log_exception(e)
                 self.is_running = False
+        Sampling_Profiler.stop()
         self.teardown()
         self._shutdown()
 
+    def _start(self):
+        self._start_processes()
+        time.sleep(2)
+        self._start_threads()
+
+    def _start_processes(self):
+        self._launch_AC()
+        self._start_capture()
+        self._start_evaluation()
+        self._ac_launcher.start_session()
+
+    def _start_threads(self):
+        self._start_resource_sampler()
+        self._start_metrics_exporter()
+        self._start_control_scheduler()
+        self._start_pipelining()
+
     def _is_termination_condition_met(self, observation: Dict) -> bool:
         if self._n_steps_between_checks < 0:
             return False
@@ -212,7 +357,15 @@ class AssettoCorsaInterface(abc.ABC):
         :return: {Dictionary image: BGR image as np.array, state: Dict{str: float}}
         :rtype: Dict[str: np.array, Dict]
         """
-        return self._game_capture.capture
+        if self._observation_prefetcher is not None:
+            observation, frame, frame_time_ns = self._observation_prefetcher.get()
+        else:
+            observation = self._game_capture.capture
+            frame = self._game_capture.received_frame
+            frame_time_ns = self._game_capture.received_frame_time_ns
+        self._observation_frame = frame
+        self._observation_frame_time_ns = frame_time_ns
+        return observation
 
     def act(self, action: np.array):
         """
@@ -223,7 +376,40 @@ class AssettoCorsaInterface(abc.ABC):
         :action: An array in the format [steering angle, throttle, brake]
         :type: np.array
         """
-        self._input_interface.submit_action(action)
+        self._record_observation_staleness()
+        if self._control_scheduler is not None:
+            self._control_scheduler.submit_action(action)
+        elif self._action_submitter is not None:
+            self._action_submitter.submit_action(action)
+        else:
+            self._input_interface.submit_action(action)
+        System_Monitor.increment("actions")
+
+    def _record_observation_staleness(self):
+        """
+        Records how old the observation an action was decided on is, as the time
+            since its image was decoded and the number of newer images decoded
+        """
+        if self._observation_frame_time_ns > 0:
+            latency = time.perf_counter_ns() - self._observation_frame_time_ns
+            System_Monitor.record("capture_to_action", latency)
+        if self._observation_frame != NO_FRAME:
+            n_newer_frames = self._game_capture.frame_sequence - self._observation_frame
+            System_Monitor.increment("stale_frames", n_newer_frames)
+
+    @property
+    def latest_metrics(self) -> Dict[str, Dict]:
+        """
+        Latest results of each evaluation tracker, read from shared memory without
+            querying the database. Tracker names are "{monitor name}-{interval name}"
+
+        :return: Sequence number, lap, update time and published values keyed by
+            tracker name, empty if evaluation is not configured
+        :rtype: Dict[str, Dict]
+        """
+        if self._evaluator is None:
+            return {}
+        return self._evaluator.latest_results
 
     @abc.abstractmethod
     def behaviour(self, observation: Dict) -> np.array:
@@ -12,7 +12,6 @@ from aci.utils.os import (
 from acs.client import StateClient
 from halo import Halo
 from loguru import logger
-import pyautogui
 
 LEFT_MENU_WIDTH = 100
 BAR_TO_SETUP_NORMALISED_WIDTH = 0.078
@@ -21,6 +20,9 @@ SETUP_TO_LOAD_WIDTH = 40
 
 
 class AssettoCorsaLauncher(abc.ABC):
+    # Command names AC's process runs as, empty if it is not visible to ACI
+    process_names = []
+
     def __init__(self, config: Dict):
         self.__setup(config)
 
@@ -122,6 +124,9 @@ class AssettoCorsaLauncher(abc.ABC):
         """
         Clicks in the AC window on the drive button to start the session
         """
+        # Imported on use as pyautogui needs an X display to import
+        import pyautogui
+
         cursor_location = pyautogui.position()
         top_left_corner = get_application_window_coordinates(
             "AC", self._window_resolution
@@ -133,6 +138,8 @@ class AssettoCorsaLauncher(abc.ABC):
         """
         Clicks in the AC window to load the vehicle setup in the top position of the UI
         """
+        import pyautogui
+
         top_left_corner = get_application_window_coordinates(
             "AC", self._window_resolution
         )
@@ -11,6 +11,8 @@ from .base import AssettoCorsaLauncher
 
 
 class CrossOverLauncher(AssettoCorsaLauncher):
+    process_names = ["acs.exe"]
+
     def __init__(self, config: Dict):
         super().__init__(config)
         self._p_state_server = None
@@ -8,6 +8,8 @@ PROJECT_PATH = Path(os.path.dirname(__file__)).parents[0]
 
 
 class ProtonLauncher(AssettoCorsaLauncher):
+    process_names = ["AssettoCorsa.ex"]
+
     def _launch_assetto_corsa(self):
         """
         Launches AC
@@ -0,0 +1,40 @@
+from typing import Dict
+
+from .base import AssettoCorsaLauncher
+
+DEFAULT_RESOLUTION = [1920, 1080]
+
+
+class StandInLauncher(AssettoCorsaLauncher):
+    """
+    Launcher used when running without AC, with stand-in frame and state sources.
+        Nothing is launched or configured, it only provides the display
+        resolution AC would have been configured with, taken from
+        capture.images.resolution
+    """
+
+    def __init__(self, config: Dict):
+        images_config = config["capture"].get("images", {})
+        width, height = images_config.get("resolution", DEFAULT_RESOLUTION)
+        self._config = {"video.ini": {"VIDEO": {"WIDTH": width, "HEIGHT": height}}}
+
+    def launch_assetto_corsa(self):
+        pass
+
+    def _launch_assetto_corsa(self):
+        pass
+
+    def _shutdown_assetto_corsa(self):
+        pass
+
+    def launch_sate_server(self):
+        pass
+
+    def _launch_sate_server(self):
+        pass
+
+    def _shutdown_state_server(self):
+        pass
+
+    def start_session(self):
+        pass
@@ -3,6 +3,7 @@ from typing import Dict
 from .base import AssettoCorsaLauncher
 from .crossover import CrossOverLauncher, DockerCrossOverLauncher
 from .proton import DockerProtonLauncher, ProtonLauncher
+from .stand_in import StandInLauncher
 
 AC_LAUNCHERS = {
     "proton": {
@@ -17,6 +18,8 @@ AC_LAUNCHERS = {
 
 
 def get_ac_launcher(config: Dict) -> AssettoCorsaLauncher:
+    if config["capture"].get("is_stand_in", False):
+        return StandInLauncher(config)
     is_proton = config["capture"]["is_proton"]
     comptability_tool = "proton" if is_proton else "crossover"
     is_docker = config["capture"]["is_docker"]
@@ -0,0 +1,245 @@
+import abc
+from contextlib import closing
+import time
+from typing import Callable, Dict, List, Tuple
+
+from aci.utils.system_monitor import System_Monitor, track_runtime
+from loguru import logger
+
+DEFAULT_COMMIT_EVERY_N = 1
+DEFAULT_NOTIFY_ON = ["batch", "lap", "sector"]
+BATCH_NOTIFICATION = "batch"
+DEFAULT_MAX_RECONNECT_ATTEMPTS = 10
+INITIAL_RECONNECT_DELAY = 0.1
+MAX_RECONNECT_DELAY = 5.0
+
+
+class DatabaseConnector(abc.ABC):
+    """
+    Storage backend used to log game state and query it for evaluation
+        Inserts are committed in batches of commit_every_n rows. Notifications
+        are sent as part of the next commit so listeners only wake once the rows
+        they describe are visible. sleep is called with the delay between
+        reconnection attempts
+    """
+
+    dialect = None
+    duplicate_table_errors = ()
+
+    def __init__(
+        self,
+        database_config: Dict,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._table_name = database_config["table_name"]
+        self._commit_every_n = database_config.get(
+            "commit_every_n", DEFAULT_COMMIT_EVERY_N
+        )
+        self._max_reconnect_attempts = database_config.get(
+            "max_reconnect_attempts", DEFAULT_MAX_RECONNECT_ATTEMPTS
+        )
+        notify_on = database_config.get("notify_on", DEFAULT_NOTIFY_ON)
+        self._is_notifying_on_commit = BATCH_NOTIFICATION in notify_on
+        self._notifications = []
+        self._n_uncommitted = 0
+        self._sleep = sleep
+        self._connect()
+
+    @abc.abstractmethod
+    def _connect(self):
+        """
+        Implement logic to open a session with the database as self._session
+        """
+        pass
+
+    @abc.abstractmethod
+    def _send_notifications(self, notifications: List[str]):
+        """
+        Implement logic to send notifications within the current transaction
+        """
+        pass
+
+    @abc.abstractmethod
+    def listen(self):
+        """
+        Implement logic to subscribe to notifications sent by other connectors
+            using the same table
+        """
+        pass
+
+    @abc.abstractmethod
+    def wait_for_notifications(self, timeout: float) -> List[str]:
+        """
+        Implement logic to block until at least one notification is received or the
+            timeout expires, returning every notification received
+
+        :timeout: Maximum time to wait in seconds
+        :type timeout: float
+        :return: Payloads of the notifications received, empty if none arrived
+        :rtype: List[str]
+        """
+        pass
+
+    def notify(self, payload: str):
+        """
+        Queues a notification to be sent with the next commit
+
+        :payload: Message describing the event
+        :type payload: str
+        """
+        self._notifications.append(payload)
+
+    def _release_session(self):
+        """
+        Releases self._session, override if sessions are borrowed from a pool
+        """
+        self._session.close()
+
+    def _is_connection_error(self, error: Exception) -> bool:
+        """
+        Override to identify errors after which the session is no longer usable
+        """
+        return False
+
+    def handle_error(self, error: Exception):
+        """
+        Recovers the session after a failed statement, reconnecting if the
+            connection to the database was lost
+
+        :error: Exception raised while executing a statement
+        :type error: Exception
+        """
+        if self._is_connection_error(error):
+            self.reconnect()
+        else:
+            self.rollback()
+
+    def reconnect(self):
+        """
+        Replaces the current session with a new one, backing off exponentially
+            between failed attempts. Uncommitted rows are lost
+        """
+        self._notifications = []
+        self._n_uncommitted = 0
+        self._maybe_release_session()
+        delay = INITIAL_RECONNECT_DELAY
+        for n_attempts in range(1, self._max_reconnect_attempts + 1):
+            try:
+                self._connect()
+                return
+            except Exception as e:
+                message = f"Reconnection attempt {n_attempts} failed: {e}, "
+                message += f"retrying in {delay:.1f}s"
+                logger.warning(message)
+                self._sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+        raise ConnectionError(f"Unable to reconnect to {self.dialect} database")
+
+    def _maybe_release_session(self):
+        try:
+            self._release_session()
+        except Exception as e:
+            logger.warning(f"Error releasing database session: {e}")
+
+    @abc.abstractmethod
+    def run_queries(self, queries: List[Dict]) -> List[List[Tuple]]:
+        """
+        Implement logic to execute a set of read queries and fetch their results
+
+        :queries: Queries with variables to be bound
+        :type queries: List[Dict["query": str, "to_bind": Dict['name': value]]]
+        :return: Rows returned by each query in the order they were submitted
+        :rtype: List[List[Tuple]]
+        """
+        pass
+
+    def create_table(self, create_sql: str, index_sqls: List[str]) -> bool:
+        """
+        Creates a table and its indexes, reusing the table if it already exists
+
+        :create_sql: SQL statement creating the table
+        :type create_sql: str
+        :index_sqls: SQL statements creating indexes on the table
+        :type index_sqls: List[str]
+        :return: True if the table was newly created, False otherwise
+        :rtype: bool
+        """
+        is_created = False
+        with closing(self._session.cursor()) as cursor:
+            try:
+                cursor.execute(create_sql)
+                self._session.commit()
+                logger.success(f'Made table in database "{self._table_name}"')
+                is_created = True
+            except self.duplicate_table_errors as e:
+                logger.warning(f"{e}, we'll just use the same table")
+                self._session.rollback()
+            except Exception as e:
+                logger.error(f"Error creating table: {e}")
+                self._session.rollback()
+                return False
+        self.execute(index_sqls)
+        return is_created
+
+    def execute(self, sqls: List[str]) -> bool:
+        """
+        Executes and commits a list of statements as one transaction
+
+        :sqls: SQL statements to execute
+        :type sqls: List[str]
+        :return: True if the statements were committed, False if they failed and
+            the transaction was rolled back
+        :rtype: bool
+        """
+        with closing(self._session.cursor()) as cursor:
+            try:
+                for sql in sqls:
+                    cursor.execute(sql)
+                self.commit()
+            except Exception as e:
+                logger.error(f"Error executing {sqls}: {e}")
+                self.handle_error(e)
+                return False
+        return True
+
+    def insert_row(self, insert_sql: str, row: Dict):
+        """
+        Inserts a row, committing once commit_every_n rows have been inserted
+
+        :insert_sql: SQL statement with placeholders for each column in row
+        :type insert_sql: str
+        :row: Values to bind to the statement's placeholders
+        :type row: Dict
+        """
+        with closing(self._session.cursor()) as cursor:
+            try:
+                cursor.execute(insert_sql, row)
+                self._n_uncommitted += 1
+                self._maybe_commit()
+            except Exception as e:
+                logger.error(f"Error inserting data: {e}")
+                self.handle_error(e)
+
+    def _maybe_commit(self):
+        if self._n_uncommitted >= self._commit_every_n:
+            self.commit()
+
+    @track_runtime(System_Monitor)
+    def commit(self):
+        if self._is_notifying_on_commit and self._n_uncommitted > 0:
+            self._notifications.append(BATCH_NOTIFICATION)
+        if len(self._notifications) > 0:
+            self._send_notifications(self._notifications)
+        self._session.commit()
+        self._notifications = []
+        self._n_uncommitted = 0
+
+    def rollback(self):
+        self._session.rollback()
+        self._notifications = []
+        self._n_uncommitted = 0
+
+    def close(self):
+        if self._n_uncommitted > 0 or len(self._notifications) > 0:
+            self.commit()
+        self._release_session()
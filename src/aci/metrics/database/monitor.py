@@ -1,24 +1,48 @@
 import multiprocessing as mp
 import signal
 import time
-from typing import Dict
-
-from aci.metrics.database.postgres import PostgresConnector
-from aci.metrics.database.trackers import TRACKER_TYPES
+from typing import Dict, List
+
+from aci.metrics.database.base import BATCH_NOTIFICATION
+from aci.metrics.database.trackers import build_trackers
+from aci.metrics.database.utils import get_database_connector, get_database_dialect
+from aci.metrics.shared_results import SharedResults
+from aci.utils.profiler import Sampling_Profiler
+from aci.utils.system_monitor import System_Monitor, track_runtime
 from loguru import logger
-import psycopg
+
+# Longest time spent waiting for notifications before checking for a stop request
+NOTIFICATION_TIMEOUT = 0.5
+# Shortest time between evaluations triggered by newly committed rows
+DEFAULT_MIN_EVALUATION_INTERVAL = 0.5
 
 
 class Evaluator(mp.Process):
-    def __init__(self, evaluation_config: Dict, postgres_config: Dict):
+    def __init__(self, evaluation_config: Dict, database_config: Dict):
         super().__init__()
         self._evaluation_config = evaluation_config
-        self._postgres_db = PostgresConnector(postgres_config)
+        self._database_config = database_config
         self._current_lap = 0
         self._sql_queries = {}
+        self._min_evaluation_interval = evaluation_config.get(
+            "min_interval", DEFAULT_MIN_EVALUATION_INTERVAL
+        )
+        self._last_evaluation_time = -float("inf")
+        self._is_evaluation_pending = False
         self.__setup_trackers()
         self.__setup_processes_shared_memory()
 
+    @property
+    def latest_results(self) -> Dict[str, Dict]:
+        """
+        Latest values published by each tracker, safe to read from any process
+
+        :return: Sequence number, lap, update time and published values keyed by
+            tracker name
+        :rtype: Dict[str, Dict]
+        """
+        return self._shared_results.read_all()
+
     @property
     def is_running(self) -> bool:
         """
@@ -72,9 +96,64 @@ class Evaluator(mp.Process):
         Called on Evaluator.start()
         """
         signal.signal(signal.SIGINT, signal.SIG_IGN)
+        self._database = get_database_connector(self._database_config)
+        self._database.listen()
+        Sampling_Profiler.start("evaluator")
+        self._evaluate_agent()
         while self.is_running:
+            timeout = self._get_notification_timeout()
+            notifications = self._database.wait_for_notifications(timeout)
+            if len(notifications) > 0:
+                self._on_notifications(notifications)
+            self._maybe_evaluate_pending()
+        Sampling_Profiler.stop()
+        self._database.close()
+
+    def _on_notifications(self, notifications: List[str]):
+        """
+        Evaluates once per group of notifications received. On a new lap the
+            completed lap is evaluated a final time before trackers move on.
+            Lap and sector boundaries are evaluated straight away, while
+            evaluations of new rows are at least min_interval apart, so query
+            load does not grow with the rate states are logged at
+        """
+        is_boundary = False
+        for notification in notifications:
+            event, _, lap = notification.partition(":")
+            if event == "lap" and int(lap) != self._current_lap:
+                self._evaluate_agent()
+                self._set_current_lap(int(lap))
+            is_boundary |= event != BATCH_NOTIFICATION
+        if is_boundary or self._is_evaluation_due:
             self._evaluate_agent()
-            time.sleep(0.5)
+        else:
+            self._is_evaluation_pending = True
+
+    @property
+    def _is_evaluation_due(self) -> bool:
+        elapsed = time.monotonic() - self._last_evaluation_time
+        return elapsed >= self._min_evaluation_interval
+
+    def _maybe_evaluate_pending(self):
+        if self._is_evaluation_pending and self._is_evaluation_due:
+            self._evaluate_agent()
+
+    def _get_notification_timeout(self) -> float:
+        """
+        :return: Time to wait for notifications, shortened so a pending
+            evaluation is not delayed past min_interval
+        :rtype: float
+        """
+        if not self._is_evaluation_pending:
+            return NOTIFICATION_TIMEOUT
+        elapsed = time.monotonic() - self._last_evaluation_time
+        remaining = self._min_evaluation_interval - elapsed
+        return min(max(remaining, 0.0), NOTIFICATION_TIMEOUT)
+
+    def _set_current_lap(self, lap: int):
+        self._current_lap = lap
+        for tracker in self._trackers.values():
+            tracker.current_lap = lap
 
     def stop(self):
         """
@@ -82,14 +161,18 @@ class Evaluator(mp.Process):
         """
         self.is_running = False
 
-    @property
-    def _db_connection(self) -> psycopg.Connection:
-        return self._postgres_db._session
-
     def _evaluate_agent(self):
+        self._last_evaluation_time = time.monotonic()
+        self._is_evaluation_pending = False
         data = self._maybe_query_database()
         for interval_name, value in data.items():
             logger.info(f"{interval_name}: {value}")
+            self._publish_result(interval_name, value)
+
+    def _publish_result(self, tracker_name: str, result):
+        tracker = self._trackers[tracker_name]
+        values = tracker.get_published_values(result)
+        self._shared_results.publish(tracker_name, tracker.current_lap, values)
 
     def _maybe_query_database(self):
         data = {}
@@ -97,39 +180,25 @@ class Evaluator(mp.Process):
             self._query_database(data)
         except Exception as e:
             logger.error(f"Monitor database query error: {e}")
-            self._db_connection.rollback()
+            self._database.handle_error(e)
         return data
 
+    @track_runtime(System_Monitor)
     def _query_database(self, data: Dict):
-        with self._db_connection.pipeline():
-            with self._db_connection.cursor() as cursor:
-                self._submit_queries(cursor)
-                self._get_results(cursor, data)
-
-    def _submit_queries(self, cursor: psycopg.ServerCursor):
-        for tracker in self._trackers.values():
-            query = tracker.get_sql_query()
-            cursor.execute(query["query"], query["to_bind"])
-
-    def _get_results(self, cursor: psycopg.ServerCursor, data: Dict):
-        for query_name, _ in self._trackers.items():
-            data[query_name] = cursor.fetchall()
-            cursor.nextset()
+        queries = [tracker.get_sql_query() for tracker in self._trackers.values()]
+        results = self._database.run_queries(queries)
+        for (query_name, tracker), result in zip(self._trackers.items(), results):
+            data[query_name] = tracker.update(result)
 
     def __setup_processes_shared_memory(self):
         self._is_evaluation_lap = mp.Value("i", False)
         self._is_running = mp.Value("i", True)
+        slot_fields = {
+            name: tracker.published_fields for name, tracker in self._trackers.items()
+        }
+        self._shared_results = SharedResults(slot_fields)
 
     def __setup_trackers(self):
-        self._trackers = {}
-        table_name = self._postgres_db._table_name
-        for monitor_info in self._evaluation_config["monitors"]:
-            for interval_name, interval in monitor_info["intervals"].items():
-                tracker = TRACKER_TYPES[monitor_info["type"]](
-                    interval,
-                    monitor_info["interval_column"],
-                    table_name,
-                    monitor_info["column"],
-                )
-                tracker_name = "-".join([monitor_info["name"], interval_name])
-                self._trackers[tracker_name] = tracker
+        table_name = self._database_config["table_name"]
+        dialect = get_database_dialect(self._database_config)
+        self._trackers = build_trackers(self._evaluation_config, table_name, dialect)
@@ -1,28 +1,128 @@
-from typing import Dict
+import time
+from typing import Callable, Dict, List, Tuple
 
+from aci.metrics.database.base import DatabaseConnector
 from loguru import logger
 import psycopg
+from psycopg.conninfo import make_conninfo
+import psycopg.sql
+from psycopg_pool import ConnectionPool
 
+DEFAULT_POOL_CONFIG = {
+    "min_size": 1,
+    "max_size": 2,
+    "timeout": 30.0,
+    "reconnect_timeout": 300.0,
+}
+# Number of times a query is executed before it is prepared server side
+DEFAULT_PREPARE_THRESHOLD = 0
+# Time to wait for further notifications once one has been received
+NOTIFICATION_DRAIN_TIMEOUT = 1e-3
 
-class PostgresConnector:
-    def __init__(self, postgres_config: Dict):
+
+class PostgresConnector(DatabaseConnector):
+    """
+    Borrows a session from a connection pool owned by the process that creates the
+        connector. Connectors should be created in the process that uses them, as
+        libpq connections cannot be shared safely across a fork
+    """
+
+    dialect = "postgres"
+    duplicate_table_errors = psycopg.errors.DuplicateTable
+
+    def __init__(
+        self,
+        postgres_config: Dict,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
         self._dbname = postgres_config["dbname"]
         self._user = postgres_config["user"]
         self._password = postgres_config["password"]
         self._host = postgres_config["host"]
         self._port = postgres_config["port"]
-        self._table_name = postgres_config["table_name"]
-        self._connect_to_postgres()
+        self._pool_config = {**DEFAULT_POOL_CONFIG, **postgres_config.get("pool", {})}
+        self._prepare_threshold = postgres_config.get(
+            "prepare_threshold", DEFAULT_PREPARE_THRESHOLD
+        )
+        self._pool = None
+        self._listen_session = None
+        super().__init__(postgres_config, sleep)
 
-    def _connect_to_postgres(self):
-        self._session = psycopg.connect(
+    def _connect(self):
+        if self._pool is None:
+            self._pool = self._create_pool()
+        self._session = self._pool.getconn()
+
+    @property
+    def _conninfo(self) -> str:
+        return make_conninfo(
             dbname=self._dbname,
             user=self._user,
             password=self._password,
             host=self._host,
             port=self._port,
         )
+
+    def _create_pool(self) -> ConnectionPool:
+        pool = ConnectionPool(
+            self._conninfo,
+            kwargs={"prepare_threshold": self._prepare_threshold},
+            check=ConnectionPool.check_connection,
+            open=True,
+            **self._pool_config,
+        )
+        pool.wait(timeout=self._pool_config["timeout"])
         logger.success("Connected to Database")
+        return pool
+
+    def _release_session(self):
+        self._pool.putconn(self._session)
+
+    def _is_connection_error(self, error: Exception) -> bool:
+        return isinstance(error, psycopg.OperationalError) or self._session.closed
+
+    def _send_notifications(self, notifications: List[str]):
+        with self._session.cursor() as cursor:
+            for payload in notifications:
+                cursor.execute(
+                    "SELECT pg_notify(%s, %s)",
+                    (self._table_name, payload),
+                    prepare=True,
+                )
+
+    def listen(self):
+        """
+        Opens a dedicated connection outside of the pool that LISTENs on the
+            channel named after the table
+        """
+        self._listen_session = psycopg.connect(self._conninfo, autocommit=True)
+        channel = psycopg.sql.Identifier(self._table_name)
+        self._listen_session.execute(psycopg.sql.SQL("LISTEN {}").format(channel))
+
+    def wait_for_notifications(self, timeout: float) -> List[str]:
+        notifies = self._listen_session.notifies(timeout=timeout, stop_after=1)
+        payloads = [notification.payload for notification in notifies]
+        if len(payloads) > 0:
+            notifies = self._listen_session.notifies(timeout=NOTIFICATION_DRAIN_TIMEOUT)
+            payloads += [notification.payload for notification in notifies]
+        return payloads
+
+    def run_queries(self, queries: List[Dict]) -> List[List[Tuple]]:
+        """
+        Pipelines queries so that they are executed in a single round trip
+        """
+        results = []
+        with self._session.pipeline():
+            with self._session.cursor() as cursor:
+                for query in queries:
+                    cursor.execute(query["query"], query["to_bind"])
+                for _ in queries:
+                    results.append(cursor.fetchall())
+                    cursor.nextset()
+        return results
 
     def close(self):
-        self._session.close()
+        super().close()
+        self._pool.close()
+        if self._listen_session is not None:
+            self._listen_session.close()
@@ -1,5 +1,5 @@
 import ctypes
-from typing import List
+from typing import List, Union
 
 from acs.shared_memory.ac.combined import COMBINED_DATA_TYPES
 
@@ -9,28 +9,193 @@ NUMPY_TO_SQL_DTYPES = {
     "V30": "text",
     "V68": "text",
 }
+NUMPY_TO_SQLITE_DTYPES = {
+    ctypes.c_int: "INTEGER",
+    ctypes.c_float: "REAL",
+    "V30": "TEXT",
+    "V68": "TEXT",
+}
+SQL_DIALECTS = {
+    "postgres": {
+        "create_table": "CREATE UNLOGGED TABLE",
+        "primary_key": "id SERIAL PRIMARY KEY",
+        "total_time": "i_total_time BIGSERIAL",
+        "dtypes": NUMPY_TO_SQL_DTYPES,
+        "placeholder": "%({})s",
+        "time_index": "USING BRIN (i_total_time)",
+        "blob": "bytea",
+        "is_partitionable": True,
+    },
+    "sqlite": {
+        "create_table": "CREATE TABLE IF NOT EXISTS",
+        "primary_key": "id INTEGER PRIMARY KEY",
+        "total_time": "i_total_time INTEGER",
+        "dtypes": NUMPY_TO_SQLITE_DTYPES,
+        "placeholder": ":{}",
+        "time_index": "(i_total_time)",
+        "blob": "BLOB",
+        "is_partitionable": False,
+    },
+}
+PARTITION_COLUMNS = {
+    "lap": "completed_laps",
+}
+# Avoid using current_time, which is a protected phrase in SQL
+STATE_TO_COLUMN_NAMES = {"current_time": "current_laptime"}
+RAW_STATE_COLUMN = "raw_state"
+
+
+def get_placeholder(name: str, dialect: str = "postgres") -> str:
+    return SQL_DIALECTS[dialect]["placeholder"].format(name)
+
+
+def get_column_name(state_name: str) -> str:
+    return STATE_TO_COLUMN_NAMES.get(state_name, state_name)
+
+
+def get_schema_data_types(columns: Union[List[str], None] = None) -> List:
+    """
+    Selects the game state fields stored as columns, by default every field
 
+    :param columns: Column names to store, None to store every field
+    :type columns: Union[List[str], None]
+    :return: (name, dtype) pairs from COMBINED_DATA_TYPES for each stored column
+    :rtype: List[Tuple[str, Union[ctypes._SimpleCData, str]]]
+    """
+    if columns is None:
+        return COMBINED_DATA_TYPES
+    columns = set(columns)
+    return [
+        (name, dtype)
+        for name, dtype in COMBINED_DATA_TYPES
+        if name in columns or get_column_name(name) in columns
+    ]
 
-def get_create_table_sql(table_name: str) -> str:
-    sql = f"CREATE UNLOGGED TABLE {table_name} (\n"
-    sql += "id SERIAL PRIMARY KEY,\n"
-    sql += "i_total_time BIGSERIAL,\n"
-    for name, dtype in COMBINED_DATA_TYPES:
-        sql_dtype = NUMPY_TO_SQL_DTYPES[dtype]
-        if name == "current_time":
-            name = "current_laptime"
-        sql += f"{name} {sql_dtype},\n"
+
+def get_create_table_sql(
+    table_name: str,
+    partition_by: Union[str, None] = None,
+    dialect: str = "postgres",
+    columns: Union[List[str], None] = None,
+    store_raw_state: bool = False,
+) -> str:
+    """
+    Creates the table used to log game state, optionally range partitioned so that
+        old partitions can be detached or compressed while a session is running.
+        Partitioned tables cannot be unlogged, instead each partition is unlogged
+
+    :param table_name: Name of the table to create
+    :type table_name: str
+    :param partition_by: Key of PARTITION_COLUMNS to partition the table on
+    :type partition_by: Union[str, None]
+    :param dialect: Key of SQL_DIALECTS to generate the statement for
+    :type dialect: str
+    :param columns: Game state fields to store as columns, None to store all fields
+    :type columns: Union[List[str], None]
+    :param store_raw_state: Adds a column holding the undecoded game state bytes
+    :type store_raw_state: bool
+    :return: SQL statement creating the table
+    :rtype: str
+    """
+    sql_dialect = SQL_DIALECTS[dialect]
+    if partition_by is None:
+        sql = f"{sql_dialect['create_table']} {table_name} (\n"
+        sql += f"{sql_dialect['primary_key']},\n"
+    elif sql_dialect["is_partitionable"]:
+        sql = f"CREATE TABLE {table_name} (\n"
+        sql += "id SERIAL,\n"
+    else:
+        raise ValueError(f"Partitioning is not supported by {dialect}")
+    sql += f"{sql_dialect['total_time']},\n"
+    for name, dtype in get_schema_data_types(columns):
+        sql_dtype = sql_dialect["dtypes"][dtype]
+        sql += f"{get_column_name(name)} {sql_dtype},\n"
+    if store_raw_state:
+        sql += f"{RAW_STATE_COLUMN} {sql_dialect['blob']},\n"
+    if partition_by is not None:
+        partition_column = PARTITION_COLUMNS[partition_by]
+        sql += f"PRIMARY KEY (id, {partition_column}),\n"
+        sql = modify_sql_ending(sql)
+        sql += f" PARTITION BY RANGE ({partition_column})"
+        return sql
     return modify_sql_ending(sql)
 
 
-def get_insert_row_sql(table_name: str) -> str:
+def get_create_partition_sql(
+    table_name: str,
+    partition_by: str,
+    start: int,
+    end: int,
+) -> str:
+    """
+    Creates an unlogged partition holding rows with a partition column value in the
+        range [start, end), named so that it can be found and detached later
+
+    :param table_name: Name of the partitioned parent table
+    :type table_name: str
+    :param partition_by: Key of PARTITION_COLUMNS the table is partitioned on
+    :type partition_by: str
+    :param start: Inclusive lower bound of the partition
+    :type start: int
+    :param end: Exclusive upper bound of the partition
+    :type end: int
+    :return: Postgres SQL statement creating the partition
+    :rtype: str
+    """
+    partition_name = get_partition_name(table_name, partition_by, start, end)
+    sql = f"CREATE UNLOGGED TABLE IF NOT EXISTS {partition_name} "
+    sql += f"PARTITION OF {table_name} FOR VALUES FROM ({start}) TO ({end})"
+    return sql
+
+
+def get_partition_name(table_name: str, partition_by: str, start: int, end: int) -> str:
+    return f"{table_name}_{partition_by}_{start}_{end - 1}"
+
+
+def get_create_indexes_sql(
+    table_name: str,
+    interval_columns: List[str],
+    dialect: str = "postgres",
+) -> List[str]:
+    """
+    Creates the indexes used by tracker queries, a composite index per interval column
+        for the lap and interval filter and an index for ordering by time. Where
+        available BRIN is used as i_total_time only increases with insertion order
+
+    :param table_name: Name of the table to index
+    :type table_name: str
+    :param interval_columns: Columns trackers filter on with a BETWEEN clause
+    :type interval_columns: List[str]
+    :param dialect: Key of SQL_DIALECTS to generate the statements for
+    :type dialect: str
+    :return: SQL statements creating the indexes
+    :rtype: List[str]
+    """
+    sqls = []
+    for column_name in interval_columns:
+        sql = f"CREATE INDEX IF NOT EXISTS {table_name}_{column_name}_idx "
+        sql += f"ON {table_name} (completed_laps, {column_name})"
+        sqls.append(sql)
+    sql = f"CREATE INDEX IF NOT EXISTS {table_name}_i_total_time_idx "
+    sql += f"ON {table_name} {SQL_DIALECTS[dialect]['time_index']}"
+    sqls.append(sql)
+    return sqls
+
+
+def get_insert_row_sql(
+    table_name: str,
+    dialect: str = "postgres",
+    columns: Union[List[str], None] = None,
+    store_raw_state: bool = False,
+) -> str:
     sql_1 = f"INSERT INTO {table_name} (i_total_time, "
-    sql_2 = "VALUES (%(i_total_time)s, "
-    for name, _ in COMBINED_DATA_TYPES:
-        if name == "current_time":
-            name = "current_laptime"
+    sql_2 = f"VALUES ({get_placeholder('i_total_time', dialect)}, "
+    column_names = [get_column_name(name) for name, _ in get_schema_data_types(columns)]
+    if store_raw_state:
+        column_names.append(RAW_STATE_COLUMN)
+    for name in column_names:
         sql_1 += f"{name}, "
-        sql_2 += f"%({name})s, "
+        sql_2 += f"{get_placeholder(name, dialect)}, "
     sql_1 = modify_sql_ending(sql_1)
     sql_2 = modify_sql_ending(sql_2)
     return " ".join([sql_1, sql_2])
@@ -53,9 +218,11 @@ def get_interval_max_sql(
     interval_column_name: str,
     table_name: str,
     column_name: List[str],
+    dialect: str = "postgres",
 ) -> str:
     sql = get_max_sql(table_name, column_name)
-    sql += f" WHERE completed_laps=%(lap)s AND {interval_column_name}"
+    sql += f" WHERE completed_laps={get_placeholder('lap', dialect)}"
+    sql += f" AND {interval_column_name}"
     sql += f" BETWEEN {interval[0]} AND {interval[1]}"
     return sql
 
@@ -70,9 +237,11 @@ def get_interval_min_sql(
     interval_column_name: str,
     table_name: str,
     column_name: List[str],
+    dialect: str = "postgres",
 ) -> str:
     sql = get_min_sql(table_name, column_name)
-    sql += f" WHERE completed_laps=%(lap)s AND {interval_column_name}"
+    sql += f" WHERE completed_laps={get_placeholder('lap', dialect)}"
+    sql += f" AND {interval_column_name}"
     sql += f" BETWEEN {interval[0]} AND {interval[1]}"
     return sql
 
@@ -87,13 +256,15 @@ def get_time_weighted_average_sql(
     interval_column_name: str,
     table_name: str,
     column_name: List[str],
+    dialect: str = "postgres",
 ):
     sql = (
         f"WITH SETUP AS ("
         "SELECT LAG(i_total_time) OVER (ORDER BY i_total_time) AS previous_timestamp, "
         f"LAG({column_name}) OVER (ORDER BY i_total_time) AS previous_reading, "
         f"{column_name}, i_total_time "
-        f"FROM {table_name} WHERE completed_laps=%(lap)s AND {interval_column_name} "
+        f"FROM {table_name} WHERE completed_laps={get_placeholder('lap', dialect)} "
+        f"AND {interval_column_name} "
         f"BETWEEN {interval[0]} AND {interval[1]}"
         "),"
         "nextstep AS ("
@@ -106,3 +277,22 @@ def get_time_weighted_average_sql(
         "time_weighted_average FROM nextstep"
     )
     return sql
+
+
+def get_interval_new_rows_sql(
+    interval: List[float],
+    interval_column_name: str,
+    table_name: str,
+    column_name: str,
+    dialect: str = "postgres",
+) -> str:
+    """
+    Selects readings in the interval that were inserted after a given row id, read
+        in id order using the primary key so only new rows are visited
+    """
+    sql = f"SELECT id, completed_laps, i_total_time, {column_name} FROM {table_name}"
+    sql += f" WHERE id > {get_placeholder('last_id', dialect)}"
+    sql += f" AND {interval_column_name}"
+    sql += f" BETWEEN {interval[0]} AND {interval[1]}"
+    sql += " ORDER BY id"
+    return sql
@@ -0,0 +1,99 @@
+from contextlib import closing
+from pathlib import Path
+import sqlite3
+import time
+from typing import Callable, Dict, List, Tuple
+
+from aci.metrics.database.base import DatabaseConnector
+from loguru import logger
+
+DEFAULT_SQLITE_COMMIT_EVERY_N = 60
+# Interval between checks of the database file for commits by other connections
+NOTIFICATION_POLL_INTERVAL = 5e-3
+
+
+class SQLiteConnector(DatabaseConnector):
+    """
+    Embedded file based backend that requires no database server. Writes go to a
+        write-ahead log so the evaluator can read while the logger is writing and
+        inserts are batched into transactions of commit_every_n rows. SQLite has
+        no LISTEN/NOTIFY so notifications are rows in a side table, committed
+        with the data they describe, that listeners pick up once the file changes
+    """
+
+    dialect = "sqlite"
+
+    def __init__(
+        self,
+        sqlite_config: Dict,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._path = Path(sqlite_config["path"])
+        self._notifications_table = f"{sqlite_config['table_name']}_notifications"
+        self._last_notification_id = 0
+        self._data_version = None
+        sqlite_config = dict(sqlite_config)
+        sqlite_config.setdefault("commit_every_n", DEFAULT_SQLITE_COMMIT_EVERY_N)
+        super().__init__(sqlite_config, sleep)
+
+    def _connect(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._session = sqlite3.connect(self._path, timeout=10.0)
+        self._session.execute("PRAGMA journal_mode=WAL")
+        self._session.execute("PRAGMA synchronous=NORMAL")
+        self._session.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._notifications_table} "
+            "(id INTEGER PRIMARY KEY, payload TEXT)"
+        )
+        self._session.commit()
+        logger.success(f"Connected to Database {self._path}")
+
+    def _send_notifications(self, notifications: List[str]):
+        self._session.executemany(
+            f"INSERT INTO {self._notifications_table} (payload) VALUES (?)",
+            [(payload,) for payload in notifications],
+        )
+
+    def listen(self):
+        """
+        Only notifications sent after listening are received
+        """
+        self._last_notification_id = self._get_last_notification_id()
+        self._data_version = self._get_data_version()
+
+    def wait_for_notifications(self, timeout: float) -> List[str]:
+        deadline = time.monotonic() + timeout
+        while True:
+            data_version = self._get_data_version()
+            if data_version != self._data_version:
+                self._data_version = data_version
+                payloads = self._read_notifications()
+                if len(payloads) > 0:
+                    return payloads
+            if time.monotonic() >= deadline:
+                return []
+            time.sleep(NOTIFICATION_POLL_INTERVAL)
+
+    def _get_data_version(self) -> int:
+        return self._session.execute("PRAGMA data_version").fetchone()[0]
+
+    def _get_last_notification_id(self) -> int:
+        sql = f"SELECT MAX(id) FROM {self._notifications_table}"
+        last_id = self._session.execute(sql).fetchone()[0]
+        return 0 if last_id is None else last_id
+
+    def _read_notifications(self) -> List[str]:
+        sql = f"SELECT id, payload FROM {self._notifications_table} "
+        sql += "WHERE id > ? ORDER BY id"
+        rows = self._session.execute(sql, (self._last_notification_id,)).fetchall()
+        if len(rows) > 0:
+            self._last_notification_id = rows[-1][0]
+        return [payload for _, payload in rows]
+
+    def run_queries(self, queries: List[Dict]) -> List[List[Tuple]]:
+        results = []
+        with closing(self._session.cursor()) as cursor:
+            for query in queries:
+                cursor.execute(query["query"], query["to_bind"])
+                results.append(cursor.fetchall())
+        return results
@@ -1,16 +1,30 @@
-from datetime import datetime
 from functools import partial
 import multiprocessing as mp
 import signal
-from typing import Dict
+from typing import Dict, List
 
-from aci.metrics.database.postgres import PostgresConnector
-from aci.metrics.database.sql import get_create_table_sql, get_insert_row_sql
-from aci.utils.load import state_bytes_to_dict
+from aci.metrics.database.base import DEFAULT_NOTIFY_ON
+from aci.metrics.database.sql import (
+    PARTITION_COLUMNS,
+    RAW_STATE_COLUMN,
+    get_column_name,
+    get_create_indexes_sql,
+    get_create_partition_sql,
+    get_create_table_sql,
+    get_insert_row_sql,
+    get_schema_data_types,
+)
+from aci.metrics.database.utils import get_database_connector, make_run_name
+from aci.utils.load import STRING_KEYS, state_bytes_to_dict
+from aci.utils.profiler import Sampling_Profiler
+from aci.utils.system_monitor import System_Monitor
+from acs.shared_memory.ac.combined import COMBINED_DATA_TYPES
 from loguru import logger
 import numpy as np
-import psycopg
 
+DEFAULT_INDEX_COLUMNS = ["normalised_car_position"]
+# Columns lap notifications, partitions and trackers rely on in every schema
+REQUIRED_COLUMNS = ["completed_laps"]
 NUMPY_TO_PYTHON_DTYPES = {
     np.int32: int,
     np.int64: int,
@@ -20,10 +34,10 @@ NUMPY_TO_PYTHON_DTYPES = {
 
 
 class DatabaseStateLogger(mp.Process):
-    def __init__(self, game_capture: mp.Process, postgres_config: Dict):
+    def __init__(self, game_capture: mp.Process, database_config: Dict):
         super().__init__()
         self._game_capture = game_capture
-        self._database_state_logger = DatabaseStateInterface(postgres_config)
+        self._database_config = database_config
         self.__setup_processes_shared_memory()
 
     def run(self):
@@ -31,9 +45,13 @@ class DatabaseStateLogger(mp.Process):
         Called on DatabaseStateLogger.start()
         """
         signal.signal(signal.SIGINT, signal.SIG_IGN)
+        self._database_state_logger = DatabaseStateInterface(self._database_config)
+        Sampling_Profiler.start("logger")
         while self.is_running:
             state = self._game_capture.state_bytes
             self._database_state_logger.log_state(state)
+        Sampling_Profiler.stop()
+        self._database_state_logger.close()
 
     @property
     def is_running(self) -> bool:
@@ -68,27 +86,141 @@ class DatabaseStateLogger(mp.Process):
         self._is_running = mp.Value("i", True)
 
 
-class DatabaseStateInterface(PostgresConnector):
-    def __init__(self, postgres_config: Dict):
-        super().__init__(postgres_config)
+class DatabaseStateInterface:
+    def __init__(self, database_config: Dict):
+        database_config = dict(database_config)
+        self.__setup_table_configuration(database_config)
+        self._database = get_database_connector(database_config)
         self._maybe_create_database_table()
-        self._insert_sql = get_insert_row_sql(self._table_name)
+        self._insert_sql = get_insert_row_sql(
+            self._table_name,
+            self._dialect,
+            self._columns,
+            self._store_raw_state,
+        )
         self._previous_timestamp = 0
         self._total_previous_lap_times = 0
 
+    @property
+    def _session(self):
+        return self._database._session
+
+    @property
+    def _dialect(self) -> str:
+        return self._database.dialect
+
+    def __setup_table_configuration(self, database_config: Dict):
+        if database_config.get("table_name") is None:
+            database_config["table_name"] = make_run_name()
+        self._table_name = database_config["table_name"]
+        self._partition_by = database_config.get("partition_by", None)
+        self._n_per_partition = database_config.get("n_per_partition", 1)
+        self._index_columns = database_config.get(
+            "index_columns", DEFAULT_INDEX_COLUMNS
+        )
+        self._partitioned_until = 0
+        self.__setup_schema_configuration(database_config)
+        self.__setup_notification_configuration(database_config)
+
+    def __setup_notification_configuration(self, database_config: Dict):
+        notify_on = database_config.get("notify_on", DEFAULT_NOTIFY_ON)
+        self._is_notifying_on_lap = "lap" in notify_on
+        if "sector" in notify_on:
+            self._notify_boundaries = database_config.get("notify_boundaries", {})
+        else:
+            self._notify_boundaries = {}
+        self._previous_lap = None
+        self._previous_interval_values = {}
+
+    def __setup_schema_configuration(self, database_config: Dict):
+        self._store_raw_state = database_config.get("store_raw_state", False)
+        if database_config.get("schema", "full") == "narrow":
+            columns = REQUIRED_COLUMNS + database_config.get("columns", [])
+            self._columns = list(dict.fromkeys(columns))
+            self._decode_state = self._decode_narrow_state
+        else:
+            self._columns = None
+            self._decode_state = self._decode_full_state
+        state_names = [name for name, _ in get_schema_data_types(self._columns)]
+        self._column_to_state_names = {
+            get_column_name(name): name for name in state_names
+        }
+        self._state_dtype = np.dtype(COMBINED_DATA_TYPES)
+
     def _maybe_create_database_table(self):
-        if self._table_name is None:
-            self._table_name = make_run_name()
-        init_table_in_database(session=self._session, table_name=self._table_name)
+        create_sql = get_create_table_sql(
+            self._table_name,
+            self._partition_by,
+            self._dialect,
+            self._columns,
+            self._store_raw_state,
+        )
+        index_sqls = get_create_indexes_sql(
+            self._table_name,
+            self._index_columns,
+            self._dialect,
+        )
+        self._database.create_table(create_sql, index_sqls)
 
-    def log_state(self, state: bytes):
-        state = state_bytes_to_dict(state)
-        self._format_dictionary(state)
+    def log_state(self, state_bytes: bytes):
+        state = self._decode_state(state_bytes)
+        if self._store_raw_state:
+            state[RAW_STATE_COLUMN] = state_bytes
         self._update_timestamps(state)
+        self._maybe_create_partition(state)
         self._add_cumulative_time(state)
+        is_notifying = self._maybe_notify(state)
         python_types_state = convert_numpy_types(state)
         logger.info(python_types_state)
-        self._insert_dict(python_types_state)
+        self._database.insert_row(self._insert_sql, python_types_state)
+        System_Monitor.increment("database_rows")
+        if is_notifying:
+            self._database.commit()
+
+    def _maybe_notify(self, state: Dict) -> bool:
+        """
+        Queues notifications for lap and sector boundaries crossed by this state,
+            the row is committed straight away so listeners are not kept waiting
+            for the rest of the batch
+
+        :return: True if a notification was queued, False otherwise
+        :rtype: bool
+        """
+        lap = int(state["completed_laps"])
+        is_notifying = False
+        if self._is_notifying_on_lap and lap != self._previous_lap:
+            self._database.notify(f"lap:{lap}")
+            is_notifying = True
+        self._previous_lap = lap
+        for column_name, boundaries in self._notify_boundaries.items():
+            value = state[column_name]
+            previous_value = self._previous_interval_values.get(column_name, value)
+            if is_boundary_crossed(previous_value, value, boundaries):
+                self._database.notify(f"sector:{lap}")
+                is_notifying = True
+            self._previous_interval_values[column_name] = value
+        return is_notifying
+
+    def _decode_full_state(self, state_bytes: bytes) -> Dict:
+        state = state_bytes_to_dict(state_bytes)
+        self._format_dictionary(state)
+        return state
+
+    def _decode_narrow_state(self, state_bytes: bytes) -> Dict:
+        """
+        Decodes only the fields stored as columns and those needed to timestamp rows
+        """
+        record = np.frombuffer(state_bytes, self._state_dtype)[0]
+        state = {
+            "i_current_time": record["i_current_time"],
+            "i_last_time": record["i_last_time"],
+        }
+        for column_name, state_name in self._column_to_state_names.items():
+            value = record[state_name]
+            if state_name in STRING_KEYS:
+                value = value.tobytes().decode("utf-8")
+            state[column_name] = value
+        return state
 
     def _format_dictionary(self, state: Dict):
         # Avoid using current_time, which is a protected phrase in SQL
@@ -103,35 +235,36 @@ class DatabaseStateInterface(PostgresConnector):
     def _add_cumulative_time(self, state: Dict):
         state["i_total_time"] = state["i_current_time"] + self._total_previous_lap_times
 
-    def _insert_dict(self, data: Dict):
-        with self._session.cursor() as cursor:
-            try:
-                cursor.execute(self._insert_sql, data)
-                self._session.commit()
-            except Exception as e:
-                logger.error(f"Error inserting data: {e}")
-                self._session.rollback()
-
-
-def make_run_name() -> str:
-    return "table" + datetime.now().strftime("%Y%m%d%H%M%S")
-
-
-def init_table_in_database(session: psycopg.Connection, table_name: str):
-    with session.cursor() as cursor:
-        try:
-            create_sql = get_create_table_sql(table_name)
-            cursor.execute(create_sql)
-            session.commit()
-            logger.success(f'Made table in database "{table_name}"')
-            return True
-        except psycopg.errors.DuplicateTable as e:
-            logger.warning(f"{e}, we'll just use the same table")
-        except Exception as e:
-            logger.error(f"Error creating table: {e}")
-            session.rollback()
-
-    return None
+    def _maybe_create_partition(self, state: Dict):
+        if self._partition_by is None:
+            return
+        partition_value = int(state[PARTITION_COLUMNS[self._partition_by]])
+        while partition_value >= self._partitioned_until:
+            if not self._create_partition():
+                return
+
+    def _create_partition(self) -> bool:
+        """
+        Creates the next partition, which is retried by the next row if it fails
+
+        :return: True if the partition was created, False otherwise
+        :rtype: bool
+        """
+        start = self._partitioned_until
+        end = start + self._n_per_partition
+        sql = get_create_partition_sql(self._table_name, self._partition_by, start, end)
+        if not self._database.execute([sql]):
+            return False
+        logger.info(f"Created partition of {self._table_name} [{start}, {end})")
+        self._partitioned_until = end
+        return True
+
+    def close(self):
+        self._database.close()
+
+
+def is_boundary_crossed(previous_value: float, value: float, boundaries: List) -> bool:
+    return any(previous_value < boundary <= value for boundary in boundaries)
 
 
 def convert_numpy_types(data):
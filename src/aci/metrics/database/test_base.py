@@ -0,0 +1,80 @@
+from typing import Dict, List, Tuple
+
+from aci.metrics.database.base import MAX_RECONNECT_DELAY, DatabaseConnector
+import pytest
+
+
+class Session:
+    def __init__(self):
+        self.is_closed = False
+
+    def close(self):
+        self.is_closed = True
+
+    def rollback(self):
+        pass
+
+
+class FlakyConnector(DatabaseConnector):
+    """
+    Connects once, then fails n_failures times before connecting again
+    """
+
+    dialect = "flaky"
+
+    def __init__(self, database_config: Dict, n_failures: int):
+        self.n_failures = n_failures
+        self.n_connects = 0
+        self.delays = []
+        super().__init__(database_config, self.delays.append)
+
+    def _connect(self):
+        self.n_connects += 1
+        if 1 < self.n_connects <= self.n_failures + 1:
+            raise ConnectionError("Connection refused")
+        self._session = Session()
+
+    def _is_connection_error(self, error: Exception) -> bool:
+        return isinstance(error, ConnectionError)
+
+    def _send_notifications(self, notifications: List[str]):
+        pass
+
+    def listen(self):
+        pass
+
+    def wait_for_notifications(self, timeout: float) -> List[str]:
+        return []
+
+    def run_queries(self, queries: List[Dict]) -> List[List[Tuple]]:
+        return []
+
+
+@pytest.mark.fast
+def test_reconnect_backs_off_until_connected():
+    connector = FlakyConnector({"table_name": "test_table"}, n_failures=3)
+    session = connector._session
+    connector.handle_error(ConnectionError("Connection lost"))
+    assert session.is_closed
+    assert connector.n_connects == 5
+    assert connector.delays == pytest.approx([0.1, 0.2, 0.4])
+    assert not connector._session.is_closed
+
+
+@pytest.mark.fast
+def test_reconnect_delay_is_capped():
+    connector = FlakyConnector({"table_name": "test_table"}, n_failures=9)
+    connector.reconnect()
+    assert connector.n_connects == 11
+    assert max(connector.delays) == MAX_RECONNECT_DELAY
+    assert connector.delays[-3:] == [MAX_RECONNECT_DELAY] * 3
+
+
+@pytest.mark.fast
+def test_reconnect_gives_up_after_max_attempts():
+    database_config = {"table_name": "test_table", "max_reconnect_attempts": 3}
+    connector = FlakyConnector(database_config, n_failures=5)
+    with pytest.raises(ConnectionError):
+        connector.reconnect()
+    assert connector.n_connects == 4
+    assert connector.delays == pytest.approx([0.1, 0.2, 0.4])
@@ -0,0 +1,114 @@
+import time
+
+from aci.metrics.database.monitor import Evaluator
+from aci.metrics.database.state_logger import DatabaseStateInterface
+from aci.metrics.database.utils import get_database_config, get_database_connector
+from acs.shared_memory.ac.combined import COMBINED_DATA_TYPES
+import numpy as np
+import pytest
+
+EVALUATION_CONFIG = {
+    "monitors": [
+        {
+            "name": "maximum_speed",
+            "type": "maximum_interval",
+            "column": "speed_kmh",
+            "interval_column": "normalised_car_position",
+            "intervals": {"sector_1": [0.0, 0.5], "sector_2": [0.5, 1.0]},
+        }
+    ]
+}
+NOTIFICATION_TIMEOUT = 1.0
+MIN_EVALUATION_INTERVAL = 0.2
+
+
+def make_state(lap: int, position: float, speed: float) -> bytes:
+    state = np.zeros(1, dtype=COMBINED_DATA_TYPES)
+    state["completed_laps"] = lap
+    state["normalised_car_position"] = position
+    state["i_current_time"] = int(position * 1000) + 1
+    state["speed_kmh"] = speed
+    return state.tobytes()
+
+
+@pytest.fixture
+def evaluation_config(request):
+    return {**EVALUATION_CONFIG, **getattr(request, "param", {})}
+
+
+@pytest.fixture
+def database_config(request, tmp_path, evaluation_config):
+    sqlite_config = {"path": tmp_path / "session.db", "table_name": "test_table"}
+    sqlite_config.update(getattr(request, "param", {}))
+    config = {"sqlite": sqlite_config, "evaluation": evaluation_config}
+    return get_database_config(config)
+
+
+@pytest.fixture
+def state_logger(database_config):
+    state_logger = DatabaseStateInterface(database_config)
+    yield state_logger
+    state_logger.close()
+
+
+@pytest.fixture
+def evaluator(evaluation_config, database_config):
+    evaluator = Evaluator(evaluation_config, database_config)
+    evaluator._database = get_database_connector(database_config)
+    evaluator._database.listen()
+    yield evaluator
+    evaluator._database.close()
+
+
+def receive_notifications(evaluator: Evaluator) -> list:
+    notifications = evaluator._database.wait_for_notifications(NOTIFICATION_TIMEOUT)
+    evaluator._on_notifications(notifications)
+    return notifications
+
+
+@pytest.mark.fast
+def test_sector_boundaries_are_notified(state_logger, evaluator):
+    state_logger.log_state(make_state(0, 0.0, 100.0))
+    assert receive_notifications(evaluator) == ["lap:0", "batch"]
+
+    state_logger.log_state(make_state(0, 0.4, 120.0))
+    state_logger.log_state(make_state(0, 0.6, 140.0))
+    assert receive_notifications(evaluator) == ["sector:0", "batch"]
+    assert evaluator.latest_results["maximum_speed-sector_2"]["value"] == 140.0
+
+
+@pytest.mark.fast
+def test_evaluator_advances_to_the_next_lap(state_logger, evaluator):
+    for position, speed in zip([0.0, 0.5, 0.9], [100.0, 150.0, 120.0]):
+        state_logger.log_state(make_state(0, position, speed))
+    receive_notifications(evaluator)
+    assert evaluator._current_lap == 0
+
+    state_logger.log_state(make_state(1, 0.0, 90.0))
+    assert "lap:1" in receive_notifications(evaluator)
+
+    assert evaluator._current_lap == 1
+    assert all(tracker.current_lap == 1 for tracker in evaluator._trackers.values())
+    result = evaluator.latest_results["maximum_speed-sector_1"]
+    assert result["lap"] == 1
+    assert result["value"] == 90.0
+
+
+@pytest.mark.fast
+@pytest.mark.parametrize("database_config", [{"commit_every_n": 1}], indirect=True)
+@pytest.mark.parametrize(
+    "evaluation_config", [{"min_interval": MIN_EVALUATION_INTERVAL}], indirect=True
+)
+def test_new_rows_are_evaluated_at_most_every_min_interval(state_logger, evaluator):
+    state_logger.log_state(make_state(0, 0.0, 100.0))
+    receive_notifications(evaluator)
+    result = evaluator.latest_results["maximum_speed-sector_1"]
+
+    state_logger.log_state(make_state(0, 0.1, 200.0))
+    assert receive_notifications(evaluator) == ["batch"]
+    assert evaluator.latest_results["maximum_speed-sector_1"] == result
+    assert evaluator._get_notification_timeout() <= MIN_EVALUATION_INTERVAL
+
+    time.sleep(MIN_EVALUATION_INTERVAL)
+    evaluator._maybe_evaluate_pending()
+    assert evaluator.latest_results["maximum_speed-sector_1"]["value"] == 200.0
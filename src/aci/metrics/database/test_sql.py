@@ -0,0 +1,58 @@
+from aci.metrics.database.sql import (
+    get_create_indexes_sql,
+    get_create_partition_sql,
+    get_create_table_sql,
+    get_insert_row_sql,
+)
+import pytest
+
+
+@pytest.mark.fast
+def test_unpartitioned_table_is_unlogged():
+    sql = get_create_table_sql("test_table")
+    assert sql.startswith("CREATE UNLOGGED TABLE test_table")
+    assert "id SERIAL PRIMARY KEY" in sql
+    assert "PARTITION BY" not in sql
+
+
+@pytest.mark.fast
+def test_lap_partitioned_table_includes_partition_key():
+    sql = get_create_table_sql("test_table", partition_by="lap")
+    assert "PRIMARY KEY (id, completed_laps)" in sql
+    assert sql.endswith("PARTITION BY RANGE (completed_laps)")
+
+
+@pytest.mark.fast
+def test_partition_covers_lap_range():
+    sql = get_create_partition_sql("test_table", "lap", 2, 4)
+    assert "test_table_lap_2_3 PARTITION OF test_table" in sql
+    assert sql.endswith("FOR VALUES FROM (2) TO (4)")
+
+
+@pytest.mark.fast
+def test_indexes_cover_tracker_filters_and_ordering():
+    sqls = get_create_indexes_sql("test_table", ["normalised_car_position"])
+    assert "(completed_laps, normalised_car_position)" in sqls[0]
+    assert "USING BRIN (i_total_time)" in sqls[-1]
+
+
+@pytest.mark.fast
+def test_narrow_schema_only_creates_listed_columns():
+    columns = ["completed_laps", "speed_kmh"]
+    sql = get_create_table_sql("test_table", columns=columns, store_raw_state=True)
+    assert "completed_laps int4" in sql
+    assert "speed_kmh float4" in sql
+    assert "raw_state bytea" in sql
+    assert "fuel" not in sql
+
+
+@pytest.mark.fast
+def test_narrow_insert_binds_listed_columns_in_dialect():
+    columns = ["completed_laps", "current_laptime"]
+    sql = get_insert_row_sql("test_table", "sqlite", columns)
+    assert sql.startswith("INSERT INTO test_table (i_total_time, ")
+    assert ":i_total_time, " in sql
+    for column in columns:
+        assert f"{column}" in sql
+        assert f":{column}" in sql
+    assert "fuel" not in sql
@@ -0,0 +1,106 @@
+import sqlite3
+
+from aci.metrics.database.sql import (
+    get_create_indexes_sql,
+    get_create_table_sql,
+    get_insert_row_sql,
+    get_interval_max_sql,
+    get_interval_new_rows_sql,
+)
+from aci.metrics.database.sqlite import SQLiteConnector
+import pytest
+
+TABLE_NAME = "test_table"
+COLUMNS = ["completed_laps", "normalised_car_position", "speed_kmh"]
+N_ROWS = 10
+
+
+@pytest.fixture
+def connector(tmp_path):
+    sqlite_config = {
+        "path": tmp_path / "session.db",
+        "table_name": TABLE_NAME,
+        "commit_every_n": N_ROWS,
+    }
+    connector = SQLiteConnector(sqlite_config)
+    create_sql = get_create_table_sql(TABLE_NAME, None, "sqlite", COLUMNS)
+    index_sqls = get_create_indexes_sql(
+        TABLE_NAME, ["normalised_car_position"], "sqlite"
+    )
+    connector.create_table(create_sql, index_sqls)
+    yield connector
+    connector.close()
+
+
+def make_row(i: int) -> dict:
+    return {
+        "i_total_time": i * 16,
+        "completed_laps": i // (N_ROWS // 2),
+        "normalised_car_position": (i % (N_ROWS // 2)) / (N_ROWS // 2),
+        "speed_kmh": float(i),
+    }
+
+
+def insert_rows(connector: SQLiteConnector, rows: list):
+    insert_sql = get_insert_row_sql(TABLE_NAME, "sqlite", COLUMNS)
+    for row in rows:
+        connector.insert_row(insert_sql, row)
+
+
+def count_rows(path) -> int:
+    with sqlite3.connect(path) as session:
+        return session.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()[0]
+
+
+@pytest.mark.fast
+def test_table_and_indexes_are_created(connector, tmp_path):
+    with sqlite3.connect(tmp_path / "session.db") as session:
+        rows = session.execute("SELECT type, name FROM sqlite_master").fetchall()
+    assert ("table", TABLE_NAME) in rows
+    assert ("index", f"{TABLE_NAME}_normalised_car_position_idx") in rows
+    assert ("index", f"{TABLE_NAME}_i_total_time_idx") in rows
+
+
+@pytest.mark.fast
+def test_existing_table_is_reused(connector, tmp_path):
+    insert_rows(connector, [make_row(i) for i in range(N_ROWS)])
+    create_sql = get_create_table_sql(TABLE_NAME, None, "sqlite", COLUMNS)
+    connector.create_table(create_sql, [])
+    assert count_rows(tmp_path / "session.db") == N_ROWS
+
+
+@pytest.mark.fast
+def test_rows_are_committed_in_batches(connector, tmp_path):
+    insert_rows(connector, [make_row(i) for i in range(N_ROWS - 1)])
+    assert count_rows(tmp_path / "session.db") == 0
+    insert_rows(connector, [make_row(N_ROWS - 1)])
+    assert count_rows(tmp_path / "session.db") == N_ROWS
+
+
+@pytest.mark.fast
+def test_interval_query_filters_lap_and_interval(connector):
+    insert_rows(connector, [make_row(i) for i in range(N_ROWS)])
+    sql = get_interval_max_sql(
+        [0.0, 0.5], "normalised_car_position", TABLE_NAME, "speed_kmh", "sqlite"
+    )
+    results = connector.run_queries(
+        [{"query": sql, "to_bind": {"lap": 0}}, {"query": sql, "to_bind": {"lap": 1}}]
+    )
+    # Positions of each lap are 0, 0.2, 0.4, 0.6 and 0.8
+    assert results == [[(2.0,)], [(7.0,)]]
+
+
+@pytest.mark.fast
+def test_new_rows_query_only_returns_rows_after_last_id(connector):
+    insert_rows(connector, [make_row(i) for i in range(N_ROWS)])
+    sql = get_interval_new_rows_sql(
+        [0.0, 1.0], "normalised_car_position", TABLE_NAME, "speed_kmh", "sqlite"
+    )
+    rows = connector.run_queries([{"query": sql, "to_bind": {"last_id": 7}}])[0]
+    assert rows == [(8, 1, 112, 7.0), (9, 1, 128, 8.0), (10, 1, 144, 9.0)]
+
+
+@pytest.mark.fast
+def test_execute_reports_whether_statements_were_committed(connector):
+    assert connector.execute(["CREATE TABLE other_table (id INTEGER)"]) is True
+    assert connector.execute(["CREATE TABLE other_table (id INTEGER)"]) is False
@@ -1,4 +1,5 @@
 import pathlib
+import sqlite3
 import tempfile
 import time
 
@@ -105,5 +106,48 @@ def test_a_query_works_with_database(filled_database_logger, binary_files):
     assert len(rows) == len(binary_files)
 
 
+@pytest.mark.fast
+def test_failed_partitions_are_retried(tmp_path, monkeypatch):
+    sqlite_config = {
+        "backend": "sqlite",
+        "path": tmp_path / "session.db",
+        "table_name": "test_table",
+    }
+    database_logger = DatabaseStateInterface(sqlite_config)
+    # SQLite tables cannot be partitioned, so partitions are created by a stub
+    database_logger._partition_by = "lap"
+    is_created = iter([False, True])
+    executed_sqls = []
+
+    def execute(sqls):
+        executed_sqls.extend(sqls)
+        return next(is_created)
+
+    monkeypatch.setattr(database_logger._database, "execute", execute)
+    database_logger._maybe_create_partition({"completed_laps": 0})
+    assert database_logger._partitioned_until == 0
+    database_logger._maybe_create_partition({"completed_laps": 0})
+    assert database_logger._partitioned_until == 1
+    assert executed_sqls[0] == executed_sqls[1]
+    database_logger.close()
+
+
+@pytest.mark.fast
+def test_narrow_schemas_always_store_completed_laps(tmp_path, binary_files):
+    sqlite_config = {
+        "backend": "sqlite",
+        "path": tmp_path / "session.db",
+        "table_name": "test_table",
+        "schema": "narrow",
+        "columns": ["speed_kmh"],
+    }
+    database_logger = DatabaseStateInterface(sqlite_config)
+    database_logger.log_state(binary_files[0])
+    database_logger.close()
+    with sqlite3.connect(tmp_path / "session.db") as session:
+        rows = session.execute("SELECT completed_laps, speed_kmh FROM test_table")
+        assert len(rows.fetchall()) == 1
+
+
 if __name__ == "__main__":
     pytest
@@ -1,11 +1,23 @@
 import abc
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from aci.metrics.database.sql import (
     get_interval_max_sql,
     get_interval_min_sql,
+    get_interval_new_rows_sql,
     get_time_weighted_average_sql,
 )
+from aci.metrics.sketches import (
+    DEFAULT_QUANTILES,
+    FixedBinHistogram,
+    get_percentile_name,
+    merge_histograms,
+)
+import numpy as np
+
+DEFAULT_N_BINS = 100
+# Upper bound of the interval time histogram in milliseconds
+DEFAULT_MAX_INTERVAL_TIME = 300000
 
 
 class Tracker(abc.ABC):
@@ -15,11 +27,15 @@ class Tracker(abc.ABC):
         interval_column_name: str,
         table_name: str,
         tracked_column_name: str,
+        dialect: str = "postgres",
+        options: Dict = None,
     ):
         self._interval = interval
         self._interval_column_name = interval_column_name
         self._table_name = table_name
         self._tracked_column_name = tracked_column_name
+        self._dialect = dialect
+        self._options = {} if options is None else options
         self.current_lap = 0
         self._setup()
 
@@ -41,14 +57,119 @@ class Tracker(abc.ABC):
         """
         pass
 
+    def update(self, rows: List[Tuple]):
+        """
+        Processes the rows returned by the tracker's SQL query, by default the rows
+            are the result
+
+        :rows: Rows returned by the query from get_sql_query
+        :type rows: List[Tuple]
+        :return: Current value of the metric
+        """
+        return rows
+
+    @property
+    def published_fields(self) -> List[str]:
+        """
+        Names of the values shared with the agent after each evaluation
+
+        :return: Field names in the order returned by get_published_values
+        :rtype: List[str]
+        """
+        return ["value"]
+
+    def get_published_values(self, result) -> List[float]:
+        """
+        Reduces a result returned by update to the values shared with the agent
+
+        :result: Value returned by update
+        :return: A value for each of published_fields, NaN if not yet known
+        :rtype: List[float]
+        """
+        if len(result) == 0 or result[0][0] is None:
+            return [np.nan]
+        return [float(result[0][0])]
+
+    @abc.abstractmethod
+    def evaluate_array(self, states: Dict[str, np.array]):
+        """
+        Implements evaluating the metric for a whole session without a database
+
+        :states: Column arrays of a session including i_total_time and completed_laps
+            such as a structured array of game states
+        :type states: Dict[str, np.array]
+        :return: Metric of the session, in the form returned by update
+        """
+        pass
+
+    def _get_interval_readings(
+        self,
+        states: Dict[str, np.array],
+    ) -> Tuple[np.array, np.array, np.array]:
+        interval_values = states[self._interval_column_name]
+        is_in_interval = interval_values >= self._interval[0]
+        is_in_interval &= interval_values <= self._interval[1]
+        laps = states["completed_laps"][is_in_interval]
+        timestamps = states["i_total_time"][is_in_interval]
+        readings = states[self._tracked_column_name][is_in_interval]
+        order = np.lexsort((timestamps, laps))
+        return laps[order], readings[order].astype(np.float64), timestamps[order]
+
+
+class LapTracker(Tracker):
+    """
+    Tracks a metric of each lap, re-queried over the interval of the current lap
+        and reduced per lap when evaluating a session without a database
+    """
+
+    @abc.abstractmethod
+    def _reduce_laps(
+        self,
+        readings: np.array,
+        timestamps: np.array,
+        lap_starts: np.array,
+    ) -> np.array:
+        """
+        Implements the metric over readings in the interval for each lap, matching
+            the result of the tracker's SQL query.
+
+        :readings: Tracked column values sorted by lap then time
+        :type readings: np.array
+        :timestamps: i_total_time of each reading
+        :type timestamps: np.array
+        :lap_starts: Index of the first reading of each lap
+        :type lap_starts: np.array
+        :return: Metric value for each lap
+        :rtype: np.array
+        """
+        pass
+
+    def evaluate_array(self, states: Dict[str, np.array]) -> Dict[int, float]:
+        """
+        Evaluates the metric for every lap of a session without a database
+
+        :states: Column arrays of a session including i_total_time and completed_laps
+            such as a structured array of game states
+        :type states: Dict[str, np.array]
+        :return: Metric value keyed by lap
+        :rtype: Dict[int, float]
+        """
+        laps, readings, timestamps = self._get_interval_readings(states)
+        if len(laps) == 0:
+            return {}
+        lap_numbers, lap_starts = np.unique(laps, return_index=True)
+        values = self._reduce_laps(readings, timestamps, lap_starts)
+        return dict(zip(lap_numbers.tolist(), values.tolist()))
+
 
-class IntervalMaxTracker(Tracker):
+class IntervalMaxTracker(LapTracker):
     def _setup(self):
         self._sql_query = get_interval_max_sql(
             self._interval,
             self._interval_column_name,
             self._table_name,
             self._tracked_column_name,
+            self._dialect,
         )
 
     def __repr__(self) -> str:
@@ -63,14 +184,23 @@ class IntervalMaxTracker(Tracker):
         }
         return query
 
+    def _reduce_laps(
+        self,
+        readings: np.array,
+        timestamps: np.array,
+        lap_starts: np.array,
+    ) -> np.array:
+        return np.maximum.reduceat(readings, lap_starts)
 
-class IntervalMinTracker(Tracker):
+
+class IntervalMinTracker(LapTracker):
     def _setup(self):
         self._sql_query = get_interval_min_sql(
             self._interval,
             self._interval_column_name,
             self._table_name,
             self._tracked_column_name,
+            self._dialect,
         )
 
     def __repr__(self) -> str:
@@ -85,14 +215,23 @@ class IntervalMinTracker(Tracker):
         }
         return query
 
+    def _reduce_laps(
+        self,
+        readings: np.array,
+        timestamps: np.array,
+        lap_starts: np.array,
+    ) -> np.array:
+        return np.minimum.reduceat(readings, lap_starts)
 
-class AverageIntervalTracker(Tracker):
+
+class AverageIntervalTracker(LapTracker):
     def _setup(self):
         self._sql_query = get_time_weighted_average_sql(
             self._interval,
             self._interval_column_name,
             self._table_name,
             self._tracked_column_name,
+            self._dialect,
         )
 
     def __repr__(self) -> str:
@@ -107,9 +246,332 @@ class AverageIntervalTracker(Tracker):
         }
         return query
 
+    def _reduce_laps(
+        self,
+        readings: np.array,
+        timestamps: np.array,
+        lap_starts: np.array,
+    ) -> np.array:
+        """
+        Trapezoidal integral of the readings over time divided by the time spanned
+        """
+        timestamps = timestamps.astype(np.float64)
+        weighted_sums = np.zeros_like(readings)
+        weighted_sums[1:] = (readings[1:] + readings[:-1]) / 2 * np.diff(timestamps)
+        weighted_sums[lap_starts] = 0.0
+        integrals = np.add.reduceat(weighted_sums, lap_starts)
+        durations = np.maximum.reduceat(timestamps, lap_starts)
+        durations -= np.minimum.reduceat(timestamps, lap_starts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            averages = integrals / durations
+        return np.where(durations > 0, averages, np.nan)
+
+
+class StreamingTracker(Tracker):
+    """
+    Summarises readings in the interval with mergeable sketches that are updated
+        incrementally. Each query only fetches rows inserted since the previous
+        query, so the cost of an update does not grow with the table and no query
+        sorts more than the new rows. Results cover every lap seen so far
+    """
+
+    def _setup(self):
+        self._last_id = 0
+        self._sql_query = get_interval_new_rows_sql(
+            self._interval,
+            self._interval_column_name,
+            self._table_name,
+            self._tracked_column_name,
+            self._dialect,
+        )
+        self._setup_sketches()
+
+    @abc.abstractmethod
+    def _setup_sketches(self):
+        """
+        Implements creation of the tracker's empty sketches
+        """
+        pass
+
+    @abc.abstractmethod
+    def _update_lap(self, lap: int, readings: np.array, timestamps: np.array):
+        """
+        Implements adding readings of a single lap, in time order, to the sketches
+
+        :lap: Lap the readings were taken on
+        :type lap: int
+        :readings: Tracked column values
+        :type readings: np.array
+        :timestamps: i_total_time of each reading
+        :type timestamps: np.array
+        """
+        pass
+
+    @abc.abstractmethod
+    def summarise(self) -> Dict:
+        """
+        Implements summarising the sketches
+
+        :return: Summary of each lap keyed by lap and of all laps keyed by "all"
+        :rtype: Dict
+        """
+        pass
+
+    def get_sql_query(self) -> Dict:
+        query = {
+            "query": self._sql_query,
+            "to_bind": {"last_id": self._last_id},
+        }
+        return query
+
+    def update(self, rows: List[Tuple]) -> Dict:
+        """
+        Adds readings inserted since the last query to the sketches
+
+        :rows: (id, completed_laps, i_total_time, reading) in id order
+        :type rows: List[Tuple]
+        :return: Summary of each lap and of all laps
+        :rtype: Dict
+        """
+        if len(rows) > 0:
+            self._last_id = rows[-1][0]
+            _, laps, timestamps, readings = zip(*rows)
+            readings = np.asarray(readings, dtype=np.float64)
+            self._update_laps(np.asarray(laps), readings, np.asarray(timestamps))
+        return self.summarise()
+
+    def evaluate_array(self, states: Dict[str, np.array]) -> Dict:
+        """
+        Adds every reading of a session to the sketches
+
+        :states: Column arrays of a session including i_total_time and completed_laps
+        :type states: Dict[str, np.array]
+        :return: Summary of each lap and of all laps
+        :rtype: Dict
+        """
+        laps, readings, timestamps = self._get_interval_readings(states)
+        self._update_laps(laps, readings, timestamps)
+        return self.summarise()
+
+    def _update_laps(self, laps: np.array, readings: np.array, timestamps: np.array):
+        for lap in np.unique(laps):
+            is_lap = laps == lap
+            self._update_lap(int(lap), readings[is_lap], timestamps[is_lap])
+
+    def get_published_values(self, result: Dict) -> List[float]:
+        summary = result.get("all", {})
+        return [float(summary.get(field, np.nan)) for field in self.published_fields]
+
+    def _make_histogram(self) -> FixedBinHistogram:
+        return FixedBinHistogram(
+            self._options["lower"],
+            self._options["upper"],
+            self._options.get("n_bins", DEFAULT_N_BINS),
+        )
+
+
+class HistogramIntervalTracker(StreamingTracker):
+    """
+    Histogram of the tracked column in the interval for each lap, summaries can
+        be saved and merged across runs with FixedBinHistogram.from_dict
+    """
+
+    def _setup_sketches(self):
+        self._histograms = {}
+
+    def __repr__(self) -> str:
+        string = "A tracker configured to get the distribution of "
+        string += f"{self._tracked_column_name} between {self._interval[0]} and "
+        string += f"{self._interval[1]} of {self._interval_column_name}"
+        return string
+
+    def _update_lap(self, lap: int, readings: np.array, timestamps: np.array):
+        if lap not in self._histograms:
+            self._histograms[lap] = self._make_histogram()
+        self._histograms[lap].update(readings)
+
+    @property
+    def published_fields(self) -> List[str]:
+        return ["count", "mean", "minimum", "maximum"]
+
+    def _summarise_histogram(self, histogram: FixedBinHistogram) -> Dict:
+        summary = histogram.to_dict()
+        summary.update({"count": histogram.count, "mean": histogram.mean})
+        return summary
+
+    def summarise(self) -> Dict:
+        summary = {
+            lap: self._summarise_histogram(histogram)
+            for lap, histogram in self._histograms.items()
+        }
+        if len(self._histograms) > 0:
+            histogram = merge_histograms(list(self._histograms.values()))
+            summary["all"] = self._summarise_histogram(histogram)
+        return summary
+
+
+class QuantileIntervalTracker(HistogramIntervalTracker):
+    """
+    Quantiles of the tracked column in the interval for each lap, estimated from
+        a histogram to within one bin width
+    """
+
+    def __repr__(self) -> str:
+        string = "A tracker configured to get the quantiles of "
+        string += f"{self._tracked_column_name} between {self._interval[0]} and "
+        string += f"{self._interval[1]} of {self._interval_column_name}"
+        return string
+
+    @property
+    def published_fields(self) -> List[str]:
+        quantiles = self._options.get("quantiles", DEFAULT_QUANTILES)
+        return [get_percentile_name(q) for q in quantiles] + ["count"]
+
+    def _summarise_histogram(self, histogram: FixedBinHistogram) -> Dict:
+        quantiles = self._options.get("quantiles", DEFAULT_QUANTILES)
+        return {**histogram.quantiles(quantiles), "count": histogram.count}
+
+
+class IntervalTimeQuantileTracker(StreamingTracker):
+    """
+    Quantiles across laps of the time spent in the interval, for lap times use
+        the interval [0, 1] of normalised_car_position. A lap's time is added
+        once readings from a later lap arrive. Times are in milliseconds
+    """
+
+    def _setup_sketches(self):
+        self._interval_times = {}
+        self._histogram = FixedBinHistogram(
+            self._options.get("lower", 0),
+            self._options.get("upper", DEFAULT_MAX_INTERVAL_TIME),
+            self._options.get("n_bins", DEFAULT_N_BINS),
+        )
+        self._n_completed_laps = 0
+
+    def __repr__(self) -> str:
+        string = "A tracker configured to get the quantiles of time spent between "
+        string += f"{self._interval[0]} and {self._interval[1]} of "
+        string += f"{self._interval_column_name}"
+        return string
+
+    @property
+    def published_fields(self) -> List[str]:
+        quantiles = self._options.get("quantiles", DEFAULT_QUANTILES)
+        return [get_percentile_name(q) for q in quantiles] + ["count", "last"]
+
+    def _update_lap(self, lap: int, readings: np.array, timestamps: np.array):
+        start, end = self._interval_times.get(lap, [np.inf, -np.inf])
+        start = min(start, timestamps.min())
+        end = max(end, timestamps.max())
+        self._interval_times[lap] = [start, end]
+        self._add_completed_laps()
+
+    def _add_completed_laps(self):
+        laps = sorted(self._interval_times.keys())
+        for lap in laps[self._n_completed_laps : -1]:
+            start, end = self._interval_times[lap]
+            self._histogram.update([end - start])
+        self._n_completed_laps = max(len(laps) - 1, self._n_completed_laps)
+
+    @property
+    def _last_interval_time(self) -> float:
+        laps = sorted(self._interval_times.keys())
+        if len(laps) < 2:
+            return np.nan
+        start, end = self._interval_times[laps[-2]]
+        return float(end - start)
+
+    def summarise(self) -> Dict:
+        summary = {
+            int(lap): float(end - start)
+            for lap, (start, end) in self._interval_times.items()
+        }
+        quantiles = self._options.get("quantiles", DEFAULT_QUANTILES)
+        summary["all"] = {
+            **self._histogram.quantiles(quantiles),
+            "count": self._histogram.count,
+            "last": self._last_interval_time,
+        }
+        return summary
+
 
 TRACKER_TYPES = {
     "maximum_interval": IntervalMaxTracker,
     "minimum_interval": IntervalMinTracker,
     "average_interval": AverageIntervalTracker,
+    "histogram_interval": HistogramIntervalTracker,
+    "quantile_interval": QuantileIntervalTracker,
+    "interval_time_quantile": IntervalTimeQuantileTracker,
 }
+
+
+def build_trackers(
+    evaluation_config: Dict,
+    table_name: str = None,
+    dialect: str = "postgres",
+) -> Dict[str, Tracker]:
+    """
+    Creates a tracker for every interval of every configured monitor
+
+    :evaluation_config: Evaluation configuration containing a list of monitors
+    :type evaluation_config: Dict
+    :table_name: Table queried by the trackers, None when only evaluating arrays
+    :type table_name: str
+    :dialect: SQL dialect of the tracker queries
+    :type dialect: str
+    :return: Trackers keyed by "{monitor name}-{interval name}"
+    :rtype: Dict[str, Tracker]
+    """
+    trackers = {}
+    for monitor_info in evaluation_config["monitors"]:
+        for interval_name, interval in monitor_info["intervals"].items():
+            tracker = TRACKER_TYPES[monitor_info["type"]](
+                interval,
+                monitor_info["interval_column"],
+                table_name,
+                monitor_info["column"],
+                dialect,
+                monitor_info.get("options"),
+            )
+            tracker_name = "-".join([monitor_info["name"], interval_name])
+            trackers[tracker_name] = tracker
+    return trackers
+
+
+def get_tracked_columns(evaluation_config: Dict) -> List[str]:
+    """
+    Lists every column read by the trackers configured for evaluation
+
+    :evaluation_config: Evaluation configuration containing a list of monitors
+    :type evaluation_config: Dict
+    :return: Names of the tracked and interval columns in order of appearance
+    :rtype: List[str]
+    """
+    columns = []
+    for monitor_info in evaluation_config["monitors"]:
+        columns.append(monitor_info["column"])
+        columns.append(monitor_info["interval_column"])
+    return list(dict.fromkeys(columns))
+
+
+def get_interval_columns(evaluation_config: Dict) -> List[str]:
+    columns = [info["interval_column"] for info in evaluation_config["monitors"]]
+    return list(dict.fromkeys(columns))
+
+
+def get_interval_boundaries(evaluation_config: Dict) -> Dict[str, List[float]]:
+    """
+    Collects the interval bounds of each interval column, crossing one of these
+        means a tracked interval such as a sector has been completed
+
+    :evaluation_config: Evaluation configuration containing a list of monitors
+    :type evaluation_config: Dict
+    :return: Sorted bounds keyed by interval column
+    :rtype: Dict[str, List[float]]
+    """
+    boundaries = {}
+    for monitor_info in evaluation_config["monitors"]:
+        column_boundaries = boundaries.setdefault(monitor_info["interval_column"], [])
+        for interval in monitor_info["intervals"].values():
+            column_boundaries.extend(interval)
+    return {column: sorted(set(bounds)) for column, bounds in boundaries.items()}
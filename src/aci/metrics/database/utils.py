@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Dict, Union
+
+from aci.metrics.database.base import DatabaseConnector
+from aci.metrics.database.postgres import PostgresConnector
+from aci.metrics.database.sqlite import SQLiteConnector
+from aci.metrics.database.trackers import (
+    get_interval_boundaries,
+    get_interval_columns,
+    get_tracked_columns,
+)
+
+DATABASE_BACKENDS = {
+    "postgres": PostgresConnector,
+    "sqlite": SQLiteConnector,
+}
+
+
+def get_database_config(config: Dict) -> Union[Dict, None]:
+    """
+    Finds the configuration of the storage backend in an interface configuration
+        and tags it with the name of the backend. If no table name is configured
+        one is generated here so all processes using the configuration agree on it.
+        With a narrow schema the stored columns are those read by the evaluation
+        trackers plus any listed under columns
+
+    :config: Interface configuration
+    :type config: Dict
+    :return: Backend configuration or None if no backend is configured
+    :rtype: Union[Dict, None]
+    """
+    for backend in DATABASE_BACKENDS:
+        if backend in config:
+            database_config = dict(config[backend])
+            database_config["backend"] = backend
+            if database_config.get("table_name") is None:
+                database_config["table_name"] = make_run_name()
+            add_evaluation_configuration(database_config, config.get("evaluation"))
+            return database_config
+    return None
+
+
+def add_evaluation_configuration(database_config: Dict, evaluation_config: Dict):
+    if evaluation_config is not None:
+        interval_columns = get_interval_columns(evaluation_config)
+        database_config.setdefault("index_columns", interval_columns)
+        interval_boundaries = get_interval_boundaries(evaluation_config)
+        database_config.setdefault("notify_boundaries", interval_boundaries)
+    if database_config.get("schema", "full") != "narrow":
+        return
+    columns = list(database_config.get("columns", []))
+    if evaluation_config is not None:
+        columns += get_tracked_columns(evaluation_config)
+    database_config["columns"] = list(dict.fromkeys(columns))
+
+
+def get_database_connector(database_config: Dict) -> DatabaseConnector:
+    """
+    Connects to the configured storage backend, call this from the process that
+        will use the connection rather than sharing one across processes
+    """
+    backend = database_config.get("backend", "postgres")
+    return DATABASE_BACKENDS[backend](database_config)
+
+
+def get_database_dialect(database_config: Dict) -> str:
+    backend = database_config.get("backend", "postgres")
+    return DATABASE_BACKENDS[backend].dialect
+
+
+def make_run_name() -> str:
+    return "table" + datetime.now().strftime("%Y%m%d%H%M%S")
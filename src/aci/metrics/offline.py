@@ -0,0 +1,134 @@
+import argparse
+from functools import partial
+import json
+import multiprocessing as mp
+from pathlib import Path
+from typing import Dict, List, Union
+
+from aci.metrics.database.trackers import build_trackers, get_tracked_columns
+from aci.utils.load import load_yaml
+from acs.shared_memory.ac.combined import COMBINED_DATA_TYPES
+from loguru import logger
+import numpy as np
+
+REQUIRED_COLUMNS = ["completed_laps", "i_current_time", "i_last_time"]
+
+
+def load_session_states(recording_path: Union[Path, str]) -> np.array:
+    """
+    Loads every game state of a recorded session as a structured array ordered by
+        their logical clock
+
+    :param recording_path: Folder of .bin game states saved by AssettoCorsaRecorder
+    :type recording_path: Union[Path, str]
+    :return: Game states as an array of COMBINED_DATA_TYPES records
+    :rtype: np.array
+    """
+    filepaths = sorted(Path(recording_path).glob("*.bin"), key=lambda x: int(x.stem))
+    data = b"".join([filepath.read_bytes() for filepath in filepaths])
+    return np.frombuffer(data, COMBINED_DATA_TYPES)
+
+
+def get_total_times(current_times: np.array, last_times: np.array) -> np.array:
+    """
+    Computes the cumulative session time of each state in the same way as
+        DatabaseStateInterface, adding the last lap time each time the lap
+        timer resets
+
+    :param current_times: i_current_time of each state in order
+    :type current_times: np.array
+    :param last_times: i_last_time of each state in order
+    :type last_times: np.array
+    :return: i_total_time of each state
+    :rtype: np.array
+    """
+    current_times = current_times.astype(np.int64)
+    is_new_lap = np.zeros(len(current_times), dtype=bool)
+    is_new_lap[1:] = current_times[1:] < current_times[:-1]
+    previous_lap_times = np.cumsum(np.where(is_new_lap, last_times, 0))
+    return current_times + previous_lap_times
+
+
+def get_session_columns(states: np.array, columns: List[str]) -> Dict[str, np.array]:
+    names = states.dtype.names
+    session = {column: states[column] for column in columns if column in names}
+    session["i_total_time"] = get_total_times(
+        states["i_current_time"],
+        states["i_last_time"],
+    )
+    return session
+
+
+def evaluate_session(
+    recording_path: Union[Path, str],
+    evaluation_config: Dict,
+) -> Dict[str, Dict[int, float]]:
+    """
+    Evaluates every configured tracker over a recorded session
+
+    :param recording_path: Folder of .bin game states saved by AssettoCorsaRecorder
+    :type recording_path: Union[Path, str]
+    :param evaluation_config: Evaluation configuration containing a list of monitors
+    :type evaluation_config: Dict
+    :return: Metric values by lap keyed by tracker name
+    :rtype: Dict[str, Dict[int, float]]
+    """
+    states = load_session_states(recording_path)
+    columns = REQUIRED_COLUMNS + get_tracked_columns(evaluation_config)
+    session = get_session_columns(states, list(dict.fromkeys(columns)))
+    trackers = build_trackers(evaluation_config)
+    return {name: tracker.evaluate_array(session) for name, tracker in trackers.items()}
+
+
+def evaluate_sessions(
+    recording_paths: List[Union[Path, str]],
+    evaluation_config: Dict,
+    n_workers: int = None,
+) -> Dict[str, Dict[str, Dict[int, float]]]:
+    """
+    Evaluates many recorded sessions in parallel, one session per worker process
+
+    :param recording_paths: Folders of recorded sessions
+    :type recording_paths: List[Union[Path, str]]
+    :param evaluation_config: Evaluation configuration containing a list of monitors
+    :type evaluation_config: Dict
+    :param n_workers: Number of worker processes, defaults to the number of cores
+    :type n_workers: int
+    :return: Results of evaluate_session keyed by recording path
+    :rtype: Dict[str, Dict[str, Dict[int, float]]]
+    """
+    evaluate = partial(evaluate_session, evaluation_config=evaluation_config)
+    with mp.Pool(n_workers) as pool:
+        results = pool.map(evaluate, recording_paths)
+    return {str(path): result for path, result in zip(recording_paths, results)}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Evaluate recorded sessions")
+    parser.add_argument("recordings", nargs="+", help="Recorded session folders")
+    parser.add_argument(
+        "--config",
+        type=str,
+        required=True,
+        help="Path to configuration with an evaluation section",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=str, help="Path to write results as json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    evaluation_config = load_yaml(args.config)["evaluation"]
+    results = evaluate_sessions(args.recordings, evaluation_config, args.workers)
+    for recording_path, trackers in results.items():
+        logger.info(f"{recording_path}:")
+        for tracker_name, laps in trackers.items():
+            logger.info(f"{tracker_name}: {laps}")
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import ctypes
+import multiprocessing as mp
+import time
+from typing import Dict, List
+
+import numpy as np
+
+
+class SharedResults:
+    """
+    Fixed layout shared memory holding the latest values of each tracker so they
+        can be read from other processes without a database connection. Each
+        tracker owns a slot with a sequence number that the single writer makes
+        odd while the slot is being written. Readers take no lock, instead they
+        retry if the sequence number changed while they copied the slot.
+        Create before starting the processes that share it
+    """
+
+    def __init__(self, slot_fields: Dict[str, List[str]]):
+        self._slot_fields = slot_fields
+        self._slot_indices = {name: i for i, name in enumerate(slot_fields)}
+        self.__setup_shared_memory()
+
+    def publish(self, name: str, lap: int, values: List[float]):
+        """
+        Writes the latest values of a tracker to its slot
+
+        :name: Name of the tracker's slot
+        :type name: str
+        :lap: Lap the values were evaluated on
+        :type lap: int
+        :values: A value for each of the slot's fields
+        :type values: List[float]
+        """
+        index = self._slot_indices[name]
+        self._sequences[index] += 1
+        self._laps[index] = lap
+        self._update_times[index] = time.time()
+        self._values[index, : len(values)] = values
+        self._sequences[index] += 1
+
+    def read(self, name: str) -> Dict:
+        """
+        Copies the latest values of a tracker without blocking the writer
+
+        :name: Name of the tracker's slot
+        :type name: str
+        :return: Number of times published, lap, time of the update and the value
+            of each field, values are NaN until first published
+        :rtype: Dict
+        """
+        index = self._slot_indices[name]
+        while True:
+            sequence = int(self._sequences[index])
+            if sequence % 2 == 1:
+                continue
+            lap = int(self._laps[index])
+            update_time = float(self._update_times[index])
+            values = self._values[index].tolist()
+            if sequence == self._sequences[index]:
+                break
+        result = {"sequence": sequence // 2, "lap": lap, "updated_at": update_time}
+        result.update(zip(self._slot_fields[name], values))
+        return result
+
+    def read_all(self) -> Dict[str, Dict]:
+        """
+        :return: Latest values of every tracker keyed by slot name
+        :rtype: Dict[str, Dict]
+        """
+        return {name: self.read(name) for name in self._slot_fields}
+
+    def __setup_shared_memory(self):
+        n_slots = max(len(self._slot_fields), 1)
+        n_values = max([len(fields) for fields in self._slot_fields.values()] + [1])
+        slot_dtype = np.dtype(
+            [
+                ("sequence", np.uint64),
+                ("lap", np.int64),
+                ("updated_at", np.float64),
+                ("values", np.float64, (n_values,)),
+            ]
+        )
+        mp_array = mp.RawArray(ctypes.c_uint8, n_slots * slot_dtype.itemsize)
+        slots = np.ndarray((n_slots,), dtype=slot_dtype, buffer=mp_array)
+        slots["values"] = np.nan
+        self._shared_slots = mp_array
+        self._sequences = slots["sequence"]
+        self._laps = slots["lap"]
+        self._update_times = slots["updated_at"]
+        self._values = slots["values"]
@@ -0,0 +1,199 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+DEFAULT_QUANTILES = [0.5, 0.95, 0.99]
+
+
+class FixedBinHistogram:
+    """
+    Histogram of n_bins evenly spaced bins over [lower, upper) with an extra bin
+        either side counting readings outside of that range. Histograms with the
+        same bins are merged by adding their counts, so a distribution can be
+        updated one batch of readings at a time and combined across laps and runs
+        without keeping or sorting the readings
+    """
+
+    def __init__(self, lower: float, upper: float, n_bins: int):
+        if not upper > lower or n_bins < 1:
+            raise ValueError(f"Invalid histogram bins {n_bins} in [{lower}, {upper})")
+        self._lower = float(lower)
+        self._upper = float(upper)
+        self._n_bins = int(n_bins)
+        self._bin_width = (self._upper - self._lower) / self._n_bins
+        self._counts = np.zeros(self._n_bins + 2, dtype=np.int64)
+        self._minimum = np.inf
+        self._maximum = -np.inf
+        self._sum = 0.0
+
+    @property
+    def count(self) -> int:
+        """
+        Number of readings added to the histogram
+
+        :return: Number of readings
+        :rtype: int
+        """
+        return int(self._counts.sum())
+
+    @property
+    def counts(self) -> np.array:
+        """
+        Readings in each bin, the first and last bins count readings below lower
+            and at or above upper
+
+        :return: Count of each of the n_bins + 2 bins
+        :rtype: np.array
+        """
+        return self._counts.copy()
+
+    @property
+    def edges(self) -> np.array:
+        """
+        :return: Edges of the n_bins bins between lower and upper
+        :rtype: np.array
+        """
+        return np.linspace(self._lower, self._upper, self._n_bins + 1)
+
+    @property
+    def mean(self) -> float:
+        count = self.count
+        return self._sum / count if count > 0 else np.nan
+
+    def update(self, readings: Iterable[float]):
+        """
+        Adds a batch of readings, non-finite readings are ignored
+
+        :readings: Values to add to the histogram
+        :type readings: Iterable[float]
+        """
+        readings = np.asarray(readings, dtype=np.float64).ravel()
+        readings = readings[np.isfinite(readings)]
+        if len(readings) == 0:
+            return
+        indices = np.floor((readings - self._lower) / self._bin_width) + 1
+        indices = np.clip(indices, 0, self._n_bins + 1).astype(np.int64)
+        self._counts += np.bincount(indices, minlength=self._n_bins + 2)
+        self._minimum = min(self._minimum, readings.min())
+        self._maximum = max(self._maximum, readings.max())
+        self._sum += readings.sum()
+
+    def is_mergeable(self, other: "FixedBinHistogram") -> bool:
+        return (
+            self._lower == other._lower
+            and self._upper == other._upper
+            and self._n_bins == other._n_bins
+        )
+
+    def merge(self, other: "FixedBinHistogram") -> "FixedBinHistogram":
+        """
+        Adds the readings of another histogram with the same bins to this one
+
+        :other: Histogram to merge into this one
+        :type other: FixedBinHistogram
+        :return: This histogram
+        :rtype: FixedBinHistogram
+        """
+        if not self.is_mergeable(other):
+            raise ValueError("Only histograms with the same bins can be merged")
+        self._counts += other._counts
+        self._minimum = min(self._minimum, other._minimum)
+        self._maximum = max(self._maximum, other._maximum)
+        self._sum += other._sum
+        return self
+
+    def copy(self) -> "FixedBinHistogram":
+        histogram = FixedBinHistogram(self._lower, self._upper, self._n_bins)
+        return histogram.merge(self)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile by interpolating linearly within the bin containing it,
+            the estimate is within one bin width of the exact value. Bins outside of
+            [lower, upper) are bounded by the smallest and largest reading
+
+        :q: Quantile to estimate in [0, 1]
+        :type q: float
+        :return: Estimated value of the quantile, NaN if the histogram is empty
+        :rtype: float
+        """
+        count = self.count
+        if count == 0:
+            return np.nan
+        target = q * count
+        if target <= 0:
+            return float(self._minimum)
+        cumulative_counts = np.cumsum(self._counts)
+        index = int(np.searchsorted(cumulative_counts, target, side="left"))
+        index = min(index, self._n_bins + 1)
+        below = cumulative_counts[index] - self._counts[index]
+        fraction = (target - below) / self._counts[index]
+        left, right = self._get_bin_bounds(index)
+        value = left + fraction * (right - left)
+        return float(np.clip(value, self._minimum, self._maximum))
+
+    def _get_bin_bounds(self, index: int) -> List[float]:
+        if index == 0:
+            return [self._minimum, self._lower]
+        if index == self._n_bins + 1:
+            return [self._upper, self._maximum]
+        left = self._lower + (index - 1) * self._bin_width
+        return [left, left + self._bin_width]
+
+    def quantiles(self, qs: List[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        """
+        :qs: Quantiles to estimate in [0, 1]
+        :type qs: List[float]
+        :return: Estimated values keyed by percentile such as "p99"
+        :rtype: Dict[str, float]
+        """
+        return {get_percentile_name(q): self.quantile(q) for q in qs}
+
+    def to_dict(self) -> Dict:
+        """
+        Serialises the histogram so it can be saved and merged with other runs
+
+        :return: Bins, counts and extrema of the histogram
+        :rtype: Dict
+        """
+        return {
+            "lower": self._lower,
+            "upper": self._upper,
+            "n_bins": self._n_bins,
+            "counts": self._counts.tolist(),
+            "minimum": float(self._minimum),
+            "maximum": float(self._maximum),
+            "sum": float(self._sum),
+        }
+
+    @classmethod
+    def from_dict(cls, histogram_dict: Dict) -> "FixedBinHistogram":
+        histogram = cls(
+            histogram_dict["lower"],
+            histogram_dict["upper"],
+            histogram_dict["n_bins"],
+        )
+        histogram._counts += np.asarray(histogram_dict["counts"], dtype=np.int64)
+        histogram._minimum = histogram_dict["minimum"]
+        histogram._maximum = histogram_dict["maximum"]
+        histogram._sum = histogram_dict["sum"]
+        return histogram
+
+
+def merge_histograms(histograms: List[FixedBinHistogram]) -> FixedBinHistogram:
+    """
+    Combines histograms with the same bins, such as those of each lap or run
+
+    :histograms: Histograms to combine, at least one
+    :type histograms: List[FixedBinHistogram]
+    :return: New histogram holding the readings of every histogram
+    :rtype: FixedBinHistogram
+    """
+    merged = histograms[0].copy()
+    for histogram in histograms[1:]:
+        merged.merge(histogram)
+    return merged
+
+
+def get_percentile_name(q: float) -> str:
+    return f"p{q * 100:g}"
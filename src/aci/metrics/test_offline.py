@@ -0,0 +1,78 @@
+from aci.metrics.database.state_logger import DatabaseStateInterface
+from aci.metrics.database.trackers import build_trackers
+from aci.metrics.offline import evaluate_session
+from acs.shared_memory.ac.combined import COMBINED_DATA_TYPES
+import numpy as np
+import pytest
+
+N_LAPS = 3
+N_STATES_PER_LAP = 50
+EVALUATION_CONFIG = {
+    "monitors": [
+        {
+            "name": f"{tracker_type}_speed",
+            "type": tracker_type,
+            "column": "speed_kmh",
+            "interval_column": "normalised_car_position",
+            "intervals": {"sector_1": [0.0, 0.5], "sector_2": [0.5, 1.0]},
+        }
+        for tracker_type in [
+            "maximum_interval",
+            "minimum_interval",
+            "average_interval",
+        ]
+    ]
+}
+
+
+def make_session_states() -> np.array:
+    states = np.zeros(N_LAPS * N_STATES_PER_LAP, dtype=COMBINED_DATA_TYPES)
+    random = np.random.default_rng(0)
+    for lap in range(N_LAPS):
+        lap_states = states[lap * N_STATES_PER_LAP : (lap + 1) * N_STATES_PER_LAP]
+        lap_states["completed_laps"] = lap
+        lap_states["normalised_car_position"] = np.linspace(0, 1, N_STATES_PER_LAP)
+        lap_states["i_current_time"] = np.arange(N_STATES_PER_LAP) * 16 + 1
+        lap_states["i_last_time"] = 0 if lap == 0 else N_STATES_PER_LAP * 16
+        lap_states["speed_kmh"] = random.uniform(50, 250, N_STATES_PER_LAP)
+    return states
+
+
+def save_recording(states: np.array, recording_path):
+    recording_path.mkdir()
+    for i, state in enumerate(states):
+        (recording_path / f"{i}.bin").write_bytes(state.tobytes())
+
+
+def evaluate_sqlite_session(states: np.array, tmp_path) -> dict:
+    database_config = {
+        "path": tmp_path / "session.db",
+        "table_name": "test_table",
+        "backend": "sqlite",
+    }
+    state_logger = DatabaseStateInterface(database_config)
+    for state in states:
+        state_logger.log_state(state.tobytes())
+    state_logger._database.commit()
+    trackers = build_trackers(EVALUATION_CONFIG, "test_table", "sqlite")
+    results = {name: {} for name in trackers}
+    for lap in range(N_LAPS):
+        for name, tracker in trackers.items():
+            tracker.current_lap = lap
+            rows = state_logger._database.run_queries([tracker.get_sql_query()])[0]
+            results[name][lap] = tracker.update(rows)[0][0]
+    state_logger.close()
+    return results
+
+
+@pytest.mark.fast
+def test_offline_evaluation_matches_sql_trackers(tmp_path):
+    states = make_session_states()
+    save_recording(states, tmp_path / "recording")
+
+    offline_results = evaluate_session(tmp_path / "recording", EVALUATION_CONFIG)
+    sql_results = evaluate_sqlite_session(states, tmp_path)
+
+    assert offline_results.keys() == sql_results.keys()
+    for name, laps in sql_results.items():
+        assert offline_results[name] == pytest.approx(laps), name
@@ -0,0 +1,25 @@
+import multiprocessing as mp
+
+from aci.metrics.shared_results import SharedResults
+import numpy as np
+import pytest
+
+
+def publish_results(shared_results: SharedResults):
+    shared_results.publish("time-sector_1", 3, [31.5])
+
+
+@pytest.mark.fast
+def test_results_published_by_another_process_are_read():
+    shared_results = SharedResults({"time-sector_1": ["value"], "speed-lap": ["p50"]})
+    assert shared_results.read("time-sector_1")["sequence"] == 0
+    assert np.isnan(shared_results.read("time-sector_1")["value"])
+    process = mp.get_context("fork").Process(
+        target=publish_results, args=(shared_results,)
+    )
+    process.start()
+    process.join()
+    result = shared_results.read_all()["time-sector_1"]
+    assert result["sequence"] == 1
+    assert result["lap"] == 3
+    assert result["value"] == 31.5
@@ -0,0 +1,38 @@
+from aci.metrics.sketches import FixedBinHistogram, merge_histograms
+import numpy as np
+import pytest
+
+
+@pytest.mark.fast
+def test_quantiles_are_within_a_bin_of_exact_values():
+    readings = np.random.default_rng(0).normal(150.0, 30.0, 10000)
+    histogram = FixedBinHistogram(0.0, 300.0, 300)
+    histogram.update(readings)
+    for q in [0.5, 0.95, 0.99]:
+        assert abs(histogram.quantile(q) - np.quantile(readings, q)) <= 1.0
+
+
+@pytest.mark.fast
+def test_merged_histograms_match_a_single_histogram():
+    readings = np.random.default_rng(0).uniform(-10.0, 110.0, 1000)
+    whole = FixedBinHistogram(0.0, 100.0, 50)
+    whole.update(readings)
+    parts = [FixedBinHistogram(0.0, 100.0, 50) for _ in range(4)]
+    for part, part_readings in zip(parts, np.array_split(readings, 4)):
+        part.update(part_readings)
+    merged = merge_histograms(parts)
+    assert np.array_equal(merged.counts, whole.counts)
+    assert merged.quantile(0.99) == whole.quantile(0.99)
+    assert merged.quantile(0.0) == readings.min()
+    assert merged.quantile(1.0) == readings.max()
+
+
+@pytest.mark.fast
+def test_histogram_round_trips_through_dict():
+    histogram = FixedBinHistogram(0.0, 1.0, 10)
+    histogram.update([0.05, 0.5, 0.55, np.nan, 2.0])
+    restored = FixedBinHistogram.from_dict(histogram.to_dict())
+    assert restored.count == 4
+    assert np.array_equal(restored.counts, histogram.counts)
+    with pytest.raises(ValueError):
+        restored.merge(FixedBinHistogram(0.0, 1.0, 20))
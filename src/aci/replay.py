@@ -0,0 +1,349 @@
+from pathlib import Path
+import queue
+import threading
+import time
+from typing import Dict, List, Union
+
+from aci.config.constants import CAPTURE_CONFIG_FILE
+from aci.game_capture.video.pyav_capture import IMAGE_FORMAT_CONVERSION
+from aci.interface import AssettoCorsaInterface
+from aci.metrics.offline import load_session_states
+from aci.utils.ins import SimulatedINS
+from aci.utils.load import load_image, load_yaml
+from aci.utils.profiler import Sampling_Profiler
+from aci.utils.state import identity, process_state, simulate_ins_readings
+from aci.utils.system_monitor import NS_PER_MS, System_Monitor
+from aci.utils.tracer import Pipeline_Tracer
+import cv2
+from loguru import logger
+import numpy as np
+
+DEFAULT_PREFETCH = 16
+# Logged human input compared with each action, in the order actions are given
+ACTION_COLUMNS = {
+    "steering": "steering_angle",
+    "brake": "brake",
+    "throttle": "throttle",
+}
+END_OF_RECORDING = None
+
+
+class RecordingObservationSource:
+    """
+    Reads the frames and game states of a session saved by AssettoCorsaRecorder
+        as observations in the same format as GameCapture. JPEGs are decoded
+        ahead of the agent on a background thread, so observations are
+        available as fast as the agent can consume them
+    """
+
+    def __init__(self, replay_config: Dict, capture_config: Dict):
+        self.__setup_configuration(replay_config, capture_config)
+        self.__setup_state_postprocessing()
+        self.__start_prefetch_thread()
+
+    def __setup_configuration(self, replay_config: Dict, capture_config: Dict):
+        self._path = Path(replay_config["path"])
+        self._states = load_session_states(self._path)
+        self._n_prefetch = replay_config.get("prefetch", DEFAULT_PREFETCH)
+        self._image_format = capture_config["images"]["image_format"]
+        self._use_state_dicts = capture_config["state"]["use_dicts"]
+        self._simulate_ins = capture_config["state"]["simulate_ins"]
+        self._ins_seed = capture_config["state"].get("ins_seed")
+        self._frame = -1
+
+    def __setup_state_postprocessing(self):
+        self._simulated_INS = SimulatedINS(seed=self._ins_seed)
+        if self._simulate_ins:
+            self._state_transform = simulate_ins_readings
+        elif self._use_state_dicts:
+            self._state_transform = process_state
+        else:
+            self._state_transform = identity
+
+    def __start_prefetch_thread(self):
+        self._images = queue.Queue(maxsize=self._n_prefetch)
+        self._is_running = True
+        self._prefetch_thread = threading.Thread(target=self._prefetch, daemon=True)
+        self._prefetch_thread.start()
+
+    @property
+    def n_observations(self) -> int:
+        """
+        :return: Number of observations in the recording
+        :rtype: int
+        """
+        return len(self._states)
+
+    @property
+    def frame(self) -> int:
+        """
+        :return: Index of the latest observation read, -1 before the first
+        :rtype: int
+        """
+        return self._frame
+
+    @property
+    def human_actions(self) -> np.array:
+        """
+        Inputs logged in each recorded game state, in the same order as actions
+
+        :return: Logged inputs in [n_observations x 3]
+        :rtype: np.array
+        """
+        columns = [self._states[column] for column in ACTION_COLUMNS.values()]
+        return np.stack(columns, axis=1).astype(np.float32)
+
+    def read(self) -> Union[Dict, None]:
+        """
+        Blocks until the next observation has been decoded
+
+        :return: {"state": .., "image": .., "is_image_stale": False} as returned by
+            GameCapture, None once the recording has ended
+        :rtype: Union[Dict, None]
+        """
+        image = self._images.get()
+        if image is END_OF_RECORDING:
+            return None
+        self._frame += 1
+        state = self._states[self._frame].tobytes()
+        with Pipeline_Tracer.span("state_transform"):
+            state = self._state_transform(state, self._simulated_INS)
+        return {"state": state, "image": image, "is_image_stale": False}
+
+    def stop(self):
+        self._is_running = False
+        # Unblocks the prefetch thread if it is waiting for space in the queue
+        while self._prefetch_thread.is_alive():
+            try:
+                self._images.get_nowait()
+            except queue.Empty:
+                pass
+            self._prefetch_thread.join(timeout=0.01)
+
+    def _prefetch(self):
+        for frame in range(self.n_observations):
+            if not self._is_running:
+                return
+            self._images.put(self._load_image(frame))
+        self._images.put(END_OF_RECORDING)
+
+    def _load_image(self, frame: int) -> np.array:
+        with Pipeline_Tracer.span("decode") as span:
+            span.frame = frame
+            image = load_image(self._path.joinpath(f"{frame}.jpeg"))
+            bgr0_image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+            System_Monitor.increment("capture_frames")
+        return IMAGE_FORMAT_CONVERSION[self._image_format](bgr0_image)
+
+
+class ActionRecorder:
+    """
+    Action sink that stores each action with the observation it was taken for and
+        the time taken to act from when the observation was delivered
+    """
+
+    def __init__(self, n_actions: int):
+        self._actions = np.zeros((n_actions, len(ACTION_COLUMNS)), dtype=np.float32)
+        self._frames = np.zeros(n_actions, dtype=np.int64)
+        self._times_ns = np.zeros(n_actions, dtype=np.int64)
+        self._latencies_ns = np.zeros(n_actions, dtype=np.int64)
+        self._n_actions = 0
+
+    @property
+    def n_actions(self) -> int:
+        return self._n_actions
+
+    @property
+    def actions(self) -> Dict[str, np.array]:
+        """
+        :return: "action" in [n_actions x 3], the "frame" each was taken for, the
+            "time_ns" it was submitted and "latency_ns" from its observation
+        :rtype: Dict[str, np.array]
+        """
+        n_actions = self._n_actions
+        return {
+            "action": self._actions[:n_actions],
+            "frame": self._frames[:n_actions],
+            "time_ns": self._times_ns[:n_actions],
+            "latency_ns": self._latencies_ns[:n_actions],
+        }
+
+    def submit_action(self, action: np.array, frame: int, observation_time_ns: int):
+        """
+        Stores an action taken for the observation of frame
+
+        :action: An action as a np.array of [steering, brake, throttle]
+        :type action: np.array
+        :frame: Index of the observation the action was taken for
+        :type frame: int
+        :observation_time_ns: Time the observation was delivered, from
+            time.perf_counter_ns
+        :type observation_time_ns: int
+        """
+        i = self._n_actions
+        time_ns = time.perf_counter_ns()
+        self._actions[i] = action
+        self._frames[i] = frame
+        self._times_ns[i] = time_ns
+        self._latencies_ns[i] = time_ns - observation_time_ns
+        self._n_actions += 1
+
+
+class AssettoCorsaReplay(AssettoCorsaInterface):
+    """
+    Runs an agent against a recorded session rather than AC. Observations are
+        read from the recording at path, with no launcher, capture process or
+        gamepad, as fast as the agent consumes them. Actions are stored with
+        their timing and once the recording ends they are compared with the
+        inputs logged while it was recorded, see `replay_results`
+    """
+
+    def _initialise_AC(self):
+        self._replay_config = self._config["replay"]
+        self._capture_config = load_yaml(CAPTURE_CONFIG_FILE)
+        for name in ["images", "state"]:
+            self._capture_config[name].update(
+                self._config.get("capture", {}).get(name, {})
+            )
+
+    def _initialise_capture(self):
+        self._observation_source = RecordingObservationSource(
+            self._replay_config, self._capture_config
+        )
+        self._action_recorder = ActionRecorder(self._observation_source.n_observations)
+        self._observation_time_ns = 0
+        self._replay_results = {}
+
+    def _initialise_evaluation(self):
+        self._database_logger = None
+        self._evaluator = None
+
+    def _setup_control_scheduler(self):
+        self._control_scheduler = None
+
+    def run(self):
+        logger.info(f"Replaying {self._observation_source.n_observations} captures")
+        Sampling_Profiler.start("agent")
+        start_time = time.perf_counter()
+        while self.is_running:
+            try:
+                observation = self.get_observation()
+                if observation is None:
+                    break
+                if self._is_termination_condition_met(observation):
+                    self.is_running = False
+                with Pipeline_Tracer.span("behaviour"):
+                    action = self.behaviour(observation)
+                self.act(action)
+            except KeyboardInterrupt:
+                self.is_running = False
+            except Exception as e:
+                self._log_exception(e)
+                self.is_running = False
+        elapsed_time = time.perf_counter() - start_time
+        Sampling_Profiler.stop()
+        self._observation_source.stop()
+        self._summarise_replay(elapsed_time)
+        self.teardown()
+
+    def get_observation(self) -> Union[Dict, None]:
+        """
+        Get the next captured game state of the recording
+
+        :return: {Dictionary image: BGR image as np.array, state: Dict{str: float}},
+            None once the recording has ended
+        :rtype: Union[Dict[str: np.array, Dict], None]
+        """
+        observation = self._observation_source.read()
+        self._observation_time_ns = time.perf_counter_ns()
+        return observation
+
+    def act(self, action: np.array):
+        """
+        Stores an action rather than submitting it to the simulator. Actions are
+            in the same format as AssettoCorsaInterface.act
+
+        :action: An array in the format [steering angle, brake, throttle]
+        :type: np.array
+        """
+        self._action_recorder.submit_action(
+            action, self._observation_source.frame, self._observation_time_ns
+        )
+        System_Monitor.increment("actions")
+
+    @property
+    def recorded_actions(self) -> Dict[str, np.array]:
+        """
+        :return: Actions taken so far, see ActionRecorder.actions
+        :rtype: Dict[str, np.array]
+        """
+        return self._action_recorder.actions
+
+    @property
+    def replay_results(self) -> Dict:
+        """
+        Available once run has returned
+
+        :return: "observations_per_second", "latency_p50_ms", "latency_p99_ms"
+            from observation to action and "errors" of each action against the
+            logged input, see compare_actions
+        :rtype: Dict
+        """
+        return self._replay_results
+
+    def _summarise_replay(self, elapsed_time: float):
+        actions = self._action_recorder.actions
+        n_actions = len(actions["frame"])
+        if n_actions == 0:
+            logger.warning("No actions were taken during the replay")
+            return
+        human_actions = self._observation_source.human_actions[actions["frame"]]
+        latencies = actions["latency_ns"] / NS_PER_MS
+        self._replay_results = {
+            "observations_per_second": n_actions / elapsed_time,
+            "latency_p50_ms": float(np.percentile(latencies, 50)),
+            "latency_p99_ms": float(np.percentile(latencies, 99)),
+            "errors": compare_actions(actions["action"], human_actions),
+        }
+        self._log_replay_results(n_actions, elapsed_time)
+
+    def _log_replay_results(self, n_actions: int, elapsed_time: float):
+        results = self._replay_results
+        message = f"Replayed {n_actions} captures in {elapsed_time:.2f}s "
+        message += f"{results['observations_per_second']:.1f}/s, action latency "
+        message += f"p50 {results['latency_p50_ms']:.2f} ms "
+        message += f"p99 {results['latency_p99_ms']:.2f} ms"
+        logger.info(message)
+        for name, errors in results["errors"].items():
+            message = f"{name} against {ACTION_COLUMNS[name]}: "
+            message += ", ".join(f"{key} {value:.4f}" for key, value in errors.items())
+            logger.info(message)
+
+
+def compare_actions(
+    actions: np.array,
+    human_actions: np.array,
+    names: List[str] = list(ACTION_COLUMNS),
+) -> Dict[str, Dict[str, float]]:
+    """
+    Compares actions with the inputs logged for the same observations
+
+    :actions: Agent actions in [n x 3]
+    :type actions: np.array
+    :human_actions: Logged inputs in [n x 3]
+    :type human_actions: np.array
+    :names: Name of each action
+    :type names: List[str]
+    :return: "mean_absolute_error", "root_mean_squared_error" and
+        "max_absolute_error" keyed by action name
+    :rtype: Dict[str, Dict[str, float]]
+    """
+    errors = np.abs(np.asarray(actions, dtype=np.float64) - human_actions)
+    return {
+        name: {
+            "mean_absolute_error": float(np.mean(errors[:, i])),
+            "root_mean_squared_error": float(np.sqrt(np.mean(errors[:, i] ** 2))),
+            "max_absolute_error": float(np.max(errors[:, i])),
+        }
+        for i, name in enumerate(names)
+    }
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Dict
+
+from aci.async_interface import AsyncAssettoCorsaInterface
+import numpy as np
+import pytest
+
+N_STEPS = 10
+
+
+class AwaitingAgent(AsyncAssettoCorsaInterface):
+    """
+    Awaits in behaviour for a fixed number of steps, then never returns if
+        is_hanging, as an agent waiting on an unresponsive server would
+    """
+
+    def __init__(self, config: Dict, is_hanging: bool = False):
+        self.frames = []
+        self.is_hanging = is_hanging
+        super().__init__(config)
+
+    async def behaviour(self, observation: Dict) -> np.array:
+        self.frames.append(self._observation_frame)
+        await asyncio.sleep(0)
+        if self.is_hanging and len(self.frames) >= N_STEPS:
+            await asyncio.Event().wait()
+        return np.zeros(3)
+
+    def teardown(self):
+        pass
+
+    def termination_condition(self, observation: Dict) -> bool:
+        return len(self.frames) >= N_STEPS - 1
+
+
+def get_config() -> Dict:
+    return {
+        "capture": {
+            "is_stand_in": True,
+            "images": {
+                "resolution": [64, 48],
+                "image_format": "BGR",
+                "source": {"type": "synthetic", "framerate": 200},
+            },
+            "state": {"stand_in": {"source": "synthetic", "rate": 200}},
+        },
+        "input_interface": "null",
+        "termination": {"check_every_n": 0, "max_consecutive_failures": 1},
+    }
+
+
+@pytest.mark.fast
+def test_agents_step_until_terminated():
+    agent = AwaitingAgent(get_config())
+    agent.run()
+    assert len(agent.frames) == N_STEPS
+    # States arrive between images, so a capture can repeat the latest image
+    assert np.all(np.diff(agent.frames) >= 0)
+    assert agent.frames[-1] > agent.frames[0]
+    assert agent._capture_event is None
+
+
+async def run_until_cancelled(agent: AwaitingAgent):
+    task = asyncio.create_task(agent._run_agent())
+    while len(agent.frames) < N_STEPS:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.fast
+def test_cancelled_agents_stop_watching_captures():
+    agent = AwaitingAgent(get_config(), is_hanging=True)
+    agent._start()
+    try:
+        asyncio.run(run_until_cancelled(agent))
+    finally:
+        agent._shutdown()
+        agent._capture_notifier.close()
+    assert len(agent.frames) == N_STEPS
+    assert agent._capture_event is None
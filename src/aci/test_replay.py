@@ -0,0 +1,60 @@
+from typing import Dict
+
+from aci.game_capture.state.stand_in import SyntheticStateSource
+from aci.replay import AssettoCorsaReplay, compare_actions
+import cv2
+import numpy as np
+import pytest
+
+N_CAPTURES = 20
+
+
+class HumanAgent(AssettoCorsaReplay):
+    """
+    Repeats the inputs logged in each state
+    """
+
+    def behaviour(self, observation: Dict) -> np.array:
+        state = observation["state"]
+        return np.array([state["steering_angle"], state["brake"], state["throttle"]])
+
+    def teardown(self):
+        pass
+
+    def termination_condition(self, observation: Dict) -> bool:
+        return False
+
+
+def record_session(path):
+    source = SyntheticStateSource({})
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    for i in range(N_CAPTURES):
+        path.joinpath(f"{i}.bin").write_bytes(source.get_state(i))
+        cv2.imwrite(str(path.joinpath(f"{i}.jpeg")), image)
+
+
+@pytest.mark.fast
+def test_replayed_human_inputs_match_the_recording(tmp_path):
+    record_session(tmp_path)
+    config = {
+        "replay": {"path": tmp_path, "prefetch": 4},
+        "capture": {"images": {"image_format": "RGB"}, "state": {"use_dicts": True}},
+    }
+    agent = HumanAgent(config)
+    agent.run()
+    actions = agent.recorded_actions
+    assert np.array_equal(actions["frame"], np.arange(N_CAPTURES))
+    assert np.all(actions["latency_ns"] > 0)
+    results = agent.replay_results
+    for errors in results["errors"].values():
+        assert errors["max_absolute_error"] == pytest.approx(0.0)
+
+
+@pytest.mark.fast
+def test_action_errors_are_per_action():
+    actions = np.array([[0.5, 0.0, 1.0], [0.5, 0.0, 1.0]])
+    human_actions = np.array([[0.0, 0.0, 1.0], [1.0, 0.0, 0.0]])
+    errors = compare_actions(actions, human_actions)
+    assert errors["steering"]["mean_absolute_error"] == pytest.approx(0.5)
+    assert errors["brake"]["max_absolute_error"] == 0.0
+    assert errors["throttle"]["root_mean_squared_error"] == pytest.approx(0.5**0.5)
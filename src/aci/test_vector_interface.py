@@ -0,0 +1,81 @@
+from typing import Dict
+
+from aci.vector_interface import (
+    UNSUPPORTED_INSTANCE_OPTIONS,
+    VectorAssettoCorsaInterface,
+)
+import numpy as np
+import pytest
+
+N_INSTANCES = 2
+N_STEPS = 10
+RESOLUTION = [64, 48]
+
+
+class SteeringAgent(VectorAssettoCorsaInterface):
+    """
+    Steers instance i by i / N for a fixed number of steps
+    """
+
+    def __init__(self, configs):
+        self.n_steps = 0
+        self.image_shapes = []
+        self.speeds = []
+        super().__init__(configs)
+
+    def behaviour(self, observations: Dict) -> np.array:
+        self.n_steps += 1
+        self.image_shapes.append(observations["images"].shape)
+        self.speeds.append(observations["states"]["speed_kmh"].copy())
+        actions = np.zeros((self.n_instances, 3))
+        actions[:, 0] = np.arange(self.n_instances) / self.n_instances
+        return actions
+
+    def teardown(self):
+        pass
+
+    def termination_condition(self, observations: Dict) -> bool:
+        return self.n_steps >= N_STEPS - 1
+
+
+def get_instance_config() -> Dict:
+    return {
+        "capture": {
+            "is_stand_in": True,
+            "images": {
+                "resolution": RESOLUTION,
+                "image_format": "BGR",
+                "source": {"type": "synthetic", "framerate": 200},
+            },
+            "state": {"stand_in": {"source": "synthetic", "rate": 200}},
+        },
+        "input_interface": "null",
+    }
+
+
+@pytest.mark.fast
+def test_observations_of_all_instances_are_batched():
+    configs = [get_instance_config() for _ in range(N_INSTANCES)]
+    agent = SteeringAgent(configs)
+    agent.run()
+    assert agent.n_steps == N_STEPS
+    width, height = RESOLUTION
+    assert set(agent.image_shapes) == {(N_INSTANCES, height, width, 3)}
+    assert all(speeds.shape == (N_INSTANCES,) for speeds in agent.speeds)
+
+
+@pytest.mark.fast
+def test_states_must_be_bytes():
+    config = get_instance_config()
+    config["capture"]["state"]["use_dicts"] = True
+    with pytest.raises(ValueError):
+        SteeringAgent([config])
+
+
+@pytest.mark.fast
+@pytest.mark.parametrize("option", UNSUPPORTED_INSTANCE_OPTIONS)
+def test_unsupported_instance_options_are_rejected(option):
+    config = get_instance_config()
+    config[option] = {}
+    with pytest.raises(ValueError):
+        SteeringAgent([config])
@@ -1,6 +1,6 @@
 import math
 import time
-from typing import Dict
+from typing import Dict, Union
 
 from aci.utils.ins.models.imu import IMU as SimulatedIMU
 import numpy as np
@@ -8,12 +8,35 @@ from scipy import constants
 
 
 class SimulatedINS:
-    def __init__(self):
+    """
+    Adds simulated INS readings to an observation as observation["INS"]. Readings
+        are computed in place in arrays allocated once, when preallocated the
+        same dictionary and arrays are added to every observation, so each
+        reading is only valid until the next call, otherwise a copy is added.
+        Sensor noise is drawn from a generator seeded with seed, or from seed
+        itself if it is a np.random.Generator
+    """
+
+    def __init__(
+        self,
+        preallocated: bool = False,
+        seed: Union[int, np.random.Generator] = None,
+    ):
         self._imu = SimulatedIMU(accuracy="low-accuracy", axis=6, gps=True, odo=True)
+        self._is_preallocated = preallocated
+        self._random = np.random.default_rng(seed)
         self._current_time = time.time()
         self._previous_time = time.time()
         self._previous_accelerometer_bias_drift = np.zeros(3)
         self._previous_gyroscope_bias_drift = np.zeros(3)
+        self._noise = np.zeros(3)
+        self._velocity_xyz = np.zeros(3)
+        self._readings = {
+            "accelerometer_xyz": np.zeros(3),
+            "gyroscope_ypr": np.zeros(3),
+            "gps": {"position_xyz": np.zeros(3), "velocity_xyz": np.zeros(3)},
+            "odometer_velocity": 0.0,
+        }
 
     def __call__(self, observation: Dict):
         self._current_time = time.time()
@@ -21,90 +44,58 @@ class SimulatedINS:
         self._previous_time = self._current_time
 
     def _add_simulated_INS_readings(self, observation: Dict):
-        observation["INS"] = {}
         self._add_accelerometer_reading(observation)
         self._add_gyroscope_reading(observation)
         self._add_gps_reading(observation)
         self._add_odometer_reading(observation)
+        if self._is_preallocated:
+            observation["INS"] = self._readings
+        else:
+            observation["INS"] = self._copy_readings()
+
+    def _copy_readings(self) -> Dict:
+        gps = self._readings["gps"]
+        return {
+            "accelerometer_xyz": self._readings["accelerometer_xyz"].copy(),
+            "gyroscope_ypr": self._readings["gyroscope_ypr"].copy(),
+            "gps": {
+                "position_xyz": gps["position_xyz"].copy(),
+                "velocity_xyz": gps["velocity_xyz"].copy(),
+            },
+            "odometer_velocity": self._readings["odometer_velocity"],
+        }
 
     def _add_accelerometer_reading(self, observation: Dict):
-        acceleration_xyz = np.array(
-            [
-                observation["acceleration_g_X"],
-                observation["acceleration_g_Y"],
-                observation["acceleration_g_Z"],
-            ]
-        )
+        acceleration_xyz = self._readings["accelerometer_xyz"]
+        acceleration_xyz[0] = observation["acceleration_g_X"]
+        acceleration_xyz[1] = observation["acceleration_g_Y"]
+        acceleration_xyz[2] = observation["acceleration_g_Z"]
         acceleration_xyz *= constants.g
-        bias = self._accelerometer_bias
-        bias_drift = self._accelerometer_bias_drift
-        noise = self._accelerometer_white_noise
-        vibration_noise = self._accelerometer_vibration_noise
-        acceleration_xyz += bias + bias_drift + noise + vibration_noise
-        observation["INS"]["accelerometer_xyz"] = acceleration_xyz
-
-    @property
-    def _accelerometer_bias(self) -> np.array:
-        return self._imu.accel_err["b"]
-
-    @property
-    def _accelerometer_bias_drift(self) -> np.array:
-        accelerometer_error = self._imu.accel_err
+        acceleration_xyz += self._imu.accel_err["b"]
         drift = self._previous_accelerometer_bias_drift
-        drift = self._calculate_bias_drift(accelerometer_error, drift)
-        self._previous_accelerometer_bias_drift = drift
-        return drift
-
-    @property
-    def _accelerometer_white_noise(self) -> np.array:
-        return np.random.randn(3) * self._imu.accel_err["vrw"] / math.sqrt(self._dt)
-
-    @property
-    def _accelerometer_vibration_noise(self) -> np.array:
-        # TODO: Implement this
-        return np.zeros(3)
+        self._update_bias_drift(self._imu.accel_err, drift)
+        acceleration_xyz += drift
+        noise_scale = self._imu.accel_err["vrw"] / math.sqrt(self._dt)
+        acceleration_xyz += self._get_noise(noise_scale)
+        # TODO: Add vibration noise
 
     def _add_gyroscope_reading(self, observation: Dict):
-        rotation_ypr = np.array(
-            [
-                observation["heading"],
-                observation["pitch"],
-                observation["roll"],
-            ]
-        )
-        bias = self._gyroscope_bias
-        bias_drift = self._gyroscope_bias_drift
-        noise = self._gyroscope_white_noise
-        vibration_noise = self._gyroscope_vibration_noise
-        rotation_ypr += bias + bias_drift + noise + vibration_noise
-        observation["INS"]["gyroscope_ypr"] = rotation_ypr
-
-    @property
-    def _gyroscope_bias(self) -> np.array:
-        return self._imu.gyro_err["b"]
-
-    @property
-    def _gyroscope_bias_drift(self) -> np.array:
-        gyroscope_error = self._imu.gyro_err
+        rotation_ypr = self._readings["gyroscope_ypr"]
+        rotation_ypr[0] = observation["heading"]
+        rotation_ypr[1] = observation["pitch"]
+        rotation_ypr[2] = observation["roll"]
+        rotation_ypr += self._imu.gyro_err["b"]
         drift = self._previous_gyroscope_bias_drift
-        drift = self._calculate_bias_drift(gyroscope_error, drift)
-        self._previous_gyroscope_bias_drift = drift
-        return drift
-
-    @property
-    def _gyroscope_white_noise(self) -> np.array:
-        return np.random.randn(3) * self._imu.gyro_err["arw"] / math.sqrt(self._dt)
-
-    @property
-    def _gyroscope_vibration_noise(self) -> np.array:
-        # TODO: Implement this
-        return np.zeros(3)
-
-    def _calculate_bias_drift(
-        self,
-        sensor_error: Dict,
-        previous_drift: np.array,
-    ) -> np.array:
+        self._update_bias_drift(self._imu.gyro_err, drift)
+        rotation_ypr += drift
+        noise_scale = self._imu.gyro_err["arw"] / math.sqrt(self._dt)
+        rotation_ypr += self._get_noise(noise_scale)
+        # TODO: Add vibration noise
+
+    def _update_bias_drift(self, sensor_error: Dict, previous_drift: np.array):
+        """
+        Steps the bias drift of a sensor in place
+        """
         sample_rate = self._sampling_rate
         correlation = sensor_error["b_corr"]
         drift = sensor_error["b_drift"]
@@ -114,49 +105,44 @@ class SimulatedINS:
         # https://github.com/Aceinna/gnss-ins-sim and
         # https://www.ncbi.nlm.nih.gov/pmc/articles/PMC3812568/ (Eq. 3).
         b = drift * np.sqrt(1.0 - np.exp(-2 / (sample_rate * correlation)))
-        return a * previous_drift + b * np.random.randn(3)
+        previous_drift *= a
+        previous_drift += self._get_noise(b)
+
+    def _get_noise(self, scale: np.array) -> np.array:
+        """
+        :return: Normally distributed noise of scale, valid until the next call
+        :rtype: np.array
+        """
+        self._random.standard_normal(out=self._noise)
+        self._noise *= scale
+        return self._noise
 
     def _add_gps_reading(self, observation: Dict):
-        observation["INS"]["gps"] = {}
-        velocity_xyz = self._add_velocity_noise(observation)
-        position_xyz = self._add_position_noise(observation)
-        observation["INS"]["gps"]["position_xyz"] = position_xyz
-        observation["INS"]["gps"]["velocity_xyz"] = velocity_xyz
-
-    def _add_velocity_noise(self, observation: Dict) -> np.array:
-        velocity_xyz = np.array(
-            [
-                observation["velocity_x"],
-                observation["velocity_y"],
-                observation["velocity_z"],
-            ]
-        )
-        velocity_noise = np.random.randn(3) * self._imu.gps_err["stdv"]
-        return velocity_xyz + velocity_noise
-
-    def _add_position_noise(self, observation: Dict) -> np.array:
-        position_xyz = np.array(
-            [
-                observation["ego_location_x"],
-                observation["ego_location_y"],
-                observation["ego_location_z"],
-            ]
-        )
-        position_noise = np.random.randn(3) * self._imu.gps_err["stdp"]
-        return position_xyz + position_noise
+        gps = self._readings["gps"]
+        self._add_velocity_noise(observation, gps["velocity_xyz"])
+        self._add_position_noise(observation, gps["position_xyz"])
+
+    def _add_velocity_noise(self, observation: Dict, velocity_xyz: np.array):
+        velocity_xyz[0] = observation["velocity_x"]
+        velocity_xyz[1] = observation["velocity_y"]
+        velocity_xyz[2] = observation["velocity_z"]
+        velocity_xyz += self._get_noise(self._imu.gps_err["stdv"])
+
+    def _add_position_noise(self, observation: Dict, position_xyz: np.array):
+        position_xyz[0] = observation["ego_location_x"]
+        position_xyz[1] = observation["ego_location_y"]
+        position_xyz[2] = observation["ego_location_z"]
+        position_xyz += self._get_noise(self._imu.gps_err["stdp"])
 
     def _add_odometer_reading(self, observation: Dict):
-        velocity_xyz = np.array(
-            [
-                observation["velocity_x"],
-                observation["velocity_y"],
-                observation["velocity_z"],
-            ]
-        )
+        velocity_xyz = self._velocity_xyz
+        velocity_xyz[0] = observation["velocity_x"]
+        velocity_xyz[1] = observation["velocity_y"]
+        velocity_xyz[2] = observation["velocity_z"]
         odometer_error = self._imu.odo_err
         velocity = odometer_error["scale"] * np.linalg.norm(velocity_xyz)
-        velocity_noise = np.random.randn() * odometer_error["stdv"]
-        observation["INS"]["odometer_velocity"] = velocity + velocity_noise
+        velocity_noise = self._random.standard_normal() * odometer_error["stdv"]
+        self._readings["odometer_velocity"] = velocity + velocity_noise
 
     @property
     def _dt(self) -> float:
@@ -0,0 +1,49 @@
+from aci.utils.ins import SimulatedINS
+import numpy as np
+import pytest
+
+OBSERVATION_KEYS = [
+    "acceleration_g_X",
+    "acceleration_g_Y",
+    "acceleration_g_Z",
+    "heading",
+    "pitch",
+    "roll",
+    "velocity_x",
+    "velocity_y",
+    "velocity_z",
+    "ego_location_x",
+    "ego_location_y",
+    "ego_location_z",
+]
+
+
+def get_readings(ins: SimulatedINS) -> np.array:
+    observation = {key: 1.0 for key in OBSERVATION_KEYS}
+    # Fix the time between readings, which scales the noise
+    ins._previous_time, ins._current_time = 0.0, 1.0 / 60
+    ins._add_simulated_INS_readings(observation)
+    readings = observation["INS"]
+    return np.concatenate(
+        [
+            readings["accelerometer_xyz"],
+            readings["gyroscope_ypr"],
+            readings["gps"]["position_xyz"],
+            readings["gps"]["velocity_xyz"],
+            [readings["odometer_velocity"]],
+        ]
+    )
+
+
+@pytest.mark.fast
+@pytest.mark.parametrize("preallocated", [False, True])
+def test_seeded_readings_are_reproducible(preallocated):
+    readings = get_readings(SimulatedINS(preallocated, seed=0))
+    assert np.array_equal(readings, get_readings(SimulatedINS(preallocated, seed=0)))
+    assert not np.array_equal(readings, get_readings(SimulatedINS(seed=1)))
+
+
+@pytest.mark.fast
+def test_generators_are_used_as_given():
+    readings = get_readings(SimulatedINS(seed=np.random.default_rng(0)))
+    assert np.array_equal(readings, get_readings(SimulatedINS(seed=0)))
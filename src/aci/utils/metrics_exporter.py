@@ -0,0 +1,219 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import multiprocessing as mp
+import os
+from pathlib import Path
+import re
+import threading
+from typing import Dict, List
+
+from aci.utils.metrics_registry import DEFAULT_QUANTILES
+from aci.utils.resources import read_process_usage
+from aci.utils.system_monitor import System_Monitor, SystemMonitor
+from loguru import logger
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+METRIC_PREFIX = "aci_"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9464
+# Seconds between writes of the file sink
+DEFAULT_INTERVAL = 5.0
+NS_PER_S = 1e9
+METRIC_DESCRIPTIONS = {
+    "capture_frames": "Unique frames decoded by the image stream",
+    "dropped_frames": "Decoded frames replaced before the agent received them",
+    "frame_age": "Time from decoding a frame to the agent receiving it",
+    "database_rows": "Game states inserted into the database",
+    "actions": "Actions submitted by the agent",
+    "capture_to_action": "Time from decoding a frame to acting on it",
+    "stale_frames": "Frames decoded after the one an action was decided on",
+    "replaced_actions": "Actions replaced by a newer one before being submitted",
+    "control_ticks": "Actions applied by the fixed rate control scheduler",
+    "control_deadline_misses": "Control scheduler ticks skipped for starting late",
+    "vector_steps": "Batches of actions submitted to all instances by a vector agent",
+    "control_tick_lateness": "Time control scheduler ticks started after schedule",
+    "gamepad_events": "Axis and button events emitted to the virtual gamepad",
+    "gamepad_submit": "Time to emit an action or buttons to the virtual gamepad",
+}
+
+
+class MetricsExporter:
+    """
+    Exposes the counters, gauges and histograms of a SystemMonitor, with the CPU
+        time and memory of each process that recorded them, as OpenMetrics text
+        for Prometheus to scrape. Served over HTTP or periodically written to a file
+        from a background thread, so nothing is rendered until it is requested
+    """
+
+    def __init__(
+        self,
+        exporter_config: Dict,
+        system_monitor: SystemMonitor = System_Monitor,
+    ):
+        self._system_monitor = system_monitor
+        self._processes = {}
+        self._stop_event = threading.Event()
+        self._server = None
+        self._thread = None
+        self.__setup_configuration(exporter_config)
+
+    def __setup_configuration(self, exporter_config: Dict):
+        self._path = exporter_config.get("path")
+        self._interval = exporter_config.get("interval", DEFAULT_INTERVAL)
+        self._host = exporter_config.get("host", DEFAULT_HOST)
+        self._port = exporter_config.get("port", DEFAULT_PORT)
+
+    @property
+    def address(self) -> str:
+        """
+        :return: URL metrics are served on or the path of the file they are written to
+        :rtype: str
+        """
+        if self._path is not None:
+            return str(self._path)
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def add_process(self, pid: int, name: str):
+        """
+        Also report the resources used by a process that records no metrics
+
+        :pid: Process identifier
+        :type pid: int
+        :name: Name to label the process's metrics with
+        :type name: str
+        """
+        self._processes[pid] = name
+
+    def render(self) -> str:
+        """
+        :return: Current metrics in the OpenMetrics text format
+        :rtype: str
+        """
+        processes = {os.getpid(): mp.current_process().name}
+        processes.update(self._system_monitor.processes())
+        processes.update(self._processes)
+        lines = get_metric_lines(self._system_monitor.snapshot())
+        lines.extend(get_process_lines(processes))
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def start(self):
+        """
+        Starts serving or writing metrics from a daemon thread
+        """
+        if self._path is not None:
+            target = self._run_file_sink
+        else:
+            self._server = HTTPServer((self._host, self._port), get_handler(self))
+            target = self._server.serve_forever
+        self._thread = threading.Thread(target=target, name="MetricsExporter")
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info(f"Exporting metrics to {self.address}")
+
+    def _run_file_sink(self):
+        while not self._stop_event.wait(self._interval):
+            self._write_file()
+        self._write_file()
+
+    def _write_file(self):
+        """
+        Replaces the file in one step so readers never see a partial write
+        """
+        path = Path(self._path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(path.name + ".tmp")
+        temporary_path.write_text(self.render())
+        os.replace(temporary_path, path)
+
+    def stop(self):
+        """
+        Stops the background thread, the file sink writes once more before stopping
+        """
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def get_handler(exporter: MetricsExporter) -> type:
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = exporter.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args):
+            pass
+
+    return MetricsHandler
+
+
+def get_metric_name(name: str) -> str:
+    return METRIC_PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def get_metric_header(name: str, metric_type: str, description: str) -> List[str]:
+    return [f"# TYPE {name} {metric_type}", f"# HELP {name} {description}"]
+
+
+def get_metric_lines(snapshot: Dict) -> List[str]:
+    """
+    Counters and gauges keep their type and histograms, whose readings are in
+        nanoseconds, become summaries in seconds with a quantile label
+    """
+    lines = []
+    for name, value in snapshot["counters"].items():
+        metric_name = get_metric_name(name)
+        description = METRIC_DESCRIPTIONS.get(name, name)
+        lines.extend(get_metric_header(metric_name, "counter", description))
+        lines.append(f"{metric_name}_total {value}")
+    for name, value in snapshot["gauges"].items():
+        metric_name = get_metric_name(name)
+        description = METRIC_DESCRIPTIONS.get(name, name)
+        lines.extend(get_metric_header(metric_name, "gauge", description))
+        lines.append(f"{metric_name} {value}")
+    for name, summary in snapshot["histograms"].items():
+        metric_name = get_metric_name(name) + "_seconds"
+        description = METRIC_DESCRIPTIONS.get(name, f"Runtime of {name}")
+        lines.extend(get_metric_header(metric_name, "summary", description))
+        count = summary["count"]
+        if count > 0:
+            for q in DEFAULT_QUANTILES:
+                value = summary[f"p{q * 100:g}"] / NS_PER_S
+                lines.append(f'{metric_name}{{quantile="{q:g}"}} {value}')
+        total = summary.get("mean", 0.0) * count / NS_PER_S
+        lines.append(f"{metric_name}_sum {total}")
+        lines.append(f"{metric_name}_count {count}")
+    return lines
+
+
+def get_process_lines(processes: Dict[int, str]) -> List[str]:
+    """
+    Per process CPU time, resident memory and thread counts labelled by process
+        name and pid, processes that have exited are left out
+    """
+    metrics = [
+        ("cpu_seconds", "counter", "User and system CPU time", "_total"),
+        ("resident_memory_bytes", "gauge", "Resident memory", ""),
+        ("threads", "gauge", "Number of threads", ""),
+    ]
+    usages = {pid: read_process_usage(pid) for pid in processes}
+    lines = []
+    for key, metric_type, description, suffix in metrics:
+        metric_name = get_metric_name(f"process_{key}")
+        lines.extend(get_metric_header(metric_name, metric_type, description))
+        for pid, usage in usages.items():
+            if usage is not None:
+                labels = f'process="{escape_label(processes[pid])}",pid="{pid}"'
+                lines.append(f"{metric_name}{suffix}{{{labels}}} {usage[key]}")
+    return lines
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
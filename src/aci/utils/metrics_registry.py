@@ -0,0 +1,446 @@
+import ctypes
+from dataclasses import dataclass
+import multiprocessing as mp
+import os
+import threading
+import time
+from typing import Dict, List, Tuple, Union
+
+from loguru import logger
+import numpy as np
+
+# One slab is claimed by each thread of each process that records values
+MAX_SLABS = 32
+MAX_METRICS = 64
+MAX_NAME_LENGTH = 128
+# Histograms are HDR style, readings below 2^SIGNIFICANT_BITS have a bucket each
+#   and each doubling above is split into 2^(SIGNIFICANT_BITS - 1) buckets, so a
+#   bucket's width is at most 1/2^(SIGNIFICANT_BITS - 1) of its value
+SIGNIFICANT_BITS = 6
+SUB_BUCKET_HALF_COUNT = 2 ** (SIGNIFICANT_BITS - 1)
+# Largest reading resolved, 2^40ns is around 18 minutes
+MAX_VALUE_BITS = 40
+N_BUCKETS = (MAX_VALUE_BITS - SIGNIFICANT_BITS + 2) * SUB_BUCKET_HALF_COUNT
+# Layout of a histogram's slot in a slab
+COUNT, SUM, MAXIMUM = 0, 1, 2
+N_SUMMARY_VALUES = 3
+SLOT_SIZE = N_SUMMARY_VALUES + N_BUCKETS
+COUNTER, HISTOGRAM, GAUGE = 1, 2, 3
+DEFAULT_QUANTILES = [0.5, 0.99, 0.999]
+
+
+@dataclass
+class MetricsSample:
+    """
+    Copy of the registry at a point in time, with a row for each claimed slab
+        and the name of the process and (pid, thread id) that claimed it
+    """
+
+    time: float
+    names: List[str]
+    kinds: List[int]
+    processes: List[str]
+    slab_owners: List[Tuple[int, int]]
+    counters: np.array
+    histograms: np.array
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms stored in shared memory so that values recorded in any
+        process can be read and aggregated from every other process. Each thread
+        claims its own slab the first time it records a value, so recording only
+        writes to memory owned by the recording thread and takes no lock, and
+        concurrent updates from threads of the same process are never lost.
+        Locks are only taken to register a new metric name or claim a slab.
+        Create the registry before forking the processes that share it.
+        Histograms count non-negative integer readings such as durations in
+        nanoseconds
+    """
+
+    def __init__(self):
+        self.__setup_shared_memory()
+        self._reset_process_state()
+        os.register_at_fork(after_in_child=self._reset_process_state)
+
+    def _reset_process_state(self):
+        # Slab and metric offsets of each thread, threads start without either
+        self._thread_state = threading.local()
+
+    def increment(self, name: str, value: float = 1.0):
+        """
+        Adds to a counter
+
+        :name: Name of the counter
+        :type name: str
+        :value: Amount to add to the counter
+        :type value: float
+        """
+        try:
+            offset = self._thread_state.metric_offsets[name]
+        except (AttributeError, KeyError):
+            offset = self._register_metric(name, COUNTER)
+            if offset is None:
+                return
+        self._counters[offset] += value
+
+    def set(self, name: str, value: float):
+        """
+        Sets a gauge, gauges of the same name set by several processes are summed
+
+        :name: Name of the gauge
+        :type name: str
+        :value: Current value of the gauge
+        :type value: float
+        """
+        try:
+            offset = self._thread_state.metric_offsets[name]
+        except (AttributeError, KeyError):
+            offset = self._register_metric(name, GAUGE)
+            if offset is None:
+                return
+        self._counters[offset] = value
+
+    def record(self, name: str, value: int):
+        """
+        Adds a reading to a histogram
+
+        :name: Name of the histogram
+        :type name: str
+        :value: Non-negative integer reading such as a duration in nanoseconds
+        :type value: int
+        """
+        value = int(value)
+        try:
+            offset = self._thread_state.metric_offsets[name]
+        except (AttributeError, KeyError):
+            offset = self._register_metric(name, HISTOGRAM)
+            if offset is None:
+                return
+        histograms = self._histograms
+        histograms[offset] += 1
+        histograms[offset + SUM] += value
+        if value > histograms[offset + MAXIMUM]:
+            histograms[offset + MAXIMUM] = value
+        # Inlined get_bucket_index, as this is called on every tracked function call
+        shift = value.bit_length() - SIGNIFICANT_BITS
+        if shift > 0:
+            value = shift * SUB_BUCKET_HALF_COUNT + (value >> shift)
+            if value >= N_BUCKETS:
+                value = N_BUCKETS - 1
+        elif value < 0:
+            value = 0
+        histograms[offset + N_SUMMARY_VALUES + value] += 1
+
+    def _register_metric(self, name: str, kind: int) -> Union[int, None]:
+        """
+        Finds or adds a metric, returning the offset of its slot in this thread's
+            slab. Counters and gauges are offset into self._counters, histograms
+            into self._histograms
+        """
+        thread_state = self._thread_state
+        if getattr(thread_state, "slab", None) is None:
+            thread_state.slab = self._claim_slab()
+            thread_state.metric_offsets = {}
+            if thread_state.slab is None:
+                return None
+        with self._lock:
+            names = self._read_names()
+            if name in names:
+                index = names.index(name)
+            elif len(names) < MAX_METRICS:
+                index = len(names)
+                self._names[index].value = name.encode()[:MAX_NAME_LENGTH]
+                self._kinds[index] = kind
+                self._n_metrics.value = index + 1
+            else:
+                logger.warning(f"Metrics registry is full, not recording {name}")
+                return None
+        if self._kinds[index] != HISTOGRAM:
+            offset = thread_state.slab * MAX_METRICS + index
+        else:
+            offset = (thread_state.slab * MAX_METRICS + index) * SLOT_SIZE
+        thread_state.metric_offsets[name] = offset
+        return offset
+
+    def _claim_slab(self) -> Union[int, None]:
+        """
+        Claims an unused slab for the calling thread, or once every slab has been
+            used the slab of a thread or process that has exited. Exited threads
+            keep their slab for as long as possible so that totals only go down
+            when a slab must be reused
+
+        :return: Index of the claimed slab, None if every slab is in use
+        :rtype: Union[int, None]
+        """
+        with self._lock:
+            slab = self._find_free_slab()
+            if slab is None:
+                message = "No metrics slab available for thread "
+                message += f"{threading.current_thread().name} of {os.getpid()}"
+                logger.warning(message)
+                return None
+            self._counters_array[slab] = 0.0
+            self._histograms_array[slab] = 0
+            self._slab_pids[slab] = os.getpid()
+            self._slab_thread_ids[slab] = threading.get_ident()
+            role = mp.current_process().name.encode()[:MAX_NAME_LENGTH]
+            self._slab_roles[slab].value = role
+        return slab
+
+    def _find_free_slab(self) -> Union[int, None]:
+        pids = list(self._slab_pids)
+        if 0 in pids:
+            return pids.index(0)
+        pid = os.getpid()
+        thread_ids = {thread.ident for thread in threading.enumerate()}
+        for slab, slab_pid in enumerate(pids):
+            if slab_pid == pid and self._slab_thread_ids[slab] not in thread_ids:
+                return slab
+            if slab_pid != pid and not is_process_alive(slab_pid):
+                return slab
+        return None
+
+    def _read_names(self) -> List[str]:
+        n_metrics = self._n_metrics.value
+        return [self._names[i].value.decode() for i in range(n_metrics)]
+
+    def sample(self) -> MetricsSample:
+        """
+        Copies the values recorded by every process
+
+        :return: Values of each claimed slab
+        :rtype: MetricsSample
+        """
+        names = self._read_names()
+        n_metrics = len(names)
+        slabs = [slab for slab in range(MAX_SLABS) if self._slab_pids[slab] > 0]
+        return MetricsSample(
+            time=time.monotonic(),
+            names=names,
+            kinds=list(self._kinds[:n_metrics]),
+            processes=[self._get_process_name(slab) for slab in slabs],
+            slab_owners=[
+                (self._slab_pids[slab], self._slab_thread_ids[slab]) for slab in slabs
+            ],
+            counters=self._counters_array[slabs, :n_metrics].copy(),
+            histograms=self._histograms_array[slabs, :n_metrics].copy(),
+        )
+
+    def processes(self) -> Dict[int, str]:
+        """
+        :return: Name of each process that has recorded metrics keyed by pid
+        :rtype: Dict[int, str]
+        """
+        return {
+            self._slab_pids[slab]: self._slab_roles[slab].value.decode()
+            for slab in range(MAX_SLABS)
+            if self._slab_pids[slab] > 0
+        }
+
+    def _get_process_name(self, slab: int) -> str:
+        role = self._slab_roles[slab].value.decode()
+        return f"{role} ({self._slab_pids[slab]})"
+
+    def snapshot(
+        self,
+        by_process: bool = False,
+        baseline: MetricsSample = None,
+        quantiles: List[float] = DEFAULT_QUANTILES,
+    ) -> Dict:
+        """
+        Aggregates the values recorded by every process
+
+        :by_process: Also include the values of each process keyed by process name
+        :type by_process: bool
+        :baseline: Earlier sample to subtract, summarising only what was recorded
+            since. The maximum of a histogram is then the bound of its top bucket
+        :type baseline: MetricsSample
+        :quantiles: Quantiles of each histogram to report
+        :type quantiles: List[float]
+        :return: {"counters": {name: value}, "gauges": {name: value},
+            "histograms": {name: summary}} and optionally
+            "processes": {"{name} ({pid})": {"counters":.., "gauges":.., ..}}
+        :rtype: Dict
+        """
+        return summarise_sample(self.sample(), by_process, baseline, quantiles)
+
+    def __setup_shared_memory(self):
+        self._lock = mp.Lock()
+        self._n_metrics = mp.RawValue(ctypes.c_int, 0)
+        name_type = ctypes.c_char * MAX_NAME_LENGTH
+        self._names = mp.RawArray(name_type, MAX_METRICS)
+        self._kinds = mp.RawArray(ctypes.c_int8, MAX_METRICS)
+        self._slab_pids = mp.RawArray(ctypes.c_int64, MAX_SLABS)
+        self._slab_thread_ids = mp.RawArray(ctypes.c_uint64, MAX_SLABS)
+        self._slab_roles = mp.RawArray(name_type, MAX_SLABS)
+        self.__setup_shared_counters()
+        self.__setup_shared_histograms()
+
+    def __setup_shared_counters(self):
+        mp_array = mp.RawArray(ctypes.c_double, MAX_SLABS * MAX_METRICS)
+        self._counters = memoryview(mp_array).cast("B").cast("d")
+        self._counters_array = np.ndarray(
+            (MAX_SLABS, MAX_METRICS), dtype=np.float64, buffer=mp_array
+        )
+        self._shared_counters = mp_array
+
+    def __setup_shared_histograms(self):
+        mp_array = mp.RawArray(ctypes.c_int64, MAX_SLABS * MAX_METRICS * SLOT_SIZE)
+        self._histograms = memoryview(mp_array).cast("B").cast("q")
+        self._histograms_array = np.ndarray(
+            (MAX_SLABS, MAX_METRICS, SLOT_SIZE), dtype=np.int64, buffer=mp_array
+        )
+        self._shared_histograms = mp_array
+
+
+def get_bucket_index(value: int) -> int:
+    value = int(value)
+    if value <= 0:
+        return 0
+    shift = value.bit_length() - SIGNIFICANT_BITS
+    if shift <= 0:
+        return value
+    index = shift * SUB_BUCKET_HALF_COUNT + (value >> shift)
+    return min(index, N_BUCKETS - 1)
+
+
+def get_bucket_upper_bounds() -> np.array:
+    """
+    :return: Largest reading counted by each bucket
+    :rtype: np.array
+    """
+    indices = np.arange(N_BUCKETS)
+    shifts = np.maximum(indices // SUB_BUCKET_HALF_COUNT - 1, 0)
+    mantissas = indices - shifts * SUB_BUCKET_HALF_COUNT
+    return ((mantissas + 1) << shifts) - 1
+
+
+BUCKET_UPPER_BOUNDS = get_bucket_upper_bounds()
+
+
+def summarise_sample(
+    sample: MetricsSample,
+    by_process: bool = False,
+    baseline: MetricsSample = None,
+    quantiles: List[float] = DEFAULT_QUANTILES,
+) -> Dict:
+    """
+    Aggregates a sample across processes, see MetricsRegistry.snapshot. Slabs of
+        threads of the same process are combined
+    """
+    counters, histograms = sample.counters, sample.histograms
+    if baseline is not None:
+        counters, histograms = subtract_baseline(sample, baseline)
+    summary = summarise_values(
+        sample, counters.sum(axis=0), sum_histograms(histograms), quantiles
+    )
+    if by_process:
+        processes = np.array(sample.processes)
+        summary["processes"] = {}
+        for process in dict.fromkeys(sample.processes):
+            is_process = processes == process
+            summary["processes"][process] = summarise_values(
+                sample,
+                counters[is_process].sum(axis=0),
+                sum_histograms(histograms[is_process]),
+                quantiles,
+            )
+    return summary
+
+
+def sum_histograms(histograms: np.array) -> np.array:
+    """
+    :return: Histograms of several slabs combined into one
+    :rtype: np.array
+    """
+    total_histograms = histograms.sum(axis=0)
+    total_histograms[:, MAXIMUM] = histograms[:, :, MAXIMUM].max(axis=0, initial=0)
+    return total_histograms
+
+
+def subtract_baseline(sample: MetricsSample, baseline: MetricsSample):
+    """
+    Subtracts the values of slabs that were also present in the baseline. The
+        maximum reading since the baseline is unknown so it is cleared and gauges
+        keep their current value
+    """
+    counters, histograms = sample.counters.copy(), sample.histograms.copy()
+    histograms[:, :, MAXIMUM] = 0
+    n_metrics = len(baseline.names)
+    baseline_rows = {owner: i for i, owner in enumerate(baseline.slab_owners)}
+    for i, owner in enumerate(sample.slab_owners):
+        if owner in baseline_rows:
+            row = baseline_rows[owner]
+            counters[i, :n_metrics] -= baseline.counters[row]
+            histograms[i, :n_metrics] -= baseline.histograms[row]
+    is_gauge = np.array(sample.kinds, dtype=np.int8) == GAUGE
+    counters[:, is_gauge] = sample.counters[:, is_gauge]
+    return counters, histograms
+
+
+def summarise_values(
+    sample: MetricsSample,
+    counters: np.array,
+    histograms: np.array,
+    quantiles: List[float],
+) -> Dict:
+    counter_summaries, gauge_summaries, histogram_summaries = {}, {}, {}
+    for index, (name, kind) in enumerate(zip(sample.names, sample.kinds)):
+        if kind == COUNTER:
+            counter_summaries[name] = float(counters[index])
+        elif kind == GAUGE:
+            gauge_summaries[name] = float(counters[index])
+        else:
+            histogram_summaries[name] = summarise_histogram(
+                histograms[index], quantiles
+            )
+    return {
+        "counters": counter_summaries,
+        "gauges": gauge_summaries,
+        "histograms": histogram_summaries,
+    }
+
+
+def summarise_histogram(
+    slot: np.array,
+    quantiles: List[float] = DEFAULT_QUANTILES,
+) -> Dict:
+    """
+    Summarises a histogram slot. Quantiles are the largest reading of the bucket
+        they fall in, capped at the maximum reading
+
+    :slot: Summary values followed by bucket counts of a histogram
+    :type slot: np.array
+    :quantiles: Quantiles to report
+    :type quantiles: List[float]
+    :return: count, mean, maximum and quantiles keyed "p50", "p99", "p99.9"..
+    :rtype: Dict
+    """
+    count = int(slot[COUNT])
+    summary = {"count": count}
+    if count == 0:
+        return summary
+    buckets = slot[N_SUMMARY_VALUES:]
+    cumulative_counts = np.cumsum(buckets)
+    maximum = int(slot[MAXIMUM])
+    if maximum == 0:
+        maximum = int(BUCKET_UPPER_BOUNDS[np.flatnonzero(buckets)[-1]])
+    summary.update({"mean": slot[SUM] / count, "max": maximum})
+    for q in quantiles:
+        index = np.searchsorted(cumulative_counts, q * count, side="left")
+        index = min(index, N_BUCKETS - 1)
+        summary[f"p{q * 100:g}"] = int(min(BUCKET_UPPER_BOUNDS[index], maximum))
+    return summary
+
+
+def is_process_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
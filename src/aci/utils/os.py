@@ -9,7 +9,6 @@ from aci.game_capture.video.get_window import (
     get_window_location_linux,
 )
 from aci.utils.data import Point
-from pywinctl import Window
 
 
 def get_sanitised_os_name() -> str:
@@ -108,6 +107,9 @@ def move_application_window(
     """
     os_name = get_sanitised_os_name()
     window_name = GAME_NAME_TO_WINDOW_NAME[os_name][game_name]
+    # Imported on use as pywinctl needs an X display to import
+    from pywinctl import Window
+
     xwindow = get_window_linux(window_name, game_resolution)
     window = Window(xwindow)
     window.moveTo(location.x, location.y)
@@ -0,0 +1,133 @@
+from collections import Counter
+import os
+from pathlib import Path
+import signal
+import sys
+import threading
+from typing import Dict, Union
+
+from loguru import logger
+
+# Seconds of CPU time between samples
+DEFAULT_INTERVAL = 0.005
+# Send to a profiled process to write the samples taken so far
+DUMP_SIGNAL = signal.SIGUSR2
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples the stack of every thread of a process each
+        time the process has used interval seconds of CPU time, using SIGPROF so
+        that no profiling code runs between samples. Samples are written as
+        collapsed stacks, one "thread;outer frame;..;inner frame count" per line,
+        which flamegraph.pl, speedscope or Perfetto can display. Enable before
+        forking processes, then start and stop within each process to profile it
+        under the role it is enabled for in the configuration
+    """
+
+    def __init__(self):
+        self._is_enabled = False
+        self._output_path = None
+        self._interval = DEFAULT_INTERVAL
+        self._roles = {}
+        self._reset_process_state()
+        os.register_at_fork(after_in_child=self._reset_process_state)
+
+    def _reset_process_state(self):
+        self._role = None
+        self._samples = Counter()
+
+    @property
+    def is_running(self) -> bool:
+        return self._role is not None
+
+    def enable(self, profiling_config: Dict):
+        """
+        Allows processes to be profiled
+
+        :profiling_config: Whether to profile each role, such as "capture": True,
+            the folder to write profiles to as "output_path" and optionally the
+            CPU seconds between samples as "interval"
+        :type profiling_config: Dict
+        """
+        profiling_config = dict(profiling_config)
+        self._output_path = Path(profiling_config.pop("output_path"))
+        self._interval = profiling_config.pop("interval", DEFAULT_INTERVAL)
+        self._roles = profiling_config
+        self._is_enabled = True
+
+    def start(self, role: str):
+        """
+        Starts profiling the calling process if its role is enabled, must be
+            called from the process's main thread
+
+        :role: Role of the process in the profiling configuration
+        :type role: str
+        """
+        if not self._is_enabled or not self._roles.get(role, False):
+            return
+        self._role = role
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.signal(DUMP_SIGNAL, self._dump)
+        signal.setitimer(signal.ITIMER_PROF, self._interval, self._interval)
+        logger.info(f"Profiling {role} process {os.getpid()}")
+
+    def _sample(self, signal_number: int, frame):
+        main_thread_id = threading.main_thread().ident
+        for thread_id, thread_frame in sys._current_frames().items():
+            if thread_id == main_thread_id:
+                # Skips this handler's frame
+                thread_frame = frame
+            stack = []
+            while thread_frame is not None:
+                stack.append(thread_frame.f_code)
+                thread_frame = thread_frame.f_back
+            self._samples[(thread_id, tuple(stack))] += 1
+
+    def _dump(self, signal_number: int, frame):
+        self.write()
+
+    def stop(self) -> Union[Path, None]:
+        """
+        Stops profiling and writes the samples taken
+
+        :return: Path to the profile, None if the process was not profiled
+        :rtype: Union[Path, None]
+        """
+        if not self.is_running:
+            return None
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_IGN)
+        filepath = self.write()
+        self._role = None
+        return filepath
+
+    def write(self) -> Path:
+        """
+        Writes the samples taken so far to profile_{role}_{pid}.txt in the
+            output folder
+
+        :return: Path to the profile
+        :rtype: Path
+        """
+        samples = dict(self._samples)
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        lines = []
+        for (thread_id, stack), count in samples.items():
+            thread_name = thread_names.get(thread_id, f"Thread-{thread_id}")
+            frames = [thread_name] + [get_frame_name(code) for code in reversed(stack)]
+            lines.append(f"{';'.join(frames)} {count}")
+        self._output_path.mkdir(parents=True, exist_ok=True)
+        filepath = self._output_path.joinpath(f"profile_{self._role}_{os.getpid()}.txt")
+        with open(filepath, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        logger.info(f"Saved {sum(samples.values())} profile samples to {filepath}")
+        return filepath
+
+
+def get_frame_name(code) -> str:
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+Sampling_Profiler = SamplingProfiler()
@@ -0,0 +1,177 @@
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Dict, List, Union
+
+from aci.utils.system_monitor import System_Monitor, SystemMonitor
+
+CLOCK_TICKS_PER_SECOND = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+# Indices of fields in /proc/[pid]/stat after the command name
+STAT_USER_TIME = 11
+STAT_SYSTEM_TIME = 12
+STAT_N_THREADS = 17
+STAT_RESIDENT_PAGES = 21
+CONTEXT_SWITCH_FIELDS = {
+    "voluntary_ctxt_switches": "voluntary_context_switches",
+    "nonvoluntary_ctxt_switches": "involuntary_context_switches",
+}
+# Samples per second taken by the resource sampler
+DEFAULT_SAMPLE_RATE = 1.0
+
+
+def read_process_usage(pid: int) -> Union[Dict, None]:
+    """
+    Reads the resources a process has used so far from /proc
+
+    :pid: Process identifier
+    :type pid: int
+    :return: "cpu_seconds" of user and system time, "resident_memory_bytes",
+        "threads" and the "voluntary_context_switches" and
+        "involuntary_context_switches" of the process, None if it no longer exists
+    :rtype: Union[Dict, None]
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "r") as file:
+            stat = file.read()
+        with open(f"/proc/{pid}/status", "r") as file:
+            status = file.readlines()
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+    # The command name is in brackets and may itself contain spaces or brackets
+    fields = stat[stat.rindex(")") + 2 :].split()
+    cpu_ticks = int(fields[STAT_USER_TIME]) + int(fields[STAT_SYSTEM_TIME])
+    usage = {
+        "cpu_seconds": cpu_ticks / CLOCK_TICKS_PER_SECOND,
+        "resident_memory_bytes": int(fields[STAT_RESIDENT_PAGES]) * PAGE_SIZE,
+        "threads": int(fields[STAT_N_THREADS]),
+    }
+    for line in status:
+        key, _, value = line.partition(":")
+        if key in CONTEXT_SWITCH_FIELDS:
+            usage[CONTEXT_SWITCH_FIELDS[key]] = int(value)
+    return usage
+
+
+def find_process_id(process_names: List[str]) -> Union[int, None]:
+    """
+    Finds a running process by the command name shown by ps, which the kernel
+        truncates to 15 characters
+
+    :process_names: Command names to look for
+    :type process_names: List[str]
+    :return: Identifier of the first process found, None if none are running
+    :rtype: Union[int, None]
+    """
+    for path in Path("/proc").glob("[0-9]*/comm"):
+        try:
+            process_name = path.read_text().strip()
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        if process_name in process_names:
+            return int(path.parent.name)
+    return None
+
+
+class ResourceSampler:
+    """
+    Samples the CPU, memory, context switches and threads of the processes that
+        make up ACI from /proc on a background thread. Each process is given a
+        role, its usage is recorded in a SystemMonitor as gauges named
+        "resources.{role}.cpu_percent", ".resident_memory_bytes" and ".threads"
+        and counters named ".cpu_seconds", ".voluntary_context_switches" and
+        ".involuntary_context_switches"
+    """
+
+    def __init__(
+        self,
+        sampler_config: Dict,
+        system_monitor: SystemMonitor = System_Monitor,
+    ):
+        self._system_monitor = system_monitor
+        self._sample_period = 1.0 / sampler_config.get("rate", DEFAULT_SAMPLE_RATE)
+        self._process_ids = {}
+        self._process_names = {}
+        self._previous_usages = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_process(self, role: str, pid: int):
+        """
+        Samples a process by its identifier
+
+        :role: Name the process's resources are recorded under
+        :type role: str
+        :pid: Process identifier
+        :type pid: int
+        """
+        self._process_ids[role] = pid
+
+    def add_process_names(self, role: str, process_names: List[str]):
+        """
+        Samples a process started outside of ACI, such as AC itself, which is
+            looked up by command name whenever it is not running
+
+        :role: Name the process's resources are recorded under
+        :type role: str
+        :process_names: Command names the process may be running as
+        :type process_names: List[str]
+        """
+        self._process_names[role] = process_names
+
+    def start(self):
+        """
+        Starts sampling from a daemon thread
+        """
+        self._thread = threading.Thread(target=self._run, name="ResourceSampler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self._sample_period):
+            self.sample()
+
+    def stop(self):
+        """
+        Stops the sampling thread
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sample(self):
+        """
+        Records the usage of every process since the previous sample
+        """
+        self._maybe_find_processes()
+        for role, pid in self._process_ids.items():
+            usage = read_process_usage(pid)
+            if usage is not None:
+                usage["time"] = time.monotonic()
+                self._record_usage(role, usage, self._previous_usages.get(pid))
+            self._previous_usages[pid] = usage
+
+    def _maybe_find_processes(self):
+        for role, process_names in self._process_names.items():
+            pid = self._process_ids.get(role)
+            if pid is None or self._previous_usages.get(pid, {}) is None:
+                pid = find_process_id(process_names)
+            if pid is not None:
+                self._process_ids[role] = pid
+
+    def _record_usage(self, role: str, usage: Dict, previous_usage: Dict):
+        name = f"resources.{role}"
+        system_monitor = self._system_monitor
+        system_monitor.set_gauge(
+            f"{name}.resident_memory_bytes", usage["resident_memory_bytes"]
+        )
+        system_monitor.set_gauge(f"{name}.threads", usage["threads"])
+        if previous_usage is None:
+            return
+        elapsed_time = usage["time"] - previous_usage["time"]
+        cpu_time = usage["cpu_seconds"] - previous_usage["cpu_seconds"]
+        system_monitor.set_gauge(f"{name}.cpu_percent", 100.0 * cpu_time / elapsed_time)
+        system_monitor.increment(f"{name}.cpu_seconds", cpu_time)
+        for key in CONTEXT_SWITCH_FIELDS.values():
+            system_monitor.increment(f"{name}.{key}", usage[key] - previous_usage[key])
@@ -3,7 +3,64 @@ from __future__ import annotations
 from typing import Dict
 
 from aci.utils.ins import SimulatedINS
-from aci.utils.load import state_bytes_to_dict
+from aci.utils.load import STRING_KEYS, state_bytes_to_dict
+from acs.shared_memory.ac.combined import COMBINED_DATA_TYPES
+import numpy as np
+
+
+class StateRecord:
+    """
+    Game state held in a record and dictionary allocated once and updated in
+        place, so decoding a state allocates nothing that outlives the step.
+        Numeric values of the dictionary are 0-d array views into the record,
+        they and the dictionary are only valid until the next update
+    """
+
+    def __init__(self):
+        self._record = np.zeros(1, dtype=COMBINED_DATA_TYPES)
+        self._bytes = self._record.view(np.uint8)
+        names = self._record.dtype.names
+        # Bytes of each string, indexing the record for them creates cycles
+        self._string_bytes = {
+            key: self._get_bytes_view(key) for key in STRING_KEYS if key in names
+        }
+        self._state = {
+            name: "" if name in self._string_bytes else self._get_view(name)
+            for name in names
+        }
+
+    def _get_view(self, name: str) -> np.array:
+        field = self._record[name]
+        return field.reshape(field.shape[1:])
+
+    def _get_bytes_view(self, name: str) -> np.array:
+        field_type, offset = self._record.dtype.fields[name][:2]
+        return self._bytes[offset : offset + field_type.itemsize]
+
+    def update(self, data: bytes):
+        """
+        :data: Game state as bytes, or any buffer of the record's size
+        :type data: bytes
+        """
+        self._bytes[:] = np.frombuffer(data, dtype=np.uint8)
+
+    @property
+    def bytes(self) -> np.array:
+        """
+        :return: The record's bytes, usable wherever state bytes are
+        :rtype: np.array
+        """
+        return self._bytes
+
+    @property
+    def state(self) -> Dict:
+        """
+        :return: Game state as a dictionary, see state_bytes_to_dict
+        :rtype: Dict
+        """
+        for key, string_bytes in self._string_bytes.items():
+            self._state[key] = string_bytes.tobytes().decode("utf-8")
+        return self._state
 
 
 def process_state(state: bytes, ins: SimulatedINS) -> Dict:
@@ -19,3 +76,17 @@ def simulate_ins_readings(state: Dict, ins: SimulatedINS) -> Dict:
 
 def identity(state: bytes, ins: SimulatedINS) -> bytes:
     return state
+
+
+def record_bytes(state: StateRecord, ins: SimulatedINS) -> np.array:
+    return state.bytes
+
+
+def process_state_record(state: StateRecord, ins: SimulatedINS) -> Dict:
+    return state.state
+
+
+def simulate_ins_record_readings(state: StateRecord, ins: SimulatedINS) -> Dict:
+    state = state.state
+    ins(state)
+    return state
@@ -1,55 +1,138 @@
-from collections import defaultdict
 from functools import wraps
+import os
 import time
+from typing import Dict, List
 
+from aci.utils.metrics_registry import MetricsRegistry, MetricsSample
 from loguru import logger
-import numpy as np
 
 LOG_EVERY_N = 5000
-N_EXECUTIONS_TO_TRACK = 1000
-
-
-class FunctionStats:
-    def __init__(self):
-        self._execution_times = -1.0 * np.ones(N_EXECUTIONS_TO_TRACK, dtype=np.float32)
-        self._n_tracked = 0
-        self._start_time = time.time_ns()
-
-    def add_execution_times(self, time_ms: float):
-        index = self._n_tracked % N_EXECUTIONS_TO_TRACK
-        self._execution_times[index] = time_ms
-        self._n_tracked += 1
-
-    @property
-    def average_execution_time(self) -> float:
-        return np.mean(self.execution_times)
-
-    @property
-    def standard_deviation_of_execution_time(self) -> float:
-        return np.std(self.execution_times)
-
-    @property
-    def itteration_per_second(self) -> float:
-        time_elapsed = (time.time_ns() - self._start_time) * 1e-9
-        return self._n_tracked / time_elapsed
-
-    @property
-    def execution_times(self) -> np.array:
-        if self._n_tracked < N_EXECUTIONS_TO_TRACK:
-            execution_times = self._execution_times[self._execution_times > 0]
-        else:
-            execution_times = self._execution_times
-        return execution_times
+# Lengths in seconds of the windows recent histogram summaries cover
+DEFAULT_WINDOWS = [10.0, 60.0]
+# Set to 0 before importing aci to stop track_runtime from wrapping functions
+RUNTIME_TRACKING_ENVIRONMENT_VARIABLE = "ACI_TRACK_RUNTIME"
+NS_PER_MS = 1e6
 
 
 class SystemMonitor:
-    def __init__(self, log_every_n: int):
-        self.runtimes = defaultdict(FunctionStats)
+    """
+    Records runtimes, counters, gauges and histograms into a registry shared by every
+        process forked after the monitor is created, so values recorded in the
+        capture, decode or logging processes can be read from the main process
+    """
+
+    def __init__(self, log_every_n: int, windows: List[float] = DEFAULT_WINDOWS):
+        self._registry = MetricsRegistry()
         self._n_iterations = 0
         self._log_every_n = log_every_n
+        self.set_windows(windows)
+
+    def set_windows(self, windows: List[float]):
+        """
+        Replaces the windows recent histogram summaries can cover, call before
+            taking windowed snapshots as samples of removed windows are discarded
+
+        :windows: Lengths of the windows in seconds
+        :type windows: List[float]
+        """
+        if len(windows) == 0 or any(window < 0 for window in windows):
+            raise ValueError(f"Windows must be non-negative lengths, got {windows}")
+        self._windows = {float(window): [] for window in windows}
 
     def add_function_runtime(self, function_name: str, runtime: float):
-        self.runtimes[function_name].add_execution_times(runtime)
+        """
+        Adds a runtime in milliseconds to a function's runtime histogram
+
+        :function_name: Name of the function
+        :type function_name: str
+        :runtime: Runtime in milliseconds
+        :type runtime: float
+        """
+        self._registry.record(function_name, int(runtime * NS_PER_MS))
+
+    def add_function_runtime_ns(self, function_name: str, runtime_ns: int):
+        self._registry.record(function_name, runtime_ns)
+
+    def increment(self, name: str, value: float = 1.0):
+        """
+        Adds to a counter visible from every process
+
+        :name: Name of the counter
+        :type name: str
+        :value: Amount to add to the counter
+        :type value: float
+        """
+        self._registry.increment(name, value)
+
+    def set_gauge(self, name: str, value: float):
+        """
+        Sets a gauge visible from every process
+
+        :name: Name of the gauge
+        :type name: str
+        :value: Current value of the gauge
+        :type value: float
+        """
+        self._registry.set(name, value)
+
+    def record(self, name: str, value: int):
+        """
+        Adds a reading to a histogram visible from every process
+
+        :name: Name of the histogram
+        :type name: str
+        :value: Non-negative integer reading, durations are in nanoseconds
+        :type value: int
+        """
+        self._registry.record(name, value)
+
+    def snapshot(self, by_process: bool = False, window: float = None) -> Dict:
+        """
+        Aggregates the counters and histograms recorded by every process. Over a
+            window only values recorded in the last window to two windows are
+            summarised, as the start of the window moves once it is a window old
+
+        :by_process: Also include the values recorded by each process
+        :type by_process: bool
+        :window: Length of one of the monitor's windows in seconds, None to
+            summarise everything recorded
+        :type window: float
+        :return: {"counters": {name: value}, "gauges": {name: value},
+            "histograms": {name: summary}}, optionally "processes":
+            {"{name} ({pid})": {"counters":.., "gauges":.., "histograms":..}} and
+            the "duration" covered in seconds for a window
+        :rtype: Dict
+        """
+        if window is None:
+            return self._registry.snapshot(by_process)
+        sample = self._registry.sample()
+        baseline = self._update_window(window, sample)
+        snapshot = self._registry.snapshot(by_process, baseline)
+        snapshot["duration"] = sample.time - baseline.time
+        return snapshot
+
+    def processes(self) -> Dict[int, str]:
+        """
+        :return: Name of each process that has recorded metrics keyed by pid
+        :rtype: Dict[int, str]
+        """
+        return self._registry.processes()
+
+    def _update_window(self, window: float, sample: MetricsSample) -> MetricsSample:
+        """
+        Keeps the samples that started the previous and current window, returning
+            the start of the previous window
+        """
+        if window not in self._windows:
+            message = f"No {window}s window, "
+            message += f"the monitor has windows {list(self._windows)}"
+            raise ValueError(message)
+        samples = self._windows[window]
+        if len(samples) == 0:
+            samples.extend([sample, sample])
+        elif sample.time - samples[1].time >= window:
+            samples[:] = [samples[1], sample]
+        return samples[0]
 
     def maybe_log_function_itterations_per_second(self):
         if self._is_logging_interval:
@@ -61,37 +144,53 @@ class SystemMonitor:
         return self._n_iterations % self._log_every_n == 0
 
     def log_function_runtimes_times(self):
-        for key in self.runtimes.keys():
-            function_stats = self.runtimes[key]
-            average_runtime = function_stats.average_execution_time
-            std_dev = function_stats.standard_deviation_of_execution_time
-            logger.info(f"{key} runs: {average_runtime:.2f} ± {std_dev:.2f} ms")
+        for key, summary in self.snapshot()["histograms"].items():
+            if summary["count"] > 0:
+                logger.info(f"{key} runs: {format_runtime_summary(summary)}")
 
     def _log_function_itterations_per_second(self):
-        for key in self.runtimes.keys():
-            function_stats = self.runtimes[key]
-            average_runtime = function_stats.average_execution_time
-            std_dev = function_stats.standard_deviation_of_execution_time
-            observed_it_per_s = function_stats.itteration_per_second
-            message = f"{key}: \n"
-            message += f"Average runtime: {average_runtime:.2f} ± {std_dev:.2f} ms\n"
-            message += f"Theoretical max: {(1000.0 / average_runtime):.2f} it/s\n"
+        window = min(self._windows)
+        snapshot = self.snapshot(window=window)
+        for key, summary in snapshot["histograms"].items():
+            if summary["count"] == 0:
+                continue
+            observed_it_per_s = summary["count"] / max(snapshot["duration"], 1e-9)
+            message = f"{key} over {snapshot['duration']:.1f}s: \n"
+            message += f"Runtime: {format_runtime_summary(summary)}\n"
             message += f"Observed: {observed_it_per_s:.2f} it/s"
             logger.debug(message)
 
 
+def format_runtime_summary(summary: Dict) -> str:
+    percentiles = ["p50", "p99", "p99.9", "max"]
+    times = [f"{name} {summary[name] / NS_PER_MS:.2f}" for name in percentiles]
+    return ", ".join(times) + " ms"
+
+
+def is_runtime_tracking_enabled() -> bool:
+    return os.environ.get(RUNTIME_TRACKING_ENVIRONMENT_VARIABLE, "1") != "0"
+
+
 System_Monitor = SystemMonitor(LOG_EVERY_N)
 
 
 def track_runtime(system_monitor: SystemMonitor):
+    """
+    Records the runtime of every call to the decorated function in nanoseconds.
+        When runtime tracking is disabled functions are returned undecorated
+    """
+
     def decorator(function):
+        if not is_runtime_tracking_enabled():
+            return function
+        name = f"{function.__module__}.{function.__name__}"
+        add_function_runtime_ns = system_monitor.add_function_runtime_ns
+
         @wraps(function)
         def wrapper(*args, **kwargs):
-            t1 = time.time_ns()
+            start_time = time.perf_counter_ns()
             result = function(*args, **kwargs)
-            t2 = time.time_ns()
-            name = f"{function.__module__}.{function.__name__}"
-            system_monitor.add_function_runtime(name, (t2 - t1) * 1e-6)
+            add_function_runtime_ns(name, time.perf_counter_ns() - start_time)
             return result
 
         return wrapper
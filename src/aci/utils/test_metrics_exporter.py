@@ -0,0 +1,55 @@
+import os
+import urllib.request
+
+from aci.utils.metrics_exporter import CONTENT_TYPE, MetricsExporter
+from aci.utils.system_monitor import LOG_EVERY_N, SystemMonitor
+import pytest
+
+
+def get_system_monitor() -> SystemMonitor:
+    system_monitor = SystemMonitor(LOG_EVERY_N)
+    system_monitor.increment("capture_frames", 3)
+    for runtime_ns in [1000000, 2000000, 4000000]:
+        system_monitor.record("frame_age", runtime_ns)
+    return system_monitor
+
+
+@pytest.mark.fast
+def test_rendered_metrics_are_openmetrics_text():
+    exporter = MetricsExporter({}, get_system_monitor())
+    lines = exporter.render().splitlines()
+    assert "# TYPE aci_capture_frames counter" in lines
+    assert "aci_capture_frames_total 3.0" in lines
+    assert "# TYPE aci_frame_age_seconds summary" in lines
+    assert "aci_frame_age_seconds_count 3" in lines
+    assert "aci_frame_age_seconds_sum 0.007" in lines
+    assert any(
+        line.startswith('aci_frame_age_seconds{quantile="0.5"}') for line in lines
+    )
+    process_cpu = (
+        f'aci_process_cpu_seconds_total{{process="MainProcess",pid="{os.getpid()}"}}'
+    )
+    assert any(line.startswith(process_cpu) for line in lines)
+    assert lines[-1] == "# EOF"
+
+
+@pytest.mark.fast
+def test_metrics_are_served_over_http():
+    exporter = MetricsExporter({"port": 0}, get_system_monitor())
+    exporter.start()
+    try:
+        with urllib.request.urlopen(exporter.address) as response:
+            body = response.read().decode()
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+    finally:
+        exporter.stop()
+    assert "aci_capture_frames_total 3.0" in body
+
+
+@pytest.mark.fast
+def test_metrics_are_written_to_file_on_stop(tmp_path):
+    path = tmp_path.joinpath("metrics.prom")
+    exporter = MetricsExporter({"path": path, "interval": 60.0}, get_system_monitor())
+    exporter.start()
+    exporter.stop()
+    assert path.read_text().endswith("# EOF\n")
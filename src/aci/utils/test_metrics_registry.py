@@ -0,0 +1,123 @@
+import multiprocessing as mp
+import sys
+import threading
+
+from aci.utils.metrics_registry import MAX_SLABS, MetricsRegistry
+from aci.utils.system_monitor import LOG_EVERY_N, SystemMonitor
+import numpy as np
+import pytest
+
+
+def record_metrics(registry: MetricsRegistry):
+    registry.increment("frames", 2)
+    for runtime in [1.0, 2.0, 4.0]:
+        registry.record("capture", runtime)
+
+
+@pytest.mark.fast
+def test_metrics_recorded_in_other_processes_are_aggregated():
+    registry = MetricsRegistry()
+    registry.increment("frames")
+    context = mp.get_context("fork")
+    processes = [
+        context.Process(target=record_metrics, args=(registry,), name=f"Capture-{i}")
+        for i in range(2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    snapshot = registry.snapshot(by_process=True)
+    assert snapshot["counters"]["frames"] == 5
+    capture = snapshot["histograms"]["capture"]
+    assert capture["count"] == 6
+    assert capture["max"] == 4.0
+    assert capture["mean"] == pytest.approx(7.0 / 3.0)
+    assert capture["p50"] == pytest.approx(2.0, rel=0.05)
+    assert len(snapshot["processes"]) == 3
+
+
+@pytest.mark.fast
+def test_histogram_percentiles_are_within_bucket_precision():
+    registry = MetricsRegistry()
+    readings = np.random.default_rng(0).integers(1, 10**9, 10000)
+    for reading in readings:
+        registry.record("runtime", reading)
+    summary = registry.snapshot()["histograms"]["runtime"]
+    assert summary["max"] == readings.max()
+    for q in [0.5, 0.99, 0.999]:
+        exact = np.quantile(readings, q)
+        assert summary[f"p{q * 100:g}"] == pytest.approx(exact, rel=1 / 16)
+
+
+@pytest.mark.fast
+def test_windowed_snapshot_only_summarises_recent_readings():
+    system_monitor = SystemMonitor(LOG_EVERY_N, windows=[0.0])
+    system_monitor.record("frame_age", 1000)
+    system_monitor.snapshot(window=0.0)
+    system_monitor.record("frame_age", 10)
+    window_summary = system_monitor.snapshot(window=0.0)["histograms"]["frame_age"]
+    assert window_summary["count"] == 1
+    assert window_summary["p50"] == 10
+    assert system_monitor.snapshot()["histograms"]["frame_age"]["count"] == 2
+
+
+@pytest.mark.fast
+def test_windowed_snapshot_rejects_unknown_windows():
+    system_monitor = SystemMonitor(LOG_EVERY_N, windows=[5.0])
+    system_monitor.snapshot(window=5.0)
+    with pytest.raises(ValueError, match="windows \\[5.0\\]"):
+        system_monitor.snapshot(window=10.0)
+
+
+@pytest.mark.fast
+def test_windows_can_be_replaced():
+    system_monitor = SystemMonitor(LOG_EVERY_N)
+    system_monitor.set_windows([1, 30])
+    assert "duration" in system_monitor.snapshot(window=30.0)
+    with pytest.raises(ValueError):
+        system_monitor.snapshot(window=60.0)
+    with pytest.raises(ValueError):
+        system_monitor.set_windows([])
+
+
+def record_concurrently(registry: MetricsRegistry, n_updates: int):
+    for _ in range(n_updates):
+        registry.increment("actions")
+        registry.record("latency", 100)
+
+
+@pytest.mark.fast
+def test_concurrent_updates_from_threads_are_not_lost():
+    # Switch threads as often as possible to interleave their updates
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    registry = MetricsRegistry()
+    n_threads, n_updates = 4, 20000
+    threads = [
+        threading.Thread(target=record_concurrently, args=(registry, n_updates))
+        for _ in range(n_threads)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    snapshot = registry.snapshot(by_process=True)
+    assert snapshot["counters"]["actions"] == n_threads * n_updates
+    assert snapshot["histograms"]["latency"]["count"] == n_threads * n_updates
+    # Slabs of threads of the same process are reported together
+    assert len(snapshot["processes"]) == 1
+
+
+@pytest.mark.fast
+def test_slabs_of_finished_threads_are_reused():
+    registry = MetricsRegistry()
+    for _ in range(MAX_SLABS + 4):
+        thread = threading.Thread(target=registry.increment, args=("frames",))
+        thread.start()
+        thread.join()
+    # Each reuse discards the totals of a finished thread
+    assert registry.snapshot()["counters"]["frames"] == MAX_SLABS
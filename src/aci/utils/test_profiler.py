@@ -0,0 +1,28 @@
+import time
+
+from aci.utils.profiler import SamplingProfiler
+import pytest
+
+
+def spin(duration: float):
+    end_time = time.process_time() + duration
+    while time.process_time() < end_time:
+        pass
+
+
+@pytest.mark.fast
+def test_profile_is_written_as_collapsed_stacks(tmp_path):
+    profiler = SamplingProfiler()
+    profiler.enable({"output_path": tmp_path, "interval": 0.001, "agent": True})
+    profiler.start("capture")
+    assert not profiler.is_running
+    profiler.start("agent")
+    spin(0.2)
+    filepath = profiler.stop()
+    lines = filepath.read_text().splitlines()
+    assert filepath.name.startswith("profile_agent_")
+    spin_lines = [line for line in lines if "spin (test_profiler.py" in line]
+    assert len(spin_lines) > 0
+    stack, count = spin_lines[0].rsplit(" ", 1)
+    assert stack.startswith("MainThread;")
+    assert int(count) > 0
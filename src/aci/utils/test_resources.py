@@ -0,0 +1,38 @@
+import os
+import time
+
+from aci.utils.resources import ResourceSampler, find_process_id, read_process_usage
+from aci.utils.system_monitor import LOG_EVERY_N, SystemMonitor
+import pytest
+
+
+def spin(duration: float):
+    end_time = time.perf_counter() + duration
+    while time.perf_counter() < end_time:
+        pass
+
+
+@pytest.mark.fast
+def test_process_usage_is_read_from_proc():
+    usage = read_process_usage(os.getpid())
+    assert usage["resident_memory_bytes"] > 0
+    assert usage["threads"] >= 1
+    assert usage["voluntary_context_switches"] >= 0
+    with open("/proc/self/comm", "r") as file:
+        assert find_process_id([file.read().strip()]) is not None
+
+
+@pytest.mark.fast
+def test_sampled_usage_is_recorded_by_role():
+    system_monitor = SystemMonitor(LOG_EVERY_N)
+    sampler = ResourceSampler({"rate": 10.0}, system_monitor)
+    sampler.add_process("Agent", os.getpid())
+    sampler.sample()
+    spin(0.2)
+    sampler.sample()
+    snapshot = system_monitor.snapshot()
+    assert snapshot["gauges"]["resources.Agent.cpu_percent"] > 0.0
+    assert snapshot["gauges"]["resources.Agent.threads"] >= 1
+    assert "resources.Agent.involuntary_context_switches" in snapshot["counters"]
+    windowed_snapshot = system_monitor.snapshot(window=10.0)
+    assert windowed_snapshot["gauges"] == snapshot["gauges"]
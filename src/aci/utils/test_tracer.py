@@ -0,0 +1,38 @@
+import json
+import multiprocessing as mp
+import threading
+
+from aci.utils.tracer import NULL_SPAN, Tracer
+import pytest
+
+
+def record_decode_span(tracer: Tracer):
+    with tracer.span("decode") as span:
+        span.frame = 7
+    tracer.flush()
+
+
+@pytest.mark.fast
+def test_spans_from_every_process_and_thread_are_merged(tmp_path):
+    tracer = Tracer()
+    assert tracer.span("behaviour") is NULL_SPAN
+    tracer.enable({"output_path": tmp_path, "buffer_size": 2})
+    process = mp.get_context("fork").Process(target=record_decode_span, args=(tracer,))
+    process.start()
+    process.join()
+    thread = threading.Thread(target=tracer.add_span, args=("publish", 0, 1000, 7))
+    thread.start()
+    thread.join()
+    for frame in range(3):
+        tracer.current_frame = frame
+        with tracer.span("behaviour"):
+            pass
+    tracer.flush()
+    with open(tracer.merge(), "r") as file:
+        events = json.load(file)["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    assert len({event["pid"] for event in spans}) == 2
+    assert {"decode", "publish", "behaviour"} == {event["name"] for event in spans}
+    behaviour_frames = [e["args"]["frame"] for e in spans if e["name"] == "behaviour"]
+    assert behaviour_frames == [1, 2]
+    assert all(event["dur"] >= 0 for event in spans)
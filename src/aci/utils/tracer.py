@@ -0,0 +1,251 @@
+import json
+import multiprocessing as mp
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Dict, List, Union
+
+from loguru import logger
+
+DEFAULT_BUFFER_SIZE = 100000
+TRACE_FILE_PATTERN = "trace_*.json"
+MERGED_TRACE_FILE = "trace.json"
+NO_FRAME = -1
+
+
+class SpanBuffer:
+    """
+    Fixed size ring buffer of the spans recorded by a single thread. Only the
+        owning thread writes to it so recording takes no lock, once full the
+        oldest spans are overwritten
+    """
+
+    def __init__(self, size: int):
+        self._spans = [None] * size
+        self._size = size
+        self._n_recorded = 0
+        self.thread_id = threading.get_native_id()
+        self.thread_name = threading.current_thread().name
+
+    def append(self, name: str, start_ns: int, end_ns: int, frame: int):
+        self._spans[self._n_recorded % self._size] = (name, start_ns, end_ns, frame)
+        self._n_recorded += 1
+
+    @property
+    def spans(self) -> List:
+        """
+        :return: Recorded spans, oldest first, as (name, start ns, end ns, frame)
+        :rtype: List[Tuple[str, int, int, int]]
+        """
+        n_recorded = self._n_recorded
+        if n_recorded <= self._size:
+            return self._spans[:n_recorded]
+        index = n_recorded % self._size
+        return self._spans[index:] + self._spans[:index]
+
+
+class Span:
+    """
+    Times the body of a with statement, set frame within the body to tag the span
+        with a frame sequence number once it is known
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, frame: int):
+        self._tracer = tracer
+        self._name = name
+        self.frame = frame
+
+    def __enter__(self) -> "Span":
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exception_info):
+        end_ns = time.perf_counter_ns()
+        self._tracer.add_span(self._name, self._start_ns, end_ns, self.frame)
+
+
+class NullSpan:
+    """
+    Returned while tracing is disabled, does nothing
+    """
+
+    frame = NO_FRAME
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, *exception_info):
+        pass
+
+    def __setattr__(self, name: str, value):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """
+    Opt-in recorder of pipeline stage spans that writes Chrome trace JSON, which
+        can be opened in Perfetto (ui.perfetto.dev) or chrome://tracing. Each
+        thread records into its own buffer and each process writes its own file
+        on flush, enable before forking processes to trace them. Timestamps come
+        from the monotonic clock so spans from every process share a timeline
+    """
+
+    def __init__(self):
+        self._is_enabled = False
+        self._output_path = None
+        self._buffer_size = DEFAULT_BUFFER_SIZE
+        self.current_frame = NO_FRAME
+        self._reset_process_state()
+        os.register_at_fork(after_in_child=self._reset_process_state)
+
+    def _reset_process_state(self):
+        self._thread_buffers = threading.local()
+        self._buffers = []
+
+    @property
+    def is_enabled(self) -> bool:
+        return self._is_enabled
+
+    def enable(self, tracing_config: Dict):
+        """
+        Starts recording spans
+
+        :tracing_config: Folder to write traces to as "output_path" and optionally
+            the number of spans kept per thread as "buffer_size"
+        :type tracing_config: Dict
+        """
+        self._output_path = Path(tracing_config["output_path"])
+        self._buffer_size = tracing_config.get("buffer_size", DEFAULT_BUFFER_SIZE)
+        self._is_enabled = True
+
+    def span(self, name: str, frame: int = None) -> Union[Span, NullSpan]:
+        """
+        Context manager recording a span around the body of a with statement
+
+        :name: Name of the pipeline stage
+        :type name: str
+        :frame: Frame sequence number, defaults to current_frame
+        :type frame: int
+        :return: Span to use in a with statement
+        :rtype: Union[Span, NullSpan]
+        """
+        if not self._is_enabled:
+            return NULL_SPAN
+        return Span(self, name, self.current_frame if frame is None else frame)
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, frame: int = None):
+        """
+        Records a span timed with time.perf_counter_ns
+
+        :name: Name of the pipeline stage
+        :type name: str
+        :start_ns: Start of the span
+        :type start_ns: int
+        :end_ns: End of the span
+        :type end_ns: int
+        :frame: Frame sequence number, defaults to current_frame
+        :type frame: int
+        """
+        if not self._is_enabled:
+            return
+        buffer = getattr(self._thread_buffers, "buffer", None)
+        if buffer is None:
+            buffer = self._add_thread_buffer()
+        frame = self.current_frame if frame is None else frame
+        buffer.append(name, start_ns, end_ns, frame)
+
+    def _add_thread_buffer(self) -> SpanBuffer:
+        buffer = SpanBuffer(self._buffer_size)
+        self._thread_buffers.buffer = buffer
+        self._buffers.append(buffer)
+        return buffer
+
+    def flush(self):
+        """
+        Writes the spans recorded by every thread of this process to a Chrome
+            trace file in the output folder named after the process
+        """
+        if not self._is_enabled:
+            return
+        pid = os.getpid()
+        events = [get_process_name_event(pid, mp.current_process().name)]
+        for buffer in list(self._buffers):
+            events.extend(get_thread_events(pid, buffer))
+        self._output_path.mkdir(parents=True, exist_ok=True)
+        filepath = self._output_path.joinpath(f"trace_{pid}.json")
+        with open(filepath, "w") as file:
+            json.dump({"traceEvents": events}, file)
+        logger.info(f"Saved {len(events)} trace events to {filepath}")
+
+    def merge(self) -> Union[Path, None]:
+        """
+        Combines the files written by each process into a single trace
+
+        :return: Path to the merged trace, None if tracing is disabled
+        :rtype: Union[Path, None]
+        """
+        if not self._is_enabled:
+            return None
+        return merge_traces(self._output_path)
+
+
+def get_process_name_event(pid: int, process_name: str) -> Dict:
+    return {
+        "name": "process_name",
+        "ph": "M",
+        "pid": pid,
+        "args": {"name": process_name},
+    }
+
+
+def get_thread_events(pid: int, buffer: SpanBuffer) -> List[Dict]:
+    events = [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": buffer.thread_id,
+            "args": {"name": buffer.thread_name},
+        }
+    ]
+    for name, start_ns, end_ns, frame in buffer.spans:
+        events.append(
+            {
+                "name": name,
+                "ph": "X",
+                "pid": pid,
+                "tid": buffer.thread_id,
+                "ts": start_ns / 1e3,
+                "dur": (end_ns - start_ns) / 1e3,
+                "args": {"frame": frame},
+            }
+        )
+    return events
+
+
+def merge_traces(output_path: Union[Path, str]) -> Path:
+    """
+    Combines the per process trace files in a folder into a single trace
+
+    :output_path: Folder containing trace files written by Tracer.flush
+    :type output_path: Union[Path, str]
+    :return: Path to the merged trace
+    :rtype: Path
+    """
+    output_path = Path(output_path)
+    events = []
+    for filepath in sorted(output_path.glob(TRACE_FILE_PATTERN)):
+        with open(filepath, "r") as file:
+            events.extend(json.load(file)["traceEvents"])
+    merged_filepath = output_path.joinpath(MERGED_TRACE_FILE)
+    with open(merged_filepath, "w") as file:
+        json.dump({"traceEvents": events}, file)
+    logger.info(f"Saved merged trace to {merged_filepath}")
+    return merged_filepath
+
+
+Pipeline_Tracer = Tracer()
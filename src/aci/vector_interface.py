@@ -0,0 +1,224 @@
+import abc
+import time
+from typing import Dict, List
+
+from aci.interface import AssettoCorsaInterface
+from aci.utils.profiler import Sampling_Profiler
+from aci.utils.system_monitor import System_Monitor
+from aci.utils.tracer import Pipeline_Tracer
+from acs.shared_memory.ac.combined import COMBINED_DATA_TYPES
+from loguru import logger
+import numpy as np
+
+# Pipelining needs an agent loop per instance, while the exporter and sampler would
+# run once per instance over the metrics and agent process every instance shares
+UNSUPPORTED_INSTANCE_OPTIONS = ["pipelined", "metrics_exporter", "resource_sampler"]
+
+
+class AssettoCorsaInstance(AssettoCorsaInterface):
+    """
+    One instance of AC run by a VectorAssettoCorsaInterface, with its own
+        launcher, capture process and input interface. Behaviour is decided for
+        all instances at once by the vector interface so the instance's own
+        behaviour, teardown and termination condition are unused
+    """
+
+    def start_processes(self):
+        self._start_processes()
+
+    def start_threads(self):
+        self._start_threads()
+
+    def shutdown(self):
+        self._shutdown()
+
+    def observe_into(self, image: np.array) -> Dict:
+        """
+        Waits for a new capture and copies its image into image
+
+        :image: Array of image_shape to copy the image into
+        :type image: np.array
+        :return: {Dictionary image: image, state: bytes, is_image_stale: bool}
+        :rtype: Dict[str: np.array, bytes, bool]
+        """
+        observation = self._game_capture.capture_into(image)
+        self._observation_frame = self._game_capture.received_frame
+        self._observation_frame_time_ns = self._game_capture.received_frame_time_ns
+        return observation
+
+    @property
+    def image_shape(self) -> tuple:
+        return self._game_capture.image_shape
+
+    def behaviour(self, observation: Dict) -> np.array:
+        pass
+
+    def teardown(self):
+        pass
+
+    def termination_condition(self, observation: Dict) -> bool:
+        return False
+
+
+class VectorAssettoCorsaInterface(abc.ABC):
+    """
+    Abstract base class for agents that control several instances of AC at once,
+        for example to batch inference or collect experience in parallel. Each
+        instance has its own capture process and virtual gamepad, and can
+        capture its own X display with capture.images.display. Observations of
+        all instances are gathered into batched arrays allocated once and
+        reused every step, and a batch of actions is scattered back to the
+        instances. All instances must capture images of the same shape and
+        states as bytes
+    """
+
+    def __init__(self, configs: List[Dict]):
+        self.__setup_instances(configs)
+        self.__setup_batch()
+        self.is_running = True
+
+    def __setup_instances(self, configs: List[Dict]):
+        for config in configs:
+            self._check_instance_config(config)
+        self._instances = [AssettoCorsaInstance(config) for config in configs]
+
+    def _check_instance_config(self, config: Dict):
+        state_config = config.get("capture", {}).get("state", {})
+        if state_config.get("use_dicts", False) or state_config.get(
+            "simulate_ins", False
+        ):
+            raise ValueError("Vectorised instances must capture states as bytes")
+        for option in UNSUPPORTED_INSTANCE_OPTIONS:
+            if option in config:
+                message = f"{option} is not supported by VectorAssettoCorsaInterface"
+                raise ValueError(message)
+
+    def __setup_batch(self):
+        image_shapes = {instance.image_shape for instance in self._instances}
+        if len(image_shapes) != 1:
+            raise ValueError("All instances must capture images of the same shape")
+        image_shape = image_shapes.pop()
+        self._images = np.zeros((self.n_instances, *image_shape), dtype=np.uint8)
+        self._states = np.zeros(self.n_instances, dtype=COMBINED_DATA_TYPES)
+        # Raw bytes of each instance's state record, written without decoding
+        self._state_bytes = self._states.view(np.uint8).reshape(self.n_instances, -1)
+        self._is_image_stale = np.zeros(self.n_instances, dtype=bool)
+        self._observations = {
+            "images": self._images,
+            "states": self._states,
+            "is_image_stale": self._is_image_stale,
+        }
+
+    @property
+    def n_instances(self) -> int:
+        return len(self._instances)
+
+    def run(self):
+        self._start()
+        Sampling_Profiler.start("agent")
+        while self.is_running:
+            try:
+                observations = self.get_observations()
+                if self.termination_condition(observations):
+                    self.is_running = False
+                with Pipeline_Tracer.span("behaviour"):
+                    actions = self.behaviour(observations)
+                self.act(actions)
+            except KeyboardInterrupt:
+                self.is_running = False
+            except Exception as e:
+                self._log_exception(e)
+                self.is_running = False
+        Sampling_Profiler.stop()
+        self.teardown()
+        self._shutdown()
+
+    def _start(self):
+        # Every process is started before any thread of the agent so none are
+        # forked while another instance's threads hold locks
+        for instance in self._instances:
+            instance.start_processes()
+        time.sleep(2)
+        for instance in self._instances:
+            instance.start_threads()
+
+    def _shutdown(self):
+        for instance in self._instances:
+            instance.shutdown()
+
+    def _log_exception(self, exception: Exception):
+        message = "Agent has thrown an exception and will now terminate. "
+        message += f"Exception: {exception}"
+        logger.error(message)
+
+    def stop(self):
+        """
+        Signal the interface to stop running and clean up any processes
+        """
+        self.is_running = False
+
+    def get_observations(self) -> Dict:
+        """
+        Waits for a new capture from every instance and gathers them into the
+            batched arrays. The arrays are reused, so the observations are only
+            valid until the next call
+
+        :return: {Dictionary images: N x H x W x C images as np.array, states:
+            structured np.array of N COMBINED_DATA_TYPES records, is_image_stale:
+            np.array of N bools}
+        :rtype: Dict[str: np.array]
+        """
+        for i, instance in enumerate(self._instances):
+            observation = instance.observe_into(self._images[i])
+            self._state_bytes[i] = np.frombuffer(observation["state"], np.uint8)
+            self._is_image_stale[i] = observation["is_image_stale"]
+        return self._observations
+
+    def act(self, actions: np.array):
+        """
+        Submits one action to each instance, see AssettoCorsaInterface.act
+
+        :actions: An N x 3 array, row i in the format [steering angle, brake,
+            throttle] for instance i
+        :type: np.array
+        """
+        if len(actions) != self.n_instances:
+            message = f"Expected {self.n_instances} actions, received {len(actions)}"
+            raise ValueError(message)
+        for instance, action in zip(self._instances, actions):
+            # Rows are copied so submitting never changes the agent's actions
+            instance.act(np.array(action, dtype=np.float64))
+        System_Monitor.increment("vector_steps")
+
+    @abc.abstractmethod
+    def behaviour(self, observations: Dict) -> np.array:
+        """
+        Define this method in your agent class that inherits from this class
+            Accepts the batched observations of all instances and returns an
+            N x 3 array of actions
+
+        :observations: See get_observations
+        :type: Dict[str: np.array]
+        :return: An N x 3 array, row i in the format [steering angle, brake,
+            throttle] for instance i
+        :rtype: np.array
+        """
+
+    @abc.abstractmethod
+    def teardown(self):
+        """
+        Define this method in your agent class that inherits from this class
+            Teardown any running processes or write out final logs here
+        """
+
+    @abc.abstractmethod
+    def termination_condition(self, observations: Dict) -> bool:
+        """
+        Implement a condition based on the observations of all instances that
+            when met will cause the current experiment to terminate
+
+        :observations: See get_observations
+        :type: Dict[str: np.array]
+        :return: True to terminate agent execution, False to continue
+        :rtype: bool
+        """